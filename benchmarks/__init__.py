@@ -0,0 +1,7 @@
+"""Performance benchmarks.
+
+Each module can be run as a script, e.g.:
+
+    python -m benchmarks.pipeline --help
+
+"""
@@ -0,0 +1,90 @@
+"""Helpers shared by the benchmarks: timing, statistics and reporting."""
+
+import gc
+import io
+import json
+import platform
+import sys
+import time
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2: allocations are not reported.
+    tracemalloc = None
+
+from plover import __version__
+
+
+clock = getattr(time, 'perf_counter', time.time)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = int(round(p / 100.0 * (len(sorted_values) - 1)))
+    return sorted_values[rank]
+
+
+def latency_stats(samples):
+    """Summarize a list of durations (in seconds) in microseconds."""
+    samples = sorted(samples)
+    if not samples:
+        return {}
+    to_us = lambda s: round(s * 1e6, 2)
+    stats = {
+        'count': len(samples),
+        'mean': to_us(sum(samples) / len(samples)),
+        'min': to_us(samples[0]),
+        'max': to_us(samples[-1]),
+    }
+    for p in (50, 90, 99, 99.9):
+        stats['p%s' % ('%g' % p).replace('.', '_')] = to_us(percentile(samples, p))
+    return stats
+
+
+def measure_allocations(fn):
+    """Run fn once under tracemalloc.
+
+    Returns a dictionary with the number of allocated blocks and bytes
+    still alive after the run, and the peak traced memory, or None if
+    tracemalloc is not available.
+
+    """
+    if tracemalloc is None:
+        fn()
+        return None
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot()
+        fn()
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    diff = after.compare_to(before, 'filename')
+    return {
+        'blocks': sum(stat.count_diff for stat in diff),
+        'bytes': sum(stat.size_diff for stat in diff),
+        'peak_bytes': peak,
+    }
+
+
+def environment():
+    return {
+        'plover': __version__,
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+    }
+
+
+def write_report(report, filename):
+    contents = json.dumps(report, indent=2, sort_keys=True)
+    if not isinstance(contents, type(u'')):
+        contents = contents.decode('utf-8')
+    with io.open(filename, 'w', encoding='utf-8') as fp:
+        fp.write(contents)
+        fp.write(u'\n')
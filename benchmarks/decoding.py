@@ -0,0 +1,149 @@
+"""Benchmark the decoding of serial stenotype machines packets.
+
+For each protocol, random packets are decoded to actions (with the
+default keymap) using the machine action tables, and using the previous
+bit by bit decoding (followed by Keymap.keys_to_actions) for comparison.
+
+Usage:
+
+    python -m benchmarks.decoding [--packets 100000] [--output results.json]
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+
+from plover import system
+from plover.machine import geminipr, procat, stentura, txbolt
+from plover.machine.decoding import action_tables, decode
+
+from benchmarks.common import clock, environment, write_report
+
+
+def bitwise_geminipr(raw):
+    keys = []
+    for i, b in enumerate(bytearray(raw)):
+        for j in range(1, 8):
+            if (b & (0x80 >> j)):
+                keys.append(geminipr.STENO_KEY_CHART[i * 7 + j - 1])
+    return keys
+
+
+def bitwise_procat(raw):
+    keys = []
+    for i, b in enumerate(bytearray(raw[:3])):
+        for j in range(0, 8):
+            if b & 0x80 >> j:
+                key = procat.STENO_KEY_CHART[i * 8 + j]
+                if key:
+                    keys.append(key)
+    return keys
+
+
+def bitwise_txbolt(raw):
+    keys = []
+    for b in bytearray(raw):
+        key_set = b >> 6
+        for i in range(6):
+            if (b >> i) & 1:
+                keys.append(txbolt.STENO_KEY_CHART[(key_set * 6) + i])
+    return keys
+
+
+def bitwise_stentura(raw):
+    a, b, c, d = bytearray(raw)
+    fullstroke = (((a & 0x3f) << 18) | ((b & 0x3f) << 12) |
+                  ((c & 0x3f) << 6) | d & 0x3f)
+    return [stentura._STENO_KEY_CHART[i] for i in range(24)
+            if (fullstroke & (1 << (23 - i)))]
+
+
+def random_geminipr(rng):
+    return bytes(bytearray([0x80 | rng.randrange(0x80)] +
+                           [rng.randrange(0x80) for n in range(5)]))
+
+def random_procat(rng):
+    return bytes(bytearray([rng.randrange(0x80) for n in range(3)] + [0xff]))
+
+def random_txbolt(rng):
+    # One byte per set, the last set only uses 5 bits.
+    return bytes(bytearray([(key_set << 6) | rng.randrange(1, 0x20 if key_set == 3 else 0x40)
+                            for key_set in range(4)]))
+
+def random_stentura(rng):
+    return bytes(bytearray([0xc0 | rng.randrange(0x40) for n in range(4)]))
+
+
+PROTOCOLS = (
+    # (name, machine class, keymap, random packet, bitwise decoding)
+    ('geminipr', geminipr.GeminiPr, 'Gemini PR', random_geminipr, bitwise_geminipr),
+    ('procat', procat.ProCAT, 'ProCAT', random_procat, bitwise_procat),
+    ('txbolt', txbolt.TxBolt, 'TX Bolt', random_txbolt, bitwise_txbolt),
+    ('stentura', stentura.Stentura, 'Stentura', random_stentura, bitwise_stentura),
+)
+
+
+def run_protocol(machine_class, keymap, random_packet, bitwise, count, seed):
+    machine = machine_class({})
+    machine.set_mappings(system.KEYMAPS[keymap])
+    rng = random.Random(seed)
+    packets = [random_packet(rng) for n in range(count)]
+    if machine_class is txbolt.TxBolt:
+        # A single table for all the bytes of a stroke.
+        tables = machine._action_tables * 4
+    elif machine_class is stentura.Stentura:
+        tables = action_tables(stentura._KEY_TABLES, machine.keymap)
+    else:
+        tables = machine._action_tables
+    keys_to_actions = machine.keymap.keys_to_actions
+    start = clock()
+    for raw in packets:
+        keys_to_actions(bitwise(raw))
+    bitwise_duration = clock() - start
+    start = clock()
+    for raw in packets:
+        decode(tables, raw)
+    table_duration = clock() - start
+    return {
+        'packets': count,
+        'bitwise_packets_per_second': round(count / bitwise_duration, 1),
+        'table_packets_per_second': round(count / table_duration, 1),
+        'speedup': round(bitwise_duration / table_duration, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-n', '--packets', type=int, default=100000,
+                        help='number of packets decoded per protocol')
+    parser.add_argument('-p', '--protocol', action='append',
+                        choices=[p[0] for p in PROTOCOLS],
+                        help='only run this protocol (can be repeated)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=None,
+                        help='save the results to this JSON file')
+    args = parser.parse_args()
+
+    system.setup()
+    report = {
+        'benchmark': 'decoding',
+        'environment': environment(),
+        'protocols': {},
+    }
+    for name, machine_class, keymap, random_packet, bitwise in PROTOCOLS:
+        if args.protocol and name not in args.protocol:
+            continue
+        result = run_protocol(machine_class, keymap, random_packet, bitwise,
+                              args.packets, args.seed)
+        report['protocols'][name] = result
+        print('%-10s %12.1f packets/s (bitwise: %12.1f packets/s, x%.2f)'
+              % (name, result['table_packets_per_second'],
+                 result['bitwise_packets_per_second'], result['speedup']))
+    if args.output is not None:
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
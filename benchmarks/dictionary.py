@@ -0,0 +1,115 @@
+"""Benchmark the dictionary storage modes.
+
+Each dictionary (by default, the main dictionary) is loaded with each
+storage mode, and the following is reported:
+- the load time (including the conversion to the storage mode);
+- the memory used by the entries (see StenoDictionary.memory_usage), and
+  the savings compared to the default storage (tuples of strings keys);
+- the lookups throughput, for a random sample of the dictionary keys,
+  using RTF/CRE strings keys and stroke bitmasks keys.
+
+Usage:
+
+    python -m benchmarks.dictionary [--dictionary path.json] \\
+        [--lookups 100000] [--output results.json]
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import random
+
+from plover import system
+from plover.dictionary.base import load_dictionary
+from plover.oslayer.config import ASSETS_DIR
+from plover.steno import rtfcre_to_mask
+from plover.steno_dictionary import StenoDictionaryCollection
+
+from benchmarks.common import clock, environment, write_report
+
+
+MODES = (
+    # (name, int_keys, compact)
+    ('str_keys', False, False),
+    ('int_keys', True, False),
+    ('compact', True, True),
+)
+
+
+def time_lookups(lookup, keys):
+    start = clock()
+    for key in keys:
+        lookup(key)
+    return clock() - start
+
+
+def run_mode(filename, int_keys, compact, count, seed):
+    start = clock()
+    d = load_dictionary(filename)
+    d.set_storage(int_keys=int_keys, compact=compact)
+    load_time = clock() - start
+    collection = StenoDictionaryCollection(None)
+    collection.set_dicts([d])
+    rng = random.Random(seed)
+    keys = list(d)
+    keys = [rng.choice(keys) for n in range(count)]
+    masks = [[rtfcre_to_mask(stroke) for stroke in key] for key in keys]
+    masks = [m for m in masks if None not in m]
+    steno_time = time_lookups(collection.lookup, keys)
+    masks_time = time_lookups(collection.lookup_masks, masks)
+    return {
+        'entries': len(d),
+        'load_time': round(load_time, 6),
+        'memory': d.memory_usage(),
+        'steno_lookups_per_second': round(len(keys) / steno_time, 1),
+        'masks_lookups_per_second': round(len(masks) / masks_time, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-d', '--dictionary', action='append',
+                        help='dictionary to load (can be repeated)')
+    parser.add_argument('-n', '--lookups', type=int, default=100000,
+                        help='number of lookups')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=None,
+                        help='save the results to this JSON file')
+    args = parser.parse_args()
+
+    system.setup()
+    report = {
+        'benchmark': 'dictionary',
+        'environment': environment(),
+        'dictionaries': {},
+    }
+    filenames = args.dictionary or [os.path.join(ASSETS_DIR, 'main.json')]
+    for filename in filenames:
+        results = report['dictionaries'][filename] = {}
+        print(filename)
+        for name, int_keys, compact in MODES:
+            result = run_mode(filename, int_keys, compact,
+                              args.lookups, args.seed)
+            results[name] = result
+            memory = result['memory']
+            baseline = results['str_keys']['memory']['total']
+            result['memory_savings'] = round(1 - memory['total'] /
+                                             float(baseline), 4)
+            print('  %-10s %7u entries  %6.3fs  %7.1fMB (%5.1f%% saved)  '
+                  '%10.1f steno lookups/s  %10.1f masks lookups/s'
+                  % (name, result['entries'], result['load_time'],
+                     memory['total'] / 1e6, result['memory_savings'] * 100,
+                     result['steno_lookups_per_second'],
+                     result['masks_lookups_per_second']))
+            print('  %10s %s' % ('', '  '.join(
+                '%s %.1fMB' % (part, memory[part] / 1e6)
+                for part in ('entries', 'keys', 'translations',
+                             'reverse', 'casereverse'))))
+    if args.output is not None:
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
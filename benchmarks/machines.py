@@ -0,0 +1,162 @@
+"""Benchmark the serial machine drivers against simulated machines.
+
+Each machine is simulated over a pseudo-terminal pair (see
+plover.machine.simulator): the driver opens the slave side like a real
+serial port, while the simulator speaks the protocol on the master side.
+
+Reported, for each protocol:
+- the connect time: from start_capture to the machine being ready (for
+  the Stentura, this includes skipping the strokes already in the
+  realtime file);
+- the throughput in strokes per second, and the delivery latency, for
+  random strokes sent in bursts (note: with TX Bolt, the last stroke of
+  a burst is only delivered after the stroke timeout).
+
+Usage:
+
+    python -m benchmarks.machines [--protocol stentura] [--strokes 2000] \\
+        [--burst 10] [--existing 10000] [--output results.json]
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import random
+import threading
+
+from six import string_types
+
+from plover import system
+from plover.machine.base import STATE_RUNNING
+from plover.machine.registry import machine_registry
+from plover.machine.simulator import create_simulator, machine_params
+
+from benchmarks.common import clock, environment, latency_stats, \
+    write_report
+
+
+PROTOCOLS = (
+    # (name, machine)
+    ('geminipr', 'Gemini PR'),
+    ('passport', 'Passport'),
+    ('procat', 'ProCAT'),
+    ('stentura', 'Stentura'),
+    ('txbolt', 'TX Bolt'),
+)
+
+
+def bound_keys(machine_name):
+    keys = []
+    for action, key_list in system.KEYMAPS[machine_name].items():
+        if action == 'no-op':
+            continue
+        if isinstance(key_list, string_types):
+            key_list = (key_list,)
+        keys.extend(key_list)
+    return sorted(keys)
+
+
+def random_strokes(keys, count, rng):
+    # Only use bound keys, so no stroke is dropped.
+    return [rng.sample(keys, rng.randint(1, 6)) for n in range(count)]
+
+
+def run_protocol(machine_name, count, burst, existing, seed):
+    rng = random.Random(seed)
+    keys = bound_keys(machine_name)
+    machine_class = machine_registry.get(machine_name)
+    simulator = create_simulator(machine_name)
+    if existing and machine_name == 'Stentura':
+        # Fill the realtime file before connecting.
+        simulator.write_strokes(random_strokes(keys, existing, rng))
+    else:
+        existing = 0
+    simulator.start()
+    machine = machine_class(machine_params(machine_class, simulator))
+    machine.set_mappings(system.KEYMAPS[machine_name])
+    received = []
+    ready = threading.Event()
+    done = threading.Event()
+    def on_state(state):
+        if state == STATE_RUNNING:
+            ready.set()
+    def on_stroke(steno_keys):
+        received.append(clock())
+        if len(received) == count:
+            done.set()
+    machine.add_state_callback(on_state)
+    machine.add_stroke_callback(on_stroke)
+    try:
+        start = clock()
+        machine.start_capture()
+        if not ready.wait(60):
+            raise RuntimeError('machine not ready')
+        connect_time = clock() - start
+        sent = []
+        start = clock()
+        for n in range(0, count, burst):
+            strokes = random_strokes(keys, min(burst, count - n), rng)
+            now = clock()
+            sent.extend(now for stroke in strokes)
+            simulator.write_strokes(strokes)
+            # Leave time for the burst to be read.
+            while len(received) < len(sent) and not done.is_set():
+                done.wait(0.0005)
+        if not done.wait(60):
+            raise RuntimeError('only %u/%u strokes received'
+                               % (len(received), count))
+        duration = clock() - start
+    finally:
+        machine.stop_capture()
+        simulator.stop()
+    return {
+        'existing_strokes': existing,
+        'connect_time': round(connect_time, 6),
+        'strokes': count,
+        'burst': burst,
+        'strokes_per_second': round(count / duration, 1),
+        'latency_us': latency_stats([r - s for s, r in zip(sent, received)]),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-p', '--protocol', action='append',
+                        choices=[p[0] for p in PROTOCOLS],
+                        help='only run this protocol (can be repeated)')
+    parser.add_argument('-n', '--strokes', type=int, default=2000,
+                        help='number of strokes to send once connected')
+    parser.add_argument('-b', '--burst', type=int, default=10,
+                        help='number of strokes sent at once')
+    parser.add_argument('-e', '--existing', type=int, default=10000,
+                        help='number of strokes already in the Stentura '
+                        'realtime file')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=None,
+                        help='save the results to this JSON file')
+    args = parser.parse_args()
+
+    system.setup()
+    report = {
+        'benchmark': 'machines',
+        'environment': environment(),
+        'protocols': {},
+    }
+    for name, machine_name in PROTOCOLS:
+        if args.protocol and name not in args.protocol:
+            continue
+        result = run_protocol(machine_name, args.strokes, args.burst,
+                              args.existing, args.seed)
+        report['protocols'][name] = result
+        latency = result['latency_us']
+        print('%-10s connect %7.3fs  %9.1f strokes/s  '
+              'p50 %8.1fus  p99 %8.1fus  max %8.1fus'
+              % (name, result['connect_time'], result['strokes_per_second'],
+                 latency['p50'], latency['p99'], latency['max']))
+    if args.output is not None:
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
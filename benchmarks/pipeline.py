@@ -0,0 +1,206 @@
+"""Benchmark the Translator -> Formatter -> OutputHelper pipeline.
+
+A headless engine is fed a stream of strokes (sampled from the dictionary,
+or read from a file with one steno outline per line), and the output is
+captured instead of being sent to the OS. Each scenario (IME on/off x
+spaces before/after) reports its throughput in strokes per second, the
+per-stroke latency percentiles and, on Python 3, the allocations.
+
+Usage:
+
+    python -m benchmarks.pipeline [--dictionary main|synthetic] \\
+        [--strokes 2000] [--output results.json]
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import random
+import string
+
+from plover import system
+from plover.dictionary import json_dict
+from plover.headless import create_engine, dictionary_from_entries, \
+    send_keys, steno_to_keys
+from plover.oslayer.config import ASSETS_DIR
+from plover.steno import Stroke
+
+from benchmarks.common import clock, environment, latency_stats, \
+    measure_allocations, write_report
+
+
+SCENARIOS = (
+    # (name, ime, space_placement)
+    ('ime_off_spaces_before', False, 'Before Output'),
+    ('ime_off_spaces_after', False, 'After Output'),
+    ('ime_on_spaces_before', True, 'Before Output'),
+    ('ime_on_spaces_after', True, 'After Output'),
+)
+
+# Some entries exercising the formatter, merged in the synthetic dictionaries.
+SYNTHETIC_META_ENTRIES = (
+    ('-G', '{^ing}'),
+    ('-S', '{^s}'),
+    ('-D', '{^ed}'),
+    ('TP-PL', '{.}'),
+    ('KW-BG', '{,}'),
+    ('KPA', '{}{-|}'),
+    ('KPA*', '{^}{-|}'),
+    ('STPH-FPLT', '{#Control_L(a)}'),
+    ('TK-LS', '{^^}'),
+    ('-RBGS', '{^}{#Return}{^}{-|}'),
+)
+
+
+def main_dictionary():
+    return json_dict.load_dictionary(os.path.join(ASSETS_DIR, 'main.json'))
+
+
+def synthetic_dictionary(size, seed=0):
+    """Generate a dictionary of `size` random entries.
+
+    About 10% of the entries are multi-strokes outlines, so the translator
+    has to handle corrections of previous translations.
+
+    """
+    rand = random.Random(seed)
+    keys = [k for k in system.KEYS if k != system.NUMBER_KEY]
+
+    def random_stroke():
+        return Stroke(rand.sample(keys, rand.randint(1, 6))).rtfcre
+
+    def random_word():
+        return ''.join(rand.choice(string.ascii_lowercase)
+                       for n in range(rand.randint(2, 10)))
+
+    entries = {}
+    while len(entries) < size:
+        outline = [random_stroke()]
+        if rand.random() < 0.1:
+            outline.append(random_stroke())
+        entries['/'.join(outline)] = random_word()
+    entries.update(SYNTHETIC_META_ENTRIES)
+    return dictionary_from_entries(entries.items())
+
+
+def sample_strokes(dictionary, count, seed=0, correction_rate=0.05):
+    """Sample a list of strokes (as keys lists) from a dictionary."""
+    rand = random.Random(seed)
+    outlines = sorted(dictionary.keys())
+    undo = steno_to_keys(system.UNDO_STROKE_STENO)[0]
+    strokes = []
+    while len(strokes) < count:
+        if strokes and rand.random() < correction_rate:
+            strokes.append(undo)
+            continue
+        outline = rand.choice(outlines)
+        try:
+            strokes.extend(steno_to_keys('/'.join(outline)))
+        except ValueError:
+            # Not a valid steno outline for the current system.
+            continue
+    return strokes[:count]
+
+
+def load_strokes(filename):
+    """Load strokes from a file with one steno outline per line."""
+    strokes = []
+    with open(filename) as fp:
+        for line in fp:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                strokes.extend(steno_to_keys(line))
+    return strokes
+
+
+def run_scenario(dictionary, strokes, ime, space_placement, warmup=100):
+    """Run a single scenario, returns a dictionary of results."""
+
+    def new_engine():
+        return create_engine([dictionary], ime=ime,
+                             space_placement=space_placement)
+
+    engine = new_engine()
+    for keys in strokes[:warmup]:
+        send_keys(engine, keys)
+
+    engine = new_engine()
+    latencies = []
+    start = clock()
+    for keys in strokes:
+        stroke_start = clock()
+        send_keys(engine, keys)
+        latencies.append(clock() - stroke_start)
+    elapsed = clock() - start
+    output = engine.output
+
+    def replay():
+        engine = new_engine()
+        for keys in strokes:
+            send_keys(engine, keys)
+    allocations = measure_allocations(replay)
+
+    return {
+        'strokes': len(strokes),
+        'elapsed_s': round(elapsed, 6),
+        'strokes_per_second': round(len(strokes) / elapsed, 2) if elapsed else None,
+        'latency_us': latency_stats(latencies),
+        'allocations': allocations,
+        'output_instructions': len(output.instructions),
+        'output_length': len(output.text),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-d', '--dictionary', choices=('main', 'synthetic'),
+                        default='main', help='dictionary to translate with')
+    parser.add_argument('--synthetic-size', type=int, default=50000,
+                        help='number of entries in the synthetic dictionary')
+    parser.add_argument('-n', '--strokes', type=int, default=2000,
+                        help='number of strokes to sample from the dictionary')
+    parser.add_argument('-f', '--strokes-file', default=None,
+                        help='replay those strokes (one outline per line) '
+                        'instead of sampling the dictionary')
+    parser.add_argument('-s', '--scenario', action='append',
+                        choices=[s[0] for s in SCENARIOS],
+                        help='only run this scenario (can be repeated)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-o', '--output', default=None,
+                        help='save the results to this JSON file')
+    args = parser.parse_args()
+
+    if args.dictionary == 'main':
+        dictionary = main_dictionary()
+    else:
+        dictionary = synthetic_dictionary(args.synthetic_size, seed=args.seed)
+    if args.strokes_file is None:
+        strokes = sample_strokes(dictionary, args.strokes, seed=args.seed)
+    else:
+        strokes = load_strokes(args.strokes_file)
+
+    report = {
+        'benchmark': 'pipeline',
+        'environment': environment(),
+        'dictionary': args.dictionary,
+        'dictionary_size': len(dictionary),
+        'strokes': len(strokes),
+        'scenarios': {},
+    }
+    for name, ime, space_placement in SCENARIOS:
+        if args.scenario and name not in args.scenario:
+            continue
+        result = run_scenario(dictionary, strokes, ime, space_placement)
+        report['scenarios'][name] = result
+        latency = result['latency_us']
+        print('%-24s %10.1f strokes/s  p50 %8.1fus  p99 %8.1fus  max %8.1fus'
+              % (name, result['strokes_per_second'],
+                 latency['p50'], latency['p99'], latency['max']))
+    if args.output is not None:
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""Benchmark the X11 keyboard emulation (send_string/send_backspaces).
+
+The events are really sent, so this should be run against a virtual X
+server, e.g.:
+
+    xvfb-run python -m benchmarks.xkeyboard [--repeat 200] \\
+        [--output results.json]
+
+Each sample string is sent repeatedly, and its throughput in characters
+per second and the per-call latency percentiles are reported. The samples
+cover characters from the keymap (with and without modifiers) and
+characters needing a custom (remapped) keycode: for those, the number of
+keycode remaps, and of keyboard mapping updates (which should stay at 0,
+our own remaps do not trigger an update) are reported too.
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import os
+import sys
+
+from benchmarks.common import clock, environment, latency_stats, \
+    write_report
+
+
+SAMPLES = (
+    # (name, text)
+    ('lowercase', u'the quick brown fox jumps over the lazy dog '),
+    ('mixed_case', u'The Quick Brown Fox Jumps Over The Lazy Dog. '),
+    ('uppercase', u'THE QUICK BROWN FOX JUMPS OVER THE LAZY DOG '),
+    ('unmapped', u'\xe6\xf8\xe5 \u0153\u0142\u0111 \u03b1\u03b2\u03b3 '),
+)
+
+
+def run_sample(keyboard, text, repeat):
+    remaps, remap_hits, keymap_updates = \
+        keyboard.remaps, keyboard.remap_hits, keyboard.keymap_updates
+    samples = []
+    start = clock()
+    for n in range(repeat):
+        t0 = clock()
+        keyboard.send_string(text)
+        samples.append(clock() - t0)
+    # Clean up after ourselves.
+    keyboard.send_backspaces(len(text) * repeat)
+    duration = clock() - start
+    return {
+        'characters': len(text) * repeat,
+        'duration': round(duration, 6),
+        'characters_per_second': round(len(text) * repeat / sum(samples), 1),
+        'latency_us': latency_stats(samples),
+        'remaps': keyboard.remaps - remaps,
+        'remap_hits': keyboard.remap_hits - remap_hits,
+        'keymap_updates': keyboard.keymap_updates - keymap_updates,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('-n', '--repeat', type=int, default=200,
+                        help='number of times each sample is sent')
+    parser.add_argument('-s', '--sample', action='append',
+                        choices=[s[0] for s in SAMPLES],
+                        help='only run this sample (can be repeated)')
+    parser.add_argument('-o', '--output', default=None,
+                        help='save the results to this JSON file')
+    args = parser.parse_args()
+
+    if not os.environ.get('DISPLAY'):
+        sys.exit('no X display, run with xvfb-run')
+
+    from plover.oslayer.xkeyboardcontrol import KeyboardEmulation
+    keyboard = KeyboardEmulation()
+
+    report = {
+        'benchmark': 'xkeyboard',
+        'environment': environment(),
+        'display': os.environ['DISPLAY'],
+        'repeat': args.repeat,
+        'samples': {},
+    }
+    for name, text in SAMPLES:
+        if args.sample and name not in args.sample:
+            continue
+        result = run_sample(keyboard, text, args.repeat)
+        report['samples'][name] = result
+        latency = result['latency_us']
+        print('%-12s %10.1f chars/s  p50 %8.1fus  p99 %8.1fus  max %8.1fus'
+              '  remaps %u/%u  keymap updates %u'
+              % (name, result['characters_per_second'],
+                 latency['p50'], latency['p99'], latency['max'],
+                 result['remaps'], result['remaps'] + result['remap_hits'],
+                 result['keymap_updates']))
+    if args.output is not None:
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
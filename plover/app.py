@@ -17,6 +17,7 @@ interface.
 
 
 import os
+import threading
 # Import plover modules.
 import plover.config as conf
 import plover.formatting as formatting
@@ -27,6 +28,10 @@ from plover.machine.registry import machine_registry, NoSuchMachineException
 from plover.suggestions import Suggestions
 from plover import log
 from plover.dictionary.loading_manager import manager as dict_manager
+from plover.latency import LatencyMonitor, Tracer, clock
+from plover.profiling import StrokeProfiler
+from plover.startup import startup_timer
+from plover.stroke_queue import OVERFLOW_BLOCK, StrokeQueue
 from plover import system
 from plover.misc import SimpleNamespace
 
@@ -53,11 +58,17 @@ def update_engine(engine, config, reset_machine=False):
         raise InvalidConfigurationError(str(e))
     machine_options = config.get_machine_specific_options(machine_type)
     machine_mappings = config.get_system_keymap(machine_type)
+    engine.set_stroke_queue(config.get_stroke_queue_size(),
+                            config.get_stroke_queue_overflow())
     engine.set_machine(machine_class, machine_options, machine_mappings,
                        reset_machine=reset_machine)
+    startup_timer.mark('machine')
 
     dictionary_file_names = config.get_dictionary_file_names()
-    engine.set_dictionaries(dictionary_file_names)
+    engine.set_dictionaries(dictionary_file_names,
+                            int_keys=config.get_dictionary_int_keys(),
+                            compact=config.get_dictionary_compact())
+    startup_timer.mark('dictionaries')
 
     log_file_name = config.get_log_file_name()
     if log_file_name:
@@ -77,6 +88,12 @@ def update_engine(engine, config, reset_machine=False):
     enable_translation_logging = config.get_enable_translation_logging()
     engine.enable_translation_logging(enable_translation_logging)
 
+    enable_latency_monitoring = config.get_enable_latency_monitoring()
+    engine.enable_latency_monitoring(enable_latency_monitoring)
+
+    enable_tracing = config.get_enable_tracing()
+    engine.enable_tracing(enable_tracing)
+
     space_placement = config.get_space_placement()
     engine.set_space_placement(space_placement)
 
@@ -133,6 +150,19 @@ class StenoEngine(object):
         self.machine_mappings = None
         self.suggestions = None
         self.thread_hook = thread_hook
+        # When set, strokes are translated on the queue thread (instead
+        # of going through thread_hook).
+        self.stroke_queue = None
+        # Held while translating, and while changing the translator,
+        # formatter or dictionaries state: strokes are not necessarily
+        # translated on the GUI thread.
+        self.lock = threading.RLock()
+        # Where the instrumented stages are recorded: the latency
+        # monitor, or the tracer when tracing, or None.
+        self.latency_monitor = None
+        self._latency_monitor = None
+        self.tracer = None
+        self.profiler = None
 
         self.translator = translation.Translator(self)
         self.formatter = formatting.Formatter()
@@ -171,9 +201,11 @@ class StenoEngine(object):
             machine = machine_class(machine_options)
             if machine_mappings is not None:
                machine.set_mappings(machine_mappings)
+            machine.latency_monitor = self.latency_monitor
             machine.add_state_callback(self._machine_state_callback)
             machine.add_stroke_callback(log.stroke)
-            machine.add_stroke_callback(self._translator_machine_callback)
+            machine.add_stroke_callback(self._translator_machine_callback,
+                                        self._translator_machine_batch_callback)
             self.machine = machine
             self.machine_class = machine_class
             self.machine_options = machine_options
@@ -184,10 +216,39 @@ class StenoEngine(object):
             is_running = False
         self.set_is_running(is_running)
 
-    def set_dictionaries(self, file_names):
+    def set_stroke_queue(self, size, overflow=OVERFLOW_BLOCK):
+        """Set the stroke queue size (0 to disable it) and overflow policy.
+
+        The pending strokes in a previous queue are translated first.
+
+        """
+        queue = self.stroke_queue
+        if queue is not None:
+            if queue.size == size and queue.overflow == overflow:
+                return
+            self.stroke_queue = None
+            queue.stop()
+        if size:
+            log.debug('stroke queue: size %u, %s on overflow', size, overflow)
+            queue = StrokeQueue(size, overflow)
+            queue.start()
+            self.stroke_queue = queue
+
+    def get_stroke_queue(self):
+        """Return the stroke queue, or None if disabled.
+
+        The queue metrics can be read with its stats method.
+
+        """
+        return self.stroke_queue
+
+    def set_dictionaries(self, file_names, int_keys=False, compact=False):
         dictionary = self.translator.get_dictionary()
         dicts = dict_manager.load(file_names)
-        dictionary.set_dicts(dicts)
+        for d in dicts:
+            d.set_storage(int_keys=int_keys or compact, compact=compact)
+        with self.lock:
+            dictionary.set_dicts(dicts)
         self.suggestions = Suggestions(dictionary)
 
     def get_dictionary(self):
@@ -199,24 +260,30 @@ class StenoEngine(object):
     def set_is_running(self, value):
         if value != self.is_running:
             log.debug('%s output', 'enabling' if value else 'disabling')
-        self.is_running = value
-        if self.is_running:
-            self.translator.set_state(self.running_state)
-            self.formatter.set_output(self.full_output)
-        else:
-            self.translator.clear_state()
-            self.formatter.set_output(self.command_only_output)
+        with self.lock:
+            self.is_running = value
+            if self.is_running:
+                self.translator.set_state(self.running_state)
+                self.formatter.set_output(self.full_output)
+            else:
+                self.translator.clear_state()
+                self.formatter.set_output(self.command_only_output)
         if self.machine is not None:
             self.machine.set_suppression(self.is_running)
         for callback in self.subscribers:
             callback(None)
 
     def set_output(self, o):
-        self.full_output.send_backspaces = o.send_backspaces
-        self.full_output.send_string = o.send_string
-        self.full_output.send_key_combination = o.send_key_combination
-        self.full_output.send_engine_command = o.send_engine_command
-        self.command_only_output.send_engine_command = o.send_engine_command
+        with self.lock:
+            self.full_output.send_backspaces = o.send_backspaces
+            self.full_output.send_string = o.send_string
+            self.full_output.send_key_combination = o.send_key_combination
+            self.full_output.send_engine_command = o.send_engine_command
+            # Optional.
+            self.full_output.send_edit = getattr(o, 'send_edit', None)
+            self.full_output.send_actions = getattr(o, 'send_actions', None)
+            self.command_only_output.send_engine_command = \
+                o.send_engine_command
 
     def destroy(self):
         """Halts the stenography capture-translate-format-display pipeline.
@@ -229,6 +296,10 @@ class StenoEngine(object):
         """
         if self.machine:
             self.machine.stop_capture()
+        queue = self.stroke_queue
+        if queue is not None:
+            self.stroke_queue = None
+            queue.stop()
         self.is_running = False
 
     def add_callback(self, callback):
@@ -251,37 +322,239 @@ class StenoEngine(object):
 
     def set_space_placement(self, s):
         """Set whether spaces will be inserted before the output or after the output."""
-        self.formatter.set_space_placement(s)
-        self.translator.set_space_placement(s)
+        with self.lock:
+            self.formatter.set_space_placement(s)
+            self.translator.set_space_placement(s)
 
     def set_starting_stroke_state(self, capitalize=False, attach=False):
-        self.formatter.start_attached = attach
-        self.formatter.start_capitalized = capitalize
-        self.translator.start_attached = attach
-        self.translator.start_capitalized = capitalize
+        with self.lock:
+            self.formatter.start_attached = attach
+            self.formatter.start_capitalized = capitalize
+            self.translator.start_attached = attach
+            self.translator.start_capitalized = capitalize
 
     def set_undo_levels(self, levels):
         """Set the maximum number of changes that can be undone."""
-        self.translator.set_min_undo_length(levels)
+        with self.lock:
+            self.translator.set_min_undo_length(levels)
 
     def enable_translation_logging(self, b):
         """Turn translation logging on or off."""
         log.enable_translation_logging(b)
 
+    def enable_latency_monitoring(self, b):
+        """Turn latency monitoring of the pipeline stages on or off."""
+        if b == (self._latency_monitor is not None):
+            return
+        log.info('enable_latency_monitoring(%s)', b)
+        self._latency_monitor = LatencyMonitor() if b else None
+        self._update_instrumentation()
+
+    def get_latency_monitor(self):
+        """Return the latency monitor, or None if monitoring is disabled.
+
+        The monitor histograms can be read with its summary method.
+
+        """
+        return self._latency_monitor
+
+    def enable_tracing(self, b):
+        """Turn stroke tracing on or off."""
+        if b == (self.tracer is not None):
+            return
+        log.info('enable_tracing(%s)', b)
+        self.tracer = Tracer() if b else None
+        self._update_instrumentation()
+
+    def get_tracer(self):
+        """Return the tracer, or None if tracing is disabled."""
+        return self.tracer
+
+    def dump_trace(self, filename):
+        """Dump the strokes trace in Chrome trace format.
+
+        Return False if tracing is disabled.
+
+        """
+        tracer = self.tracer
+        if tracer is None:
+            return False
+        with open(filename, 'w') as fp:
+            tracer.dump(fp)
+        return True
+
+    def start_profiling(self):
+        """Start profiling the stroke processing.
+
+        The profiler is started on the stroke processing thread, once the
+        pending strokes have been translated.
+
+        """
+        self._run_in_stroke_thread(self._start_profiling)
+
+    def _start_profiling(self):
+        with self.lock:
+            if self.profiler is not None:
+                log.warning('the profiler is already running')
+                return
+            log.info('start profiling')
+            self.profiler = StrokeProfiler()
+
+    def stop_profiling(self, filename):
+        """Stop profiling, save the profile data to filename, and log
+        a summary of the top functions.
+
+        Like start_profiling, this is done on the stroke processing thread,
+        so the profile is not saved while a stroke is being profiled.
+
+        """
+        self._run_in_stroke_thread(self._stop_profiling, filename)
+
+    def _stop_profiling(self, filename):
+        with self.lock:
+            profiler = self.profiler
+            if profiler is None:
+                log.warning('cannot stop the profiler: it is not running')
+                return
+            self.profiler = None
+        log.info('stop profiling, saving profile to %s', filename)
+        try:
+            profiler.dump(filename)
+        except Exception:
+            log.error('saving the profile failed', exc_info=True)
+            return
+        log.info('%s', profiler.summary())
+
+    def _update_instrumentation(self):
+        if self.tracer is None:
+            sink = self._latency_monitor
+        else:
+            self.tracer.monitor = self._latency_monitor
+            sink = self.tracer
+        with self.lock:
+            self.latency_monitor = sink
+            self.translator.latency_monitor = sink
+            self.translator.tracer = self.tracer
+            self.formatter.latency_monitor = sink
+            self.formatter.tracer = self.tracer
+        if self.machine is not None:
+            self.machine.latency_monitor = sink
+
     def add_stroke_listener(self, listener):
         self.stroke_listeners.append(listener)
 
     def remove_stroke_listener(self, listener):
         self.stroke_listeners.remove(listener)
 
-    def _translate_stroke(self, s):
-        stroke = steno.Stroke(s)
+    def _translate_stroke(self, s, queued=None, stroke_id=None):
+        with self.lock:
+            self._profile(self._process_stroke, s, queued, stroke_id)
+
+    def _translate_strokes(self, strokes, queued=None, stroke_id=None):
+        with self.lock:
+            self._profile(self._process_strokes, strokes, queued, stroke_id)
+
+    def _profile(self, fn, *args):
+        profiler = self.profiler
+        if profiler is None:
+            fn(*args)
+            return
+        profiler.enable()
+        try:
+            fn(*args)
+        finally:
+            profiler.disable()
+
+    def _queue_args(self):
+        queue = self.stroke_queue
+        if queue is None:
+            return None
+        return {'depth': queue.depth}
+
+    def _process_stroke(self, s, queued, stroke_id):
+        monitor = self.latency_monitor
+        if monitor is None:
+            stroke = steno.stroke_from_keys(s)
+        else:
+            tracer = self.tracer
+            if tracer is not None:
+                tracer.stroke_id = stroke_id
+            start = clock()
+            if queued is not None:
+                monitor.add('queue', start - queued, self._queue_args())
+            stroke = steno.stroke_from_keys(s)
+            monitor.add('stroke', clock() - start, {'steno': stroke.rtfcre})
         self.translator.translate(stroke)
         for listener in self.stroke_listeners:
             listener(stroke)
+        if monitor is not None:
+            if queued is not None:
+                monitor.add('total', clock() - queued)
+            if tracer is not None:
+                tracer.stroke_id = None
+
+    def _process_strokes(self, strokes, queued, stroke_id):
+        # Note: the whole batch shares the same stroke id when tracing.
+        monitor = self.latency_monitor
+        if monitor is None:
+            strokes = [steno.stroke_from_keys(s) for s in strokes]
+        else:
+            tracer = self.tracer
+            if tracer is not None:
+                tracer.stroke_id = stroke_id
+            start = clock()
+            if queued is not None:
+                args = self._queue_args()
+                for s in strokes:
+                    monitor.add('queue', start - queued, args)
+            strokes = [steno.stroke_from_keys(s) for s in strokes]
+            monitor.add('stroke', clock() - start,
+                        {'steno': '/'.join(s.rtfcre for s in strokes)})
+        self.translator.translate_strokes(strokes)
+        for stroke in strokes:
+            for listener in self.stroke_listeners:
+                listener(stroke)
+        if monitor is not None:
+            if queued is not None:
+                end = clock()
+                for stroke in strokes:
+                    monitor.add('total', end - queued)
+            if tracer is not None:
+                tracer.stroke_id = None
+
+    def _schedule(self, fn, s, *args):
+        queue = self.stroke_queue
+        if queue is None:
+            self.thread_hook(fn, s, *args)
+        elif not queue.submit(fn, s, *args):
+            log.warning('stroke queue full, dropping: %s', s)
+
+    def _run_in_stroke_thread(self, fn, *args):
+        # Like _schedule, but for calls that must not be dropped.
+        queue = self.stroke_queue
+        if queue is None:
+            self.thread_hook(fn, *args)
+        else:
+            queue.call(fn, *args)
 
     def _translator_machine_callback(self, s):
-        self.thread_hook(self._translate_stroke, s)
+        if self.latency_monitor is None:
+            self._schedule(self._translate_stroke, s)
+        elif self.tracer is None:
+            self._schedule(self._translate_stroke, s, clock())
+        else:
+            self._schedule(self._translate_stroke, s, clock(),
+                           self.tracer.new_stroke_id())
+
+    def _translator_machine_batch_callback(self, strokes):
+        # A single thread hop, and translator pass, for all the strokes.
+        if self.latency_monitor is None:
+            self._schedule(self._translate_strokes, strokes)
+        elif self.tracer is None:
+            self._schedule(self._translate_strokes, strokes, clock())
+        else:
+            self._schedule(self._translate_strokes, strokes, clock(),
+                           self.tracer.new_stroke_id())
 
     def _notify_listeners(self, s):
         for callback in self.subscribers:
@@ -20,6 +20,7 @@ from plover.exception import InvalidConfigurationError
 from plover.machine.registry import machine_registry
 from plover.oslayer.config import ASSETS_DIR, CONFIG_DIR
 from plover.misc import expand_path, shorten_path
+from plover.stroke_queue import OVERFLOW_BLOCK, OVERFLOW_POLICIES
 from plover import system
 from plover import log
 
@@ -35,6 +36,12 @@ MACHINE_TYPE_OPTION = 'machine_type'
 DEFAULT_MACHINE_TYPE = 'Keyboard'
 MACHINE_AUTO_START_OPTION = 'auto_start'
 DEFAULT_MACHINE_AUTO_START = False
+# Strokes are translated on a dedicated thread, through a bounded queue
+# (0 to translate on the machine thread).
+STROKE_QUEUE_SIZE_OPTION = 'stroke_queue_size'
+DEFAULT_STROKE_QUEUE_SIZE = 1000
+STROKE_QUEUE_OVERFLOW_OPTION = 'stroke_queue_overflow'
+DEFAULT_STROKE_QUEUE_OVERFLOW = OVERFLOW_BLOCK
 
 DEFAULT_DICTIONARIES = ['main.json',
                         'commands.json',
@@ -43,6 +50,16 @@ DEFAULT_DICTIONARIES = ['main.json',
 DICTIONARY_CONFIG_SECTION = 'Dictionary Configuration'
 DICTIONARY_FILE_OPTION = 'dictionary_file'
 
+# Note: not in the dictionary configuration section, since all its options
+# are replaced when setting the dictionary file names.
+DICTIONARY_STORAGE_SECTION = 'Dictionary Storage'
+# Store the dictionary keys as integers (stroke bitmasks).
+DICTIONARY_INT_KEYS_OPTION = 'int_keys'
+DEFAULT_DICTIONARY_INT_KEYS = False
+# Compact storage (also stores the keys as integers).
+DICTIONARY_COMPACT_OPTION = 'compact'
+DEFAULT_DICTIONARY_COMPACT = False
+
 LOGGING_CONFIG_SECTION = 'Logging Configuration'
 LOG_FILE_OPTION = 'log_file'
 DEFAULT_LOG_FILE = 'strokes.log'
@@ -50,6 +67,10 @@ ENABLE_STROKE_LOGGING_OPTION = 'enable_stroke_logging'
 DEFAULT_ENABLE_STROKE_LOGGING = False
 ENABLE_TRANSLATION_LOGGING_OPTION = 'enable_translation_logging'
 DEFAULT_ENABLE_TRANSLATION_LOGGING = False
+ENABLE_LATENCY_MONITORING_OPTION = 'enable_latency_monitoring'
+DEFAULT_ENABLE_LATENCY_MONITORING = False
+ENABLE_TRACING_OPTION = 'enable_tracing'
+DEFAULT_ENABLE_TRACING = False
 
 STARTUP_SECTION = 'Startup'
 START_MINIMIZED_OPTION = 'Start Minimized'
@@ -178,6 +199,7 @@ SYSTEM_KEYMAP_OPTION = 'keymap[%s]'
 # Dictionary constants.
 JSON_EXTENSION = '.json'
 RTF_EXTENSION = '.rtf'
+SQLITE_EXTENSION = '.db'
 
 # Logging constants.
 LOG_EXTENSION = '.log'
@@ -239,6 +261,32 @@ class Config(object):
         return self._get(MACHINE_CONFIG_SECTION, MACHINE_TYPE_OPTION, 
                          DEFAULT_MACHINE_TYPE)
 
+    def get_stroke_queue_size(self):
+        size = self._get_int(MACHINE_CONFIG_SECTION, STROKE_QUEUE_SIZE_OPTION,
+                             DEFAULT_STROKE_QUEUE_SIZE)
+        if size < 0:
+            log.error("Invalid stroke queue size %d, using %d",
+                      size, DEFAULT_STROKE_QUEUE_SIZE)
+            size = DEFAULT_STROKE_QUEUE_SIZE
+        return size
+
+    def set_stroke_queue_size(self, size):
+        assert size >= 0
+        self._set(MACHINE_CONFIG_SECTION, STROKE_QUEUE_SIZE_OPTION, size)
+
+    def get_stroke_queue_overflow(self):
+        overflow = self._get(MACHINE_CONFIG_SECTION, STROKE_QUEUE_OVERFLOW_OPTION,
+                             DEFAULT_STROKE_QUEUE_OVERFLOW)
+        if overflow not in OVERFLOW_POLICIES:
+            log.error("Invalid stroke queue overflow policy %s, using %s",
+                      overflow, DEFAULT_STROKE_QUEUE_OVERFLOW)
+            overflow = DEFAULT_STROKE_QUEUE_OVERFLOW
+        return overflow
+
+    def set_stroke_queue_overflow(self, overflow):
+        assert overflow in OVERFLOW_POLICIES
+        self._set(MACHINE_CONFIG_SECTION, STROKE_QUEUE_OVERFLOW_OPTION, overflow)
+
     def set_machine_specific_options(self, machine_name, options):
         self._update(machine_name, sorted(options.items()))
 
@@ -278,6 +326,22 @@ class Config(object):
         filenames = [expand_path(path) for path in filenames]
         return filenames
 
+    def set_dictionary_int_keys(self, b):
+        self._set(DICTIONARY_STORAGE_SECTION, DICTIONARY_INT_KEYS_OPTION, b)
+
+    def get_dictionary_int_keys(self):
+        return self._get_bool(DICTIONARY_STORAGE_SECTION,
+                              DICTIONARY_INT_KEYS_OPTION,
+                              DEFAULT_DICTIONARY_INT_KEYS)
+
+    def set_dictionary_compact(self, b):
+        self._set(DICTIONARY_STORAGE_SECTION, DICTIONARY_COMPACT_OPTION, b)
+
+    def get_dictionary_compact(self):
+        return self._get_bool(DICTIONARY_STORAGE_SECTION,
+                              DICTIONARY_COMPACT_OPTION,
+                              DEFAULT_DICTIONARY_COMPACT)
+
     def set_log_file_name(self, filename):
         filename = shorten_path(filename)
         self._set(LOGGING_CONFIG_SECTION, LOG_FILE_OPTION, filename)
@@ -303,6 +367,22 @@ class Config(object):
                               ENABLE_TRANSLATION_LOGGING_OPTION, 
                               DEFAULT_ENABLE_TRANSLATION_LOGGING)
 
+    def set_enable_latency_monitoring(self, b):
+        self._set(LOGGING_CONFIG_SECTION, ENABLE_LATENCY_MONITORING_OPTION, b)
+
+    def get_enable_latency_monitoring(self):
+        return self._get_bool(LOGGING_CONFIG_SECTION,
+                              ENABLE_LATENCY_MONITORING_OPTION,
+                              DEFAULT_ENABLE_LATENCY_MONITORING)
+
+    def set_enable_tracing(self, b):
+        self._set(LOGGING_CONFIG_SECTION, ENABLE_TRACING_OPTION, b)
+
+    def get_enable_tracing(self):
+        return self._get_bool(LOGGING_CONFIG_SECTION,
+                              ENABLE_TRACING_OPTION,
+                              DEFAULT_ENABLE_TRACING)
+
     def set_auto_start(self, b):
         self._set(MACHINE_CONFIG_SECTION, MACHINE_AUTO_START_OPTION, b)
 
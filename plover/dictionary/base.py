@@ -8,21 +8,23 @@
 """Common elements to all dictionary formats."""
 
 from os.path import splitext
+import importlib
 import shutil
 import sys
 import threading
 
 # Python 2/3 compatibility.
-from six import reraise
+from six import reraise, string_types
 
-import plover.dictionary.json_dict as json_dict
-import plover.dictionary.rtfcre_dict as rtfcre_dict
-from plover.config import JSON_EXTENSION, RTF_EXTENSION
+from plover.config import JSON_EXTENSION, RTF_EXTENSION, SQLITE_EXTENSION
 from plover.exception import DictionaryLoaderException
 
+# Dictionary format module for each extension. A module name can be used
+# instead, in which case the module is imported on first use.
 dictionaries = {
-    JSON_EXTENSION.lower(): json_dict,
-    RTF_EXTENSION.lower(): rtfcre_dict,
+    JSON_EXTENSION.lower(): 'plover.dictionary.json_dict',
+    RTF_EXTENSION.lower(): 'plover.dictionary.rtfcre_dict',
+    SQLITE_EXTENSION.lower(): 'plover.dictionary.sqlite_dict',
 }
 
 def _get_dictionary_module(filename):
@@ -33,6 +35,9 @@ def _get_dictionary_module(filename):
         raise DictionaryLoaderException(
             'Unsupported extension: %s. Supported extensions: %s' %
             (extension, ', '.join(sorted(dictionaries.keys()))))
+    if isinstance(dictionary_module, string_types):
+        dictionary_module = importlib.import_module(dictionary_module)
+        dictionaries[extension] = dictionary_module
     return dictionary_module
 
 def create_dictionary(filename):
@@ -52,7 +57,7 @@ def create_dictionary(filename):
         ne = DictionaryLoaderException('creating %s failed: %s' % (filename, str(e)))
         reraise(type(ne), ne, sys.exc_info()[2])
     d.set_path(filename)
-    d.save = ThreadedSaver(d, filename, dictionary_module.save_dictionary)
+    _set_saver(d, filename, dictionary_module)
     return d
 
 def load_dictionary(filename):
@@ -67,9 +72,14 @@ def load_dictionary(filename):
         ne = DictionaryLoaderException('loading \'%s\' failed: %s' % (filename, str(e)))
         reraise(type(ne), ne, sys.exc_info()[2])
     d.set_path(filename)
-    d.save = ThreadedSaver(d, filename, dictionary_module.save_dictionary)
+    _set_saver(d, filename, dictionary_module)
     return d
 
+def _set_saver(d, filename, dictionary_module):
+    # Formats without a save function save the dictionary themselves.
+    if dictionary_module.save_dictionary is not None:
+        d.save = ThreadedSaver(d, filename, dictionary_module.save_dictionary)
+
 def save_dictionary(d, filename, saver):
     # Write the new file to a temp location.
     tmp = filename + '.tmp'
@@ -13,10 +13,11 @@ except ImportError:
     import json
 
 # Python 2/3 compatibility.
-from six import iteritems
+from six import iteritems, iterkeys, itervalues
+from six.moves import zip
 
 from plover.steno_dictionary import StenoDictionary
-from plover.steno import normalize_steno
+from plover.steno import normalize_steno_batch
 
 def create_dictionary():
     return StenoDictionary()
@@ -33,8 +34,11 @@ def load_dictionary(filename):
     else:
         raise ValueError('\'%s\' encoding could not be determined' % (filename,))
 
-    return StenoDictionary((normalize_steno(x[0]), x[1])
-                           for x in iteritems(dict(d)))
+    d = dict(d)
+    # Identical translations share the same string.
+    translations = {}
+    values = (translations.setdefault(v, v) for v in itervalues(d))
+    return StenoDictionary(zip(normalize_steno_batch(iterkeys(d)), values))
 
 
 def save_dictionary(d, fp):
@@ -0,0 +1,310 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""SQLite backed dictionaries, for very large dictionaries.
+
+The entries stay on disk: lookups, reverse lookups and continuations
+lookups are indexed queries, with the most recently used entries kept in
+memory. The length of the longest key is stored in the database metadata,
+so loading does not need to go through the entries.
+
+Changes are written in a transaction, committed when the dictionary is
+saved.
+
+To convert an existing dictionary:
+
+    python -m plover.dictionary.sqlite_dict main.json main.db
+
+"""
+
+# Python 2/3 compatibility.
+from __future__ import print_function
+
+import argparse
+import collections
+import sqlite3
+import sys
+import threading
+
+from six import iteritems
+
+from plover.steno import STROKE_DELIMITER, mask_to_rtfcre
+from plover.steno_dictionary import StenoDictionary
+
+
+# Maximum number of entries (and misses) kept in memory.
+HOT_CACHE_SIZE = 10000
+
+# Number of keys fetched at once when iterating over the dictionary.
+ITERATION_BATCH_SIZE = 1000
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS metadata (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    steno TEXT PRIMARY KEY,
+    translation TEXT NOT NULL,
+    lowercase TEXT NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_translation ON entries (translation);
+CREATE INDEX IF NOT EXISTS entries_lowercase ON entries (lowercase);
+CREATE INDEX IF NOT EXISTS entries_length ON entries (length);
+'''
+
+LONGEST_KEY_METADATA = 'longest_key'
+
+# Marker for the keys not in the dictionary, in the hot entries cache.
+_MISSING = object()
+
+
+def _steno(key):
+    return STROKE_DELIMITER.join(key)
+
+def _key(steno):
+    return tuple(steno.split(STROKE_DELIMITER))
+
+
+class SqliteDictionary(StenoDictionary):
+    """A steno dictionary stored in an SQLite database.
+
+    The database is opened when the path is set.
+
+    """
+
+    def __init__(self, *args, **kw):
+        self._db = None
+        self._lock = threading.RLock()
+        self._in_transaction = False
+        self._hot = collections.OrderedDict()
+        StenoDictionary.__init__(self, *args, **kw)
+        self.save = self._save
+
+    def set_path(self, path):
+        if path == self.get_path() and self._db is not None:
+            return
+        with self._lock:
+            if self._db is not None:
+                self.close()
+            StenoDictionary.set_path(self, path)
+            # Note: connections are shared between threads, hence the lock.
+            db = sqlite3.connect(path, check_same_thread=False,
+                                 isolation_level=None)
+            db.executescript(SCHEMA)
+            self._db = db
+            self._hot.clear()
+            row = db.execute('SELECT value FROM metadata WHERE name = ?',
+                             (LONGEST_KEY_METADATA,)).fetchone()
+            if row is None:
+                longest_key = self._max_key_length()
+            else:
+                longest_key = int(row[0])
+            self._longest_key = longest_key
+
+    def close(self):
+        """Commit pending changes, and close the database."""
+        with self._lock:
+            if self._db is None:
+                return
+            self._save()
+            self._db.close()
+            self._db = None
+
+    def _execute(self, sql, args=()):
+        with self._lock:
+            return self._db.execute(sql, args).fetchall()
+
+    def _begin(self):
+        # Must be called with the lock held.
+        if not self._in_transaction:
+            self._db.execute('BEGIN')
+            self._in_transaction = True
+
+    def _save(self):
+        with self._lock:
+            if self._in_transaction:
+                self._db.execute('COMMIT')
+                self._in_transaction = False
+
+    def _max_key_length(self):
+        rows = self._execute('SELECT MAX(length) FROM entries')
+        return rows[0][0] or 0
+
+    def _set_longest_key(self, longest_key):
+        # Must be called with the lock held, in a transaction.
+        self._db.execute('INSERT OR REPLACE INTO metadata (name, value) '
+                         'VALUES (?, ?)', (LONGEST_KEY_METADATA,
+                                           str(longest_key)))
+        self._longest_key = longest_key
+
+    def _cache(self, key, value):
+        # Must be called with the lock held.
+        hot = self._hot
+        if len(hot) >= HOT_CACHE_SIZE:
+            hot.popitem(last=False)
+        hot[key] = value
+
+    def __len__(self):
+        return self._execute('SELECT COUNT(*) FROM entries')[0][0]
+
+    def _iter_rows(self):
+        # Fetch the entries in batches, so the lock is not held while
+        # iterating.
+        steno = None
+        while True:
+            if steno is None:
+                rows = self._execute('SELECT steno, translation FROM entries '
+                                     'ORDER BY steno LIMIT ?',
+                                     (ITERATION_BATCH_SIZE,))
+            else:
+                rows = self._execute('SELECT steno, translation FROM entries '
+                                     'WHERE steno > ? ORDER BY steno LIMIT ?',
+                                     (steno, ITERATION_BATCH_SIZE))
+            for row in rows:
+                yield row
+            if len(rows) < ITERATION_BATCH_SIZE:
+                break
+            steno = rows[-1][0]
+
+    def __iter__(self):
+        for steno, translation in self._iter_rows():
+            yield _key(steno)
+
+    def items(self):
+        """Iterate over the (key, translation) entries."""
+        for steno, translation in self._iter_rows():
+            yield _key(steno), translation
+
+    iteritems = items
+
+    def __getitem__(self, key):
+        key = tuple(key)
+        with self._lock:
+            hot = self._hot
+            value = hot.pop(key, None)
+            if value is None:
+                rows = self._db.execute('SELECT translation FROM entries '
+                                        'WHERE steno = ?',
+                                        (_steno(key),)).fetchall()
+                value = rows[0][0] if rows else _MISSING
+            self._cache(key, value)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def get_masks(self, masks):
+        return self.get(tuple(mask_to_rtfcre(mask) for mask in masks))
+
+    def __setitem__(self, key, value):
+        self.update(((key, value),))
+
+    def update(self, *args, **kw):
+        """Add entries, in a single transaction."""
+        entries = dict(*args, **kw)
+        if not entries:
+            return
+        with self._lock:
+            self._begin()
+            self._db.executemany(
+                'INSERT OR REPLACE INTO entries '
+                '(steno, translation, lowercase, length) VALUES (?, ?, ?, ?)',
+                ((_steno(key), value, value.lower(), len(key))
+                 for key, value in iteritems(entries)))
+            longest_key = self.longest_key
+            for key, value in iteritems(entries):
+                key = tuple(key)
+                if key in self._hot:
+                    self._hot[key] = value
+                longest_key = max(longest_key, len(key))
+            if longest_key != self.longest_key:
+                self._set_longest_key(longest_key)
+
+    def __delitem__(self, key):
+        key = tuple(key)
+        with self._lock:
+            self._begin()
+            cursor = self._db.execute('DELETE FROM entries WHERE steno = ?',
+                                      (_steno(key),))
+            if not cursor.rowcount:
+                raise KeyError(key)
+            self._hot.pop(key, None)
+            if len(key) == self.longest_key:
+                self._set_longest_key(self._max_key_length())
+
+    def reverse_lookup(self, value):
+        return [_key(row[0]) for row in
+                self._execute('SELECT steno FROM entries '
+                              'WHERE translation = ?', (value,))]
+
+    def casereverse_lookup(self, value):
+        rows = self._execute('SELECT DISTINCT translation FROM entries '
+                             'WHERE lowercase = ?', (value,))
+        if not rows:
+            return None
+        return set(row[0] for row in rows)
+
+    def continuations(self, key):
+        # The keys continuing "KAT" are the ones in the ["KAT/", "KAT0")
+        # range ("0" is the character after the stroke delimiter).
+        prefix = _steno(key) + STROKE_DELIMITER
+        end = prefix[:-1] + chr(ord(STROKE_DELIMITER) + 1)
+        return [(_key(steno), translation) for steno, translation in
+                self._execute('SELECT steno, translation FROM entries '
+                              'WHERE steno >= ? AND steno < ?',
+                              (prefix, end))]
+
+    def set_storage(self, int_keys=False, compact=False):
+        # The entries are not kept in memory.
+        pass
+
+    def memory_usage(self):
+        """Return an estimate of the memory used by the hot entries cache."""
+        usage = {
+            'entries': 0,
+            'keys': 0,
+            'translations': 0,
+            'reverse': 0,
+            'casereverse': 0,
+            'cache': sys.getsizeof(self._hot) +
+                     sum(sys.getsizeof(k) + sys.getsizeof(v)
+                         for k, v in iteritems(self._hot)),
+        }
+        usage['total'] = sum(usage.values())
+        return usage
+
+
+def create_dictionary():
+    return SqliteDictionary()
+
+def load_dictionary(filename):
+    d = SqliteDictionary()
+    d.set_path(filename)
+    return d
+
+# Changes are saved by the dictionary itself.
+save_dictionary = None
+
+
+def main():
+    """Convert a dictionary to the SQLite format."""
+    # Avoid circular imports.
+    from plover.dictionary.base import load_dictionary as load
+    from plover import system
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument('source', help='dictionary to convert')
+    parser.add_argument('destination', help='SQLite dictionary to create '
+                        '(or update)')
+    args = parser.parse_args(args=sys.argv[1:])
+    system.setup()
+    source = load(args.source)
+    d = load_dictionary(args.destination)
+    d.update(source.items())
+    d.save()
+    print('%u entries, longest key: %u' % (len(d), d.longest_key))
+    d.close()
+
+
+if __name__ == '__main__':
+    main()
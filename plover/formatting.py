@@ -10,8 +10,10 @@ This module defines and implements plover's custom dictionary language.
 from os.path import commonprefix
 from collections import namedtuple
 from plover import orthography
+from plover.latency import clock
 import re
 import string
+import sys
 
 
 class Formatter(object):
@@ -34,18 +36,37 @@ class Formatter(object):
     send_engine_command -- Takes a string which names the special command to
     execute.
 
+    send_edit -- Optional, takes a number of backspaces and a string: delete
+    back that many characters and then print the string. If available, it is
+    used instead of send_backspaces and send_string, so a correction is sent
+    in one operation.
+
+    send_actions -- Optional, takes the list of everything to output for a
+    stroke, in order: ('edit', backspaces, string), ('combo', combination)
+    and ('command', command) tuples. If available, it is used instead of all
+    the other functions, so a stroke is output in one operation.
+
     """
 
     output_type = namedtuple(
         'output', ['send_backspaces', 'send_string', 'send_key_combination',
-                   'send_engine_command'])
+                   'send_engine_command', 'send_edit', 'send_actions'])
+    # Optional output functions: None if not supported.
+    optional_output = ('send_edit', 'send_actions')
     start_capitalized = False
     start_attached = False
+    # Set by the engine when latency monitoring is enabled.
+    latency_monitor = None
+    # Set by the engine when tracing is enabled.
+    tracer = None
 
     def __init__(self):
         self.set_output(None)
         self.spaces_after = False
         self._listeners = set()
+        # Last rendered initial formatting, and its text.
+        self._initial_formatting = None
+        self._initial_text = u''
 
     def add_listener(self, callback):
         """Add a listener for translation outputs.
@@ -68,7 +89,9 @@ class Formatter(object):
         noop = lambda x: None
         output_type = self.output_type
         fields = output_type._fields
-        self._output = output_type(*[getattr(output, f, noop) for f in fields])
+        optional = self.optional_output
+        self._output = output_type(*[getattr(output, f, None if f in optional else noop)
+                                     for f in fields])
 
     def set_space_placement(self, s):
         # Set whether spaces will be inserted
@@ -92,6 +115,10 @@ class Formatter(object):
         rendered translations. If there is no context then this may be None.
 
         """
+        monitor = self.latency_monitor
+        if monitor is not None:
+            start = clock()
+
         prev_formatting = prev.formatting if prev else None
 
         for t in do:
@@ -110,7 +137,33 @@ class Formatter(object):
         for callback in self._listeners:
             callback(old, new)
 
-        OutputHelper(self._output, prev_formatting).render(old, new)
+        # The same context is often used for consecutive strokes (e.g.
+        # when a multi-strokes translation is extended), so its text is
+        # cached.
+        if prev_formatting is not self._initial_formatting:
+            self._initial_formatting = prev_formatting
+            self._initial_text = OutputHelper._actions_to_text(prev_formatting or ())
+        output_helper = OutputHelper(self._output, prev_formatting,
+                                     initial_text=self._initial_text)
+
+        if monitor is None:
+            output_helper.render(old, new)
+            return
+        render_start = clock()
+        output_helper.render(old, new)
+        end = clock()
+        monitor.add('render', end - render_start)
+        if self.tracer is None:
+            args = None
+        else:
+            # Actions are traced through their translation's stroke.
+            args = {
+                'undo_strokes': [t.stroke_id for t in undo],
+                'do_strokes': [t.stroke_id for t in do],
+                'undo_actions': len(old),
+                'do_actions': len(new),
+            }
+        monitor.add('format', end - start, args)
 
     def _get_last_action(self, actions):
         """Return last action in actions if possible or return a default action."""
@@ -119,6 +172,36 @@ class Formatter(object):
         return _Action(attach=self.start_attached, capitalize=self.start_capitalized)
 
 
+if sys.maxunicode == 65535:
+
+    # Python 2.7 has narrow Unicode on Mac OS X and Windows: characters
+    # outside the BMP are stored as surrogate pairs.
+
+    _SURROGATE_PAIR_RE = re.compile(u'[\ud800-\udbff][\udc00-\udfff]')
+
+    def _code_point_count(s):
+        """Return the number of characters in s."""
+        return len(s) - len(_SURROGATE_PAIR_RE.findall(s))
+
+    def _code_point_boundary(before, after, offset):
+        """Adjust a common prefix length so it does not split a character."""
+        if offset and u'\ud800' <= before[offset - 1] <= u'\udbff':
+            for s in (before, after):
+                if offset < len(s) and u'\udc00' <= s[offset] <= u'\udfff':
+                    return offset - 1
+        return offset
+
+else:
+
+    def _code_point_count(s):
+        """Return the number of characters in s."""
+        return len(s)
+
+    def _code_point_boundary(before, after, offset):
+        """Adjust a common prefix length so it does not split a character."""
+        return offset
+
+
 class OutputHelper(object):
     """A helper class for minimizing the amount of change on output.
 
@@ -126,47 +209,76 @@ class OutputHelper(object):
     optimizes away extra backspaces and typing.
 
     """
-    def __init__(self, output, initial_formatting=None):
+    def __init__(self, output, initial_formatting=None, initial_text=None):
         if initial_formatting is None:
             self.initial_formatting = []
         else:
             self.initial_formatting = initial_formatting
+        # Text of initial_formatting (computed on render if not provided).
+        self.initial_text = initial_text
         self.before = None
         self.after = None
+        # Length of the prefix known to be unchanged between before and
+        # after: only the text past this point needs to be compared.
+        self.unchanged = 0
         self.output = output
+        # The actions to send with send_actions, if supported by the output.
+        self.actions = None
 
     def commit(self):
-        # Python narrow Unicode is useless for long characters
-        # UTF-32 is a good container to count characters
-        before_32 = self.before.encode('utf-32-be')
-        after_32 = self.after.encode('utf-32-be')
-        # Get the closest multiple of 4 for length
-        offset = len(commonprefix([before_32, after_32]))//4*4
-        if before_32[offset:]:
-            self.output.send_backspaces(len(before_32[offset:])//4)
-        if after_32[offset:]:
-            # Convert back to Unicode for the send_string method
-            self.output.send_string(after_32[offset:].decode('utf-32-be'))
+        before = self.before
+        after = self.after
+        offset = self.unchanged
+        offset += len(commonprefix([before[offset:], after[offset:]]))
+        offset = _code_point_boundary(before, after, offset)
+        backspaces = _code_point_count(before[offset:])
+        text = after[offset:]
+        send_edit = getattr(self.output, 'send_edit', None)
+        if self.actions is not None:
+            if backspaces or text:
+                self.actions.append(('edit', backspaces, text))
+        elif send_edit is not None and backspaces and text:
+            send_edit(backspaces, text)
+        else:
+            if backspaces:
+                self.output.send_backspaces(backspaces)
+            if text:
+                self.output.send_string(text)
 
         self.before = ''
         self.after = ''
+        self.unchanged = 0
 
     @staticmethod
     def _actions_to_text(action_list, text=u''):
+        return OutputHelper._apply_actions(action_list, text)[0]
+
+    @staticmethod
+    def _apply_actions(action_list, text=u''):
+        """Apply actions to text.
+
+        Return the new text, and the length of its prefix left untouched.
+
+        """
+        unchanged = len(text)
         for a in action_list:
             if a.replace and text.endswith(a.replace):
                 text = text[:-len(a.replace)]
+                unchanged = min(unchanged, len(text))
             # With numbers, it's possible to have a.text='2' with a.word='1.2'
             # folowing by an action that replaces '1.2' by '$1.20'...
             if len(a.word) > len(a.text) and a.word.endswith(text):
                 text = a.word
+                unchanged = 0
             else:
                 text += a.text
-        return text
+        return text, unchanged
 
     def render(self, undo, do):
 
-        initial_text = self._actions_to_text(self.initial_formatting)
+        initial_text = self.initial_text
+        if initial_text is None:
+            initial_text = self._actions_to_text(self.initial_formatting)
 
         min_length = min(len(undo), len(do))
         for i in range(min_length):
@@ -180,22 +292,35 @@ class OutputHelper(object):
             undo = undo[i:]
             do = do[i:]
 
-        self.before = initial_text
-        self.after = initial_text[:]
-
-        self.before = self._actions_to_text(undo, self.before)
+        self.before, self.unchanged = self._apply_actions(undo, initial_text)
+        self.after = initial_text
 
+        send_actions = getattr(self.output, 'send_actions', None)
+        if send_actions is not None:
+            self.actions = []
         for a in do:
             if a.replace and self.after.endswith(a.replace):
                 self.after = self.after[:-len(a.replace)]
+                self.unchanged = min(self.unchanged, len(self.after))
             self.after += a.text
             if a.combo:
                 self.commit()
-                self.output.send_key_combination(a.combo)
+                if self.actions is None:
+                    self.output.send_key_combination(a.combo)
+                else:
+                    self.actions.append(('combo', a.combo))
             if a.command:
                 self.commit()
-                self.output.send_engine_command(a.command)
+                if self.actions is None:
+                    self.output.send_engine_command(a.command)
+                else:
+                    self.actions.append(('command', a.command))
         self.commit()
+        if send_actions is not None:
+            actions = self.actions
+            self.actions = None
+            if actions:
+                send_actions(actions)
 
 
 class _Action(object):
@@ -348,23 +473,18 @@ def _translation_to_actions(translation, last_action, spaces_after):
     Returns: A list of actions.
 
     """
-    actions = []
-    # Reduce the translation to atoms. An atom is an irreducible string that is
-    # either entirely a single meta command or entirely text containing no meta
-    # commands.
-    if translation.isdigit():
-        # If a translation is only digits then glue it to neighboring digits.
-        atoms = [_apply_glue(translation)]
-    else:
-        atoms = [
-            x.strip(' ') for x in META_RE.findall(translation) if x.strip(' ')
-        ]
+    atoms = _parse_translation(translation)
 
     if not atoms:
         return [last_action.copy_state()]
 
+    if spaces_after:
+        atom_to_action = _parsed_atom_to_action_spaces_after
+    else:
+        atom_to_action = _parsed_atom_to_action_spaces_before
+    actions = []
     for atom in atoms:
-        action = _atom_to_action(atom, last_action, spaces_after)
+        action = atom_to_action(atom, last_action)
         actions.append(action)
         last_action = action
     return actions
@@ -397,6 +517,122 @@ MODE_RESET_CASE = 'RESET_CASE'
 MODE_CAMEL = 'CAMEL'
 MODE_RESET = 'RESET'
 
+# Kinds of parsed atoms.
+ATOM_TEXT = 'text'
+ATOM_COMMA = 'comma'
+ATOM_STOP = 'stop'
+ATOM_CAPITALIZE = 'capitalize'
+ATOM_LOWER = 'lower'
+ATOM_UPPER = 'upper'
+ATOM_RETRO_CAPITALIZE = 'retro_capitalize'
+ATOM_RETRO_LOWER = 'retro_lower'
+ATOM_RETRO_UPPER = 'retro_upper'
+ATOM_CARRY_CAPITALIZATION = 'carry_capitalization'
+ATOM_RETRO_FORMAT = 'retro_format'
+ATOM_COMMAND = 'command'
+ATOM_MODE = 'mode'
+ATOM_GLUE = 'glue'
+ATOM_ATTACH = 'attach'
+ATOM_KEY_COMBINATION = 'key_combination'
+# A meta which does not match any known kind (it produces an empty action).
+ATOM_UNKNOWN = 'unknown'
+
+# An atom, parsed independently of its context:
+# - kind: one of the ATOM_* constants.
+# - value: the unescaped text for text atoms, or the meta argument (e.g.
+#   the command name for a command, or the text to attach for an attach
+#   atom).
+# - begin, end: for attach atoms, whether to attach to the previous and
+#   next word.
+_ParsedAtom = namedtuple('_ParsedAtom', 'kind value begin end')
+
+# Maximum number of translations kept in the parsed translations cache.
+TRANSLATION_CACHE_SIZE = 10000
+
+_translation_cache = {}
+
+
+def _parse_atom(atom):
+    """Parse an atom (see _atom_to_action) into a _ParsedAtom."""
+    meta = _get_meta(atom)
+    if meta is None:
+        return _ParsedAtom(ATOM_TEXT, _unescape_atom(atom), False, False)
+    meta = _unescape_atom(meta)
+    begin = end = False
+    if meta in META_COMMAS:
+        kind = ATOM_COMMA
+    elif meta in META_STOPS:
+        kind = ATOM_STOP
+    elif meta == META_CAPITALIZE:
+        kind = ATOM_CAPITALIZE
+    elif meta == META_LOWER:
+        kind = ATOM_LOWER
+    elif meta == META_UPPER:
+        kind = ATOM_UPPER
+    elif meta == META_RETRO_CAPITALIZE:
+        kind = ATOM_RETRO_CAPITALIZE
+    elif meta == META_RETRO_LOWER:
+        kind = ATOM_RETRO_LOWER
+    elif meta == META_RETRO_UPPER:
+        kind = ATOM_RETRO_UPPER
+    elif (meta.startswith(META_CARRY_CAPITALIZATION) or
+          meta.startswith(META_ATTACH_FLAG + META_CARRY_CAPITALIZATION)):
+        kind = ATOM_CARRY_CAPITALIZATION
+    elif meta.startswith(META_RETRO_FORMAT):
+        if meta.endswith(')'):
+            kind = ATOM_RETRO_FORMAT
+        else:
+            kind = ATOM_UNKNOWN
+    elif meta.startswith(META_COMMAND):
+        kind = ATOM_COMMAND
+        meta = meta[len(META_COMMAND):]
+    elif meta.startswith(META_MODE):
+        kind = ATOM_MODE
+        meta = meta[len(META_MODE):]
+    elif meta.startswith(META_GLUE_FLAG):
+        kind = ATOM_GLUE
+        meta = meta[len(META_GLUE_FLAG):]
+    elif (meta.startswith(META_ATTACH_FLAG) or
+          meta.endswith(META_ATTACH_FLAG)):
+        kind = ATOM_ATTACH
+        begin = meta.startswith(META_ATTACH_FLAG)
+        end = meta.endswith(META_ATTACH_FLAG)
+        if begin:
+            meta = meta[len(META_ATTACH_FLAG):]
+        if end and len(meta) >= len(META_ATTACH_FLAG):
+            meta = meta[:-len(META_ATTACH_FLAG)]
+    elif meta.startswith(META_KEY_COMBINATION):
+        kind = ATOM_KEY_COMBINATION
+        meta = meta[len(META_KEY_COMBINATION):]
+    else:
+        kind = ATOM_UNKNOWN
+    return _ParsedAtom(kind, meta, begin, end)
+
+
+def _parse_translation(translation):
+    """Reduce a translation to a tuple of parsed atoms.
+
+    An atom is an irreducible string that is either entirely a single meta
+    command or entirely text containing no meta commands. Parsing does not
+    depend on the context, so the result is cached.
+
+    """
+    atoms = _translation_cache.get(translation)
+    if atoms is not None:
+        return atoms
+    if translation.isdigit():
+        # If a translation is only digits then glue it to neighboring digits.
+        strings = [_apply_glue(translation)]
+    else:
+        strings = [
+            x.strip(' ') for x in META_RE.findall(translation) if x.strip(' ')
+        ]
+    atoms = tuple(_parse_atom(atom) for atom in strings)
+    if len(_translation_cache) >= TRANSLATION_CACHE_SIZE:
+        _translation_cache.clear()
+    _translation_cache[translation] = atoms
+    return atoms
+
 
 def _raw_to_actions(stroke, last_action, spaces_after):
     """Turn a raw stroke into actions.
@@ -460,6 +696,11 @@ def _atom_to_action_spaces_before(atom, last_action):
     Returns: An action for the atom.
 
     """
+    return _parsed_atom_to_action_spaces_before(_parse_atom(atom), last_action)
+
+
+def _parsed_atom_to_action_spaces_before(atom, last_action):
+    """Convert a parsed atom into an action (see _atom_to_action_spaces_before)."""
 
     action = _Action(space_char=last_action.space_char, case=last_action.case)
     last_word = last_action.word
@@ -471,119 +712,10 @@ def _atom_to_action_spaces_before(atom, last_action):
     last_upper_carry = last_action.upper_carry
     last_orthography = last_action.orthography
     begin = False  # for meta attach
-    meta = _get_meta(atom)
-    if meta is not None:
-        meta = _unescape_atom(meta)
-        if meta in META_COMMAS:
-            action.text = meta
-        elif meta in META_STOPS:
-            action.text = meta
-            action.capitalize = True
-            action.lower = False
-            action.upper = False
-        elif meta == META_CAPITALIZE:
-            action = last_action.copy_state()
-            action.capitalize = True
-            action.lower = False
-            action.upper = False
-        elif meta == META_LOWER:
-            action = last_action.copy_state()
-            action.lower = True
-            action.upper = False
-            action.capitalize = False
-        elif meta == META_UPPER:
-            action = last_action.copy_state()
-            action.lower = False
-            action.upper = True
-            action.capitalize = False
-        elif meta == META_RETRO_CAPITALIZE:
-            action = last_action.copy_state()
-            action.word = _capitalize(action.word)
-            if len(last_action.text) < len(last_action.word):
-                action.replace = last_action.word
-                action.text = _capitalize(last_action.word)
-            else:
-                action.replace = last_action.text
-                action.text = _capitalize_nowhitespace(last_action.text)
-        elif meta == META_RETRO_LOWER:
-            action = last_action.copy_state()
-            action.word = _lower(action.word)
-            if len(last_action.text) < len(last_action.word):
-                action.replace = last_action.word
-                action.text = _lower(last_action.word)
-            else:
-                action.replace = last_action.text
-                action.text = _lower_nowhitespace(last_action.text)
-        elif meta == META_RETRO_UPPER:
-            action = last_action.copy_state()
-            action.word = _upper(action.word)
-            action.upper_carry = True
-            if len(last_action.text) < len(last_action.word):
-                action.replace = last_action.word
-                action.text = _upper(last_action.word)
-            else:
-                action.replace = last_action.text
-                action.text = _upper(last_action.text)
-        elif (meta.startswith(META_CARRY_CAPITALIZATION) or
-              meta.startswith(META_ATTACH_FLAG + META_CARRY_CAPITALIZATION)):
-            action = _apply_carry_capitalize(meta, last_action)
-        elif meta.startswith(META_RETRO_FORMAT):
-            if meta.startswith(META_RETRO_FORMAT) and meta.endswith(')'):
-                action = _apply_currency(meta, last_action)
-        elif meta.startswith(META_COMMAND):
-            action = last_action.copy_state()
-            action.command = meta[len(META_COMMAND):]
-        elif meta.startswith(META_MODE):
-            action = last_action.copy_state()
-            action = _change_mode(meta[len(META_MODE):], action)
-        elif meta.startswith(META_GLUE_FLAG):
-            action.glue = True
-            glue = last_glue or last_attach
-            space = NO_SPACE if glue else SPACE
-            text = meta[len(META_GLUE_FLAG):]
-            if last_capitalize:
-                text = _capitalize(text)
-            if last_lower:
-                text = _lower(text)
-            action.text = space + text
-            action.word = _rightmost_word(last_word + action.text)
-        elif (meta.startswith(META_ATTACH_FLAG) or
-              meta.endswith(META_ATTACH_FLAG)):
-            begin = meta.startswith(META_ATTACH_FLAG)
-            end = meta.endswith(META_ATTACH_FLAG)
-            if begin:
-                meta = meta[len(META_ATTACH_FLAG):]
-            if end and len(meta) >= len(META_ATTACH_FLAG):
-                meta = meta[:-len(META_ATTACH_FLAG)]
-            space = NO_SPACE if begin or last_attach else SPACE
-            if end:
-                action.attach = True
-            if begin and end and meta == '':
-                # We use an empty connection to indicate a "break" in the
-                # application of orthography rules. This allows the
-                # stenographer to tell plover not to auto-correct a word.
-                action.orthography = False
-            if (((begin and not end) or (begin and end and ' ' in meta)) and
-                    last_orthography):
-                new = orthography.add_suffix(last_word.lower(), meta)
-                common = commonprefix([last_word.lower(), new])
-                action.replace = last_word[len(common):]
-                meta = new[len(common):]
-            if last_capitalize:
-                meta = _capitalize(meta)
-            if last_lower:
-                meta = _lower(meta)
-            if last_upper_carry:
-                meta = _upper(meta)
-                action.upper_carry = True
-            action.text = space + meta
-            action.word = _rightmost_word(
-                last_word[:len(last_word)-len(action.replace)] + action.text)
-        elif meta.startswith(META_KEY_COMBINATION):
-            action = last_action.copy_state()
-            action.combo = meta[len(META_KEY_COMBINATION):]
-    else:
-        text = _unescape_atom(atom)
+    kind = atom.kind
+    meta = atom.value
+    if kind == ATOM_TEXT:
+        text = meta
         if last_capitalize:
             text = _capitalize(text)
         if last_lower:
@@ -594,6 +726,107 @@ def _atom_to_action_spaces_before(atom, last_action):
         space = NO_SPACE if last_attach else SPACE
         action.text = space + text
         action.word = _rightmost_word(text)
+    elif kind == ATOM_COMMA:
+        action.text = meta
+    elif kind == ATOM_STOP:
+        action.text = meta
+        action.capitalize = True
+        action.lower = False
+        action.upper = False
+    elif kind == ATOM_CAPITALIZE:
+        action = last_action.copy_state()
+        action.capitalize = True
+        action.lower = False
+        action.upper = False
+    elif kind == ATOM_LOWER:
+        action = last_action.copy_state()
+        action.lower = True
+        action.upper = False
+        action.capitalize = False
+    elif kind == ATOM_UPPER:
+        action = last_action.copy_state()
+        action.lower = False
+        action.upper = True
+        action.capitalize = False
+    elif kind == ATOM_RETRO_CAPITALIZE:
+        action = last_action.copy_state()
+        action.word = _capitalize(action.word)
+        if len(last_action.text) < len(last_action.word):
+            action.replace = last_action.word
+            action.text = _capitalize(last_action.word)
+        else:
+            action.replace = last_action.text
+            action.text = _capitalize_nowhitespace(last_action.text)
+    elif kind == ATOM_RETRO_LOWER:
+        action = last_action.copy_state()
+        action.word = _lower(action.word)
+        if len(last_action.text) < len(last_action.word):
+            action.replace = last_action.word
+            action.text = _lower(last_action.word)
+        else:
+            action.replace = last_action.text
+            action.text = _lower_nowhitespace(last_action.text)
+    elif kind == ATOM_RETRO_UPPER:
+        action = last_action.copy_state()
+        action.word = _upper(action.word)
+        action.upper_carry = True
+        if len(last_action.text) < len(last_action.word):
+            action.replace = last_action.word
+            action.text = _upper(last_action.word)
+        else:
+            action.replace = last_action.text
+            action.text = _upper(last_action.text)
+    elif kind == ATOM_CARRY_CAPITALIZATION:
+        action = _apply_carry_capitalize(meta, last_action)
+    elif kind == ATOM_RETRO_FORMAT:
+        action = _apply_currency(meta, last_action)
+    elif kind == ATOM_COMMAND:
+        action = last_action.copy_state()
+        action.command = meta
+    elif kind == ATOM_MODE:
+        action = last_action.copy_state()
+        action = _change_mode(meta, action)
+    elif kind == ATOM_GLUE:
+        action.glue = True
+        glue = last_glue or last_attach
+        space = NO_SPACE if glue else SPACE
+        text = meta
+        if last_capitalize:
+            text = _capitalize(text)
+        if last_lower:
+            text = _lower(text)
+        action.text = space + text
+        action.word = _rightmost_word(last_word + action.text)
+    elif kind == ATOM_ATTACH:
+        begin = atom.begin
+        end = atom.end
+        space = NO_SPACE if begin or last_attach else SPACE
+        if end:
+            action.attach = True
+        if begin and end and meta == '':
+            # We use an empty connection to indicate a "break" in the
+            # application of orthography rules. This allows the
+            # stenographer to tell plover not to auto-correct a word.
+            action.orthography = False
+        if (((begin and not end) or (begin and end and ' ' in meta)) and
+                last_orthography):
+            new = orthography.add_suffix(last_word.lower(), meta)
+            common = commonprefix([last_word.lower(), new])
+            action.replace = last_word[len(common):]
+            meta = new[len(common):]
+        if last_capitalize:
+            meta = _capitalize(meta)
+        if last_lower:
+            meta = _lower(meta)
+        if last_upper_carry:
+            meta = _upper(meta)
+            action.upper_carry = True
+        action.text = space + meta
+        action.word = _rightmost_word(
+            last_word[:len(last_word)-len(action.replace)] + action.text)
+    elif kind == ATOM_KEY_COMBINATION:
+        action = last_action.copy_state()
+        action.combo = meta
 
     action.text = _apply_mode(action.text, action.case, action.space_char,
                               begin, last_attach, last_glue,
@@ -616,6 +849,11 @@ def _atom_to_action_spaces_after(atom, last_action):
     Returns: An action for the atom.
 
     """
+    return _parsed_atom_to_action_spaces_after(_parse_atom(atom), last_action)
+
+
+def _parsed_atom_to_action_spaces_after(atom, last_action):
+    """Convert a parsed atom into an action (see _atom_to_action_spaces_after)."""
 
     action = _Action(space_char=last_action.space_char, case=last_action.case)
     last_word = last_action.word
@@ -629,164 +867,156 @@ def _atom_to_action_spaces_after(atom, last_action):
     last_space = SPACE if last_action.text.endswith(SPACE) else NO_SPACE
     was_space = len(last_space) is not 0
     begin = False  # for meta attach
-    meta = _get_meta(atom)
-    if meta is not None:
-        meta = _unescape_atom(meta)
-        if meta in META_COMMAS:
-            action.text = meta + SPACE
-            if last_action.text != '':
-                if was_space:
-                    action.replace = SPACE
-                else:
-                    action.replace = NO_SPACE
-            if last_attach:
-                action.replace = NO_SPACE
-        elif meta in META_STOPS:
-            action.text = meta + SPACE
-            action.capitalize = True
-            action.lower = False
-            if last_action.text != '':
-                if was_space:
-                    action.replace = SPACE
-                else:
-                    action.replace = NO_SPACE
-            if last_attach:
-                action.replace = NO_SPACE
-        elif meta == META_CAPITALIZE:
-            action = last_action.copy_state()
-            action.capitalize = True
-            action.lower = False
-        elif meta == META_LOWER:
-            action = last_action.copy_state()
+    kind = atom.kind
+    meta = atom.value
+    if kind == ATOM_TEXT:
+        text = meta
+        if last_capitalize:
+            text = _capitalize(text)
+        if last_lower:
+            text = _lower(text)
+        if last_upper:
+            text = _upper(text)
+            action.upper_carry = True
+
+        action.text = text + SPACE
+        action.word = _rightmost_word(text)
+    elif kind == ATOM_COMMA:
+        action.text = meta + SPACE
+        if last_action.text != '':
             if was_space:
-                # Persist space state
                 action.replace = SPACE
-                action.text = SPACE
-            action.lower = True
-            action.capitalize = False
-        elif meta == META_UPPER:
-            action = last_action.copy_state()
-            action.lower = False
-            action.upper = True
-            action.capitalize = False
-        elif (meta.startswith(META_CARRY_CAPITALIZATION) or
-              meta.startswith(META_ATTACH_FLAG + META_CARRY_CAPITALIZATION)):
-            action = _apply_carry_capitalize(meta, last_action, spaces_after=True)
-        elif meta == META_RETRO_CAPITALIZE:
-            action = last_action.copy_state()
-            action.word = _capitalize(action.word)
-            if len(last_action.text) < len(last_action.word):
-                action.replace = last_action.word + SPACE
-                action.text = _capitalize(last_action.word + SPACE)
-            else:
-                action.replace = last_action.text
-                action.text = _capitalize_nowhitespace(last_action.text)
-        elif meta == META_RETRO_LOWER:
-            action = last_action.copy_state()
-            action.word = _lower(action.word)
-            if len(last_action.text) < len(last_action.word):
-                action.replace = last_action.word + SPACE
-                action.text = _lower(last_action.word + SPACE)
             else:
-                action.replace = last_action.text
-                action.text = _lower_nowhitespace(last_action.text)
-        elif meta == META_RETRO_UPPER:
-            action = last_action.copy_state()
-            action.word = _upper(action.word)
-            action.upper_carry = True
-            if len(last_action.text) < len(last_action.word):
-                action.replace = last_action.word + SPACE
-                action.text = _upper(last_action.word + SPACE)
+                action.replace = NO_SPACE
+        if last_attach:
+            action.replace = NO_SPACE
+    elif kind == ATOM_STOP:
+        action.text = meta + SPACE
+        action.capitalize = True
+        action.lower = False
+        if last_action.text != '':
+            if was_space:
+                action.replace = SPACE
             else:
-                action.replace = last_action.text
-                action.text = _upper(last_action.text)
-        elif meta.startswith(META_RETRO_FORMAT):
-            if meta.startswith(META_RETRO_FORMAT) and meta.endswith(')'):
-                action = _apply_currency(meta, last_action, spaces_after=True)
-        elif meta.startswith(META_COMMAND):
-            action = last_action.copy_state()
-            action.command = meta[len(META_COMMAND):]
-        elif meta.startswith(META_MODE):
-            action = last_action.copy_state()
-            action = _change_mode(meta[len(META_MODE):], action)
-        elif meta.startswith(META_GLUE_FLAG):
-            action.glue = True
-            text = meta[len(META_GLUE_FLAG):]
-            if last_capitalize:
-                text = _capitalize(text)
-            if last_lower:
-                text = _lower(text)
-            action.text = text + SPACE
-            action.word = _rightmost_word(text)
-            if last_glue:
-                if was_space:
-                    action.replace = SPACE
-                else:
-                    action.replace = NO_SPACE
-                action.word = _rightmost_word(last_word + text)
-            if last_attach:
                 action.replace = NO_SPACE
-                action.word = _rightmost_word(last_word + text)
-        elif (meta.startswith(META_ATTACH_FLAG) or
-              meta.endswith(META_ATTACH_FLAG)):
-            begin = meta.startswith(META_ATTACH_FLAG)
-            end = meta.endswith(META_ATTACH_FLAG)
-            if begin:
-                meta = meta[len(META_ATTACH_FLAG):]
-            if end and len(meta) >= len(META_ATTACH_FLAG):
-                meta = meta[:-len(META_ATTACH_FLAG)]
-
-            space = NO_SPACE if end else SPACE
-            replace_space = NO_SPACE if last_attach else SPACE
-
-            if end:
-                action.attach = True
-            if begin and end and meta == '':
-                # We use an empty connection to indicate a "break" in the
-                # application of orthography rules. This allows the
-                # stenographer to tell plover not to auto-correct a word.
-                action.orthography = False
-                if last_action.text != '':
-                    action.replace = replace_space
-            if (((begin and not end) or (begin and end and ' ' in meta)) and
-                    last_orthography):
-                new = orthography.add_suffix(last_word.lower(), meta)
-                common = commonprefix([last_word.lower(), new])
-                if last_action.text == '':
-                    replace_space = NO_SPACE
-                action.replace = last_word[len(common):] + replace_space
-                meta = new[len(common):]
-            if begin and end:
-                if last_action.text != '':
-                    action.replace = replace_space
-            if last_capitalize:
-                meta = _capitalize(meta)
-            if last_lower:
-                meta = _lower(meta)
-            if last_upper_carry:
-                meta = _upper(meta)
-                action.upper_carry = True
-            action.text = meta + space
-            action.word = _rightmost_word(
-                last_word[:len(last_word + last_space)-len(action.replace)]
-                + meta)
-            if end and not begin and last_space == SPACE:
-                action.word = _rightmost_word(meta)
-        elif meta.startswith(META_KEY_COMBINATION):
-            action = last_action.copy_state()
-            action.combo = meta[len(META_KEY_COMBINATION):]
-    else:
-        text = _unescape_atom(atom)
+        if last_attach:
+            action.replace = NO_SPACE
+    elif kind == ATOM_CAPITALIZE:
+        action = last_action.copy_state()
+        action.capitalize = True
+        action.lower = False
+    elif kind == ATOM_LOWER:
+        action = last_action.copy_state()
+        if was_space:
+            # Persist space state
+            action.replace = SPACE
+            action.text = SPACE
+        action.lower = True
+        action.capitalize = False
+    elif kind == ATOM_UPPER:
+        action = last_action.copy_state()
+        action.lower = False
+        action.upper = True
+        action.capitalize = False
+    elif kind == ATOM_CARRY_CAPITALIZATION:
+        action = _apply_carry_capitalize(meta, last_action, spaces_after=True)
+    elif kind == ATOM_RETRO_CAPITALIZE:
+        action = last_action.copy_state()
+        action.word = _capitalize(action.word)
+        if len(last_action.text) < len(last_action.word):
+            action.replace = last_action.word + SPACE
+            action.text = _capitalize(last_action.word + SPACE)
+        else:
+            action.replace = last_action.text
+            action.text = _capitalize_nowhitespace(last_action.text)
+    elif kind == ATOM_RETRO_LOWER:
+        action = last_action.copy_state()
+        action.word = _lower(action.word)
+        if len(last_action.text) < len(last_action.word):
+            action.replace = last_action.word + SPACE
+            action.text = _lower(last_action.word + SPACE)
+        else:
+            action.replace = last_action.text
+            action.text = _lower_nowhitespace(last_action.text)
+    elif kind == ATOM_RETRO_UPPER:
+        action = last_action.copy_state()
+        action.word = _upper(action.word)
+        action.upper_carry = True
+        if len(last_action.text) < len(last_action.word):
+            action.replace = last_action.word + SPACE
+            action.text = _upper(last_action.word + SPACE)
+        else:
+            action.replace = last_action.text
+            action.text = _upper(last_action.text)
+    elif kind == ATOM_RETRO_FORMAT:
+        action = _apply_currency(meta, last_action, spaces_after=True)
+    elif kind == ATOM_COMMAND:
+        action = last_action.copy_state()
+        action.command = meta
+    elif kind == ATOM_MODE:
+        action = last_action.copy_state()
+        action = _change_mode(meta, action)
+    elif kind == ATOM_GLUE:
+        action.glue = True
+        text = meta
         if last_capitalize:
             text = _capitalize(text)
         if last_lower:
             text = _lower(text)
-        if last_upper:
-            text = _upper(text)
-            action.upper_carry = True
-
         action.text = text + SPACE
         action.word = _rightmost_word(text)
+        if last_glue:
+            if was_space:
+                action.replace = SPACE
+            else:
+                action.replace = NO_SPACE
+            action.word = _rightmost_word(last_word + text)
+        if last_attach:
+            action.replace = NO_SPACE
+            action.word = _rightmost_word(last_word + text)
+    elif kind == ATOM_ATTACH:
+        begin = atom.begin
+        end = atom.end
+
+        space = NO_SPACE if end else SPACE
+        replace_space = NO_SPACE if last_attach else SPACE
+
+        if end:
+            action.attach = True
+        if begin and end and meta == '':
+            # We use an empty connection to indicate a "break" in the
+            # application of orthography rules. This allows the
+            # stenographer to tell plover not to auto-correct a word.
+            action.orthography = False
+            if last_action.text != '':
+                action.replace = replace_space
+        if (((begin and not end) or (begin and end and ' ' in meta)) and
+                last_orthography):
+            new = orthography.add_suffix(last_word.lower(), meta)
+            common = commonprefix([last_word.lower(), new])
+            if last_action.text == '':
+                replace_space = NO_SPACE
+            action.replace = last_word[len(common):] + replace_space
+            meta = new[len(common):]
+        if begin and end:
+            if last_action.text != '':
+                action.replace = replace_space
+        if last_capitalize:
+            meta = _capitalize(meta)
+        if last_lower:
+            meta = _lower(meta)
+        if last_upper_carry:
+            meta = _upper(meta)
+            action.upper_carry = True
+        action.text = meta + space
+        action.word = _rightmost_word(
+            last_word[:len(last_word + last_space)-len(action.replace)]
+            + meta)
+        if end and not begin and last_space == SPACE:
+            action.word = _rightmost_word(meta)
+    elif kind == ATOM_KEY_COMBINATION:
+        action = last_action.copy_state()
+        action.combo = meta
 
     action.text = _apply_mode(action.text, action.case, action.space_char,
                               begin, last_attach, last_glue,
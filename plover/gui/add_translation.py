@@ -97,16 +97,17 @@ class AddTranslationDialog(wx.Dialog):
         self.engine = engine
         
         # TODO: add functions on engine for state
-        self.previous_state = self.engine.translator.get_state()
-        self.previous_start_attached = self.engine.formatter.start_attached
-        self.previous_start_capitalized = self.engine.formatter.start_capitalized
-        # TODO: use state constructor?
-        self.engine.translator.clear_state()
-        self.strokes_state = self.engine.translator.get_state()
-        self.engine.translator.clear_state()
-        self.translation_state = self.engine.translator.get_state()
+        with self.engine.lock:
+            self.previous_state = self.engine.translator.get_state()
+            self.previous_start_attached = self.engine.formatter.start_attached
+            self.previous_start_capitalized = self.engine.formatter.start_capitalized
+            # TODO: use state constructor?
+            self.engine.translator.clear_state()
+            self.strokes_state = self.engine.translator.get_state()
+            self.engine.translator.clear_state()
+            self.translation_state = self.engine.translator.get_state()
 
-        self._restore_engine_state()
+            self._restore_engine_state()
         
         self.last_window = util.GetForegroundWindow()
         
@@ -121,16 +122,18 @@ class AddTranslationDialog(wx.Dialog):
         self._focus = None
 
     def _restore_engine_state(self):
-        self.engine.translator.set_state(self.previous_state)
-        self.engine.set_starting_stroke_state(self.previous_start_capitalized,
-                                              self.previous_start_attached)
+        with self.engine.lock:
+            self.engine.translator.set_state(self.previous_state)
+            self.engine.set_starting_stroke_state(self.previous_start_capitalized,
+                                                  self.previous_start_attached)
     
     def on_add_translation(self, event=None):
         d = self.engine.get_dictionary()
         strokes = self._normalized_strokes()
         translation = self.translation_text.GetValue().strip()
         if strokes and translation:
-            d.set(strokes, unescape_translation(translation))
+            with self.engine.lock:
+                d.set(strokes, unescape_translation(translation))
             d.save(path_list=(d.dicts[0].get_path(),))
         self.Close()
 
@@ -183,23 +186,26 @@ class AddTranslationDialog(wx.Dialog):
         if self._focus == 'strokes':
             return
         self._unfocus_translation()
-        self.engine.get_dictionary().add_filter(self.stroke_dict_filter)
-        self.engine.translator.set_state(self.strokes_state)
+        with self.engine.lock:
+            self.engine.get_dictionary().add_filter(self.stroke_dict_filter)
+            self.engine.translator.set_state(self.strokes_state)
         self._focus = 'strokes'
 
     def _unfocus_strokes(self):
         if self._focus != 'strokes':
             return
-        self.engine.get_dictionary().remove_filter(self.stroke_dict_filter)
-        self._restore_engine_state()
+        with self.engine.lock:
+            self.engine.get_dictionary().remove_filter(self.stroke_dict_filter)
+            self._restore_engine_state()
         self._focus = None
 
     def _focus_translation(self):
         if self._focus == 'translation':
             return
         self._unfocus_strokes()
-        self.engine.translator.set_state(self.translation_state)
-        self.engine.set_starting_stroke_state(attach=True)
+        with self.engine.lock:
+            self.engine.translator.set_state(self.translation_state)
+            self.engine.set_starting_stroke_state(attach=True)
         self._focus = 'translation'
 
     def _unfocus_translation(self):
@@ -22,6 +22,7 @@ from plover.machine.registry import machine_registry
 from plover.dictionary.loading_manager import manager as dict_manager
 from plover.gui.paper_tape import StrokeDisplayDialog
 from plover.gui.suggestions import SuggestionsDisplayDialog
+from plover.gui.latency import LatencyDisplayDialog
 from plover.gui.keyboard_config import KeyboardConfigDialog
 from plover.misc import SimpleNamespace
 
@@ -44,6 +45,9 @@ LOG_FILE_LABEL = "Log File:"
 
 LOG_STROKES_LABEL = "Log Strokes"
 LOG_TRANSLATIONS_LABEL = "Log Translations"
+MONITOR_LATENCY_LABEL = "Monitor Latency"
+TRACE_STROKES_LABEL = "Trace Strokes (dump with {PLOVER:DUMP_TRACE})"
+SHOW_LATENCY_BUTTON_NAME = u"Show Latency…"
 LOG_FILE_DIALOG_TITLE = "Select a Log File"
 CONFIG_BUTTON_NAME = u"Configure…"
 SPACE_PLACEMENTS_LABEL = "Space Placement:"
@@ -124,7 +128,7 @@ class ConfigurationDialog(wx.Dialog):
         self.machine_config = MachineConfig(self.config, notebook)
         self.dictionary_config = DictionaryConfig(self.engine, self.config,
                                                   notebook)
-        self.logging_config = LoggingConfig(self.config, notebook)
+        self.logging_config = LoggingConfig(self.config, notebook, self.engine)
         self.display_config = DisplayConfig(self.config, notebook, self.engine)
         self.output_config = OutputConfig(self.config, notebook)
 
@@ -340,9 +344,11 @@ class DictionaryConfig(ScrolledPanel):
 
         main_sizer.Add(self.dicts_sizer)
 
-        self.mask = 'Json files (*%s)|*%s|RTF/CRE files (*%s)|*%s' % (
+        self.mask = ('Json files (*%s)|*%s|RTF/CRE files (*%s)|*%s|'
+                     'SQLite files (*%s)|*%s') % (
             conf.JSON_EXTENSION, conf.JSON_EXTENSION,
             conf.RTF_EXTENSION, conf.RTF_EXTENSION,
+            conf.SQLITE_EXTENSION, conf.SQLITE_EXTENSION,
         )
 
         self.SetSizerAndFit(main_sizer)
@@ -432,7 +438,7 @@ class DictionaryConfig(ScrolledPanel):
 
 class LoggingConfig(wx.Panel):
     """Logging configuration graphical user interface."""
-    def __init__(self, config, parent):
+    def __init__(self, config, parent, engine):
         """Create a configuration component based on the given Config.
 
         Arguments:
@@ -441,9 +447,12 @@ class LoggingConfig(wx.Panel):
 
         parent -- This component's parent component.
 
+        engine -- The steno engine.
+
         """
         wx.Panel.__init__(self, parent)
         self.config = config
+        self.engine = engine
         sizer = wx.BoxSizer(wx.VERTICAL)
         log_file = config.get_log_file_name()
         log_file = os.path.join(conf.CONFIG_DIR, log_file)
@@ -471,8 +480,27 @@ class LoggingConfig(wx.Panel):
         sizer.Add(self.log_translations_checkbox,
                   border=UI_BORDER,
                   flag=wx.ALL | wx.EXPAND)
+        self.monitor_latency_checkbox = wx.CheckBox(
+            self, label=MONITOR_LATENCY_LABEL)
+        latency_monitoring = config.get_enable_latency_monitoring()
+        self.monitor_latency_checkbox.SetValue(latency_monitoring)
+        sizer.Add(self.monitor_latency_checkbox,
+                  border=UI_BORDER,
+                  flag=wx.ALL | wx.EXPAND)
+        self.trace_strokes_checkbox = wx.CheckBox(
+            self, label=TRACE_STROKES_LABEL)
+        self.trace_strokes_checkbox.SetValue(config.get_enable_tracing())
+        sizer.Add(self.trace_strokes_checkbox,
+                  border=UI_BORDER,
+                  flag=wx.ALL | wx.EXPAND)
+        show_latency_button = wx.Button(self, label=SHOW_LATENCY_BUTTON_NAME)
+        show_latency_button.Bind(wx.EVT_BUTTON, self.on_show_latency)
+        sizer.Add(show_latency_button, border=UI_BORDER, flag=wx.ALL)
         self.SetSizer(sizer)
 
+    def on_show_latency(self, event):
+        LatencyDisplayDialog.display(self.GetParent(), self.engine)
+
     def save(self):
         """Write all parameters to the config."""
         self.config.set_log_file_name(self.file_browser.GetValue())
@@ -480,6 +508,10 @@ class LoggingConfig(wx.Panel):
             self.log_strokes_checkbox.GetValue())
         self.config.set_enable_translation_logging(
             self.log_translations_checkbox.GetValue())
+        self.config.set_enable_latency_monitoring(
+            self.monitor_latency_checkbox.GetValue())
+        self.config.set_enable_tracing(
+            self.trace_strokes_checkbox.GetValue())
 
 
 class DisplayConfig(wx.Panel):
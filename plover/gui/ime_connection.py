@@ -4,6 +4,8 @@ import socket
 import sys
 import threading
 
+from plover.latency import clock
+
 
 class ImeConnection(threading.Thread):
 
@@ -18,6 +20,8 @@ class ImeConnection(threading.Thread):
     message = u""
     hasSuggestions = False
     suggestions = {}
+    # When tracing, the ID of the stroke the suggestions are for.
+    suggestionsStrokeId = None
 
  
     def __init__(self, mainFrame):
@@ -41,7 +45,14 @@ class ImeConnection(threading.Thread):
             if(self.connected and self.hasMessage):
                 self.sendMessage(self.message)
             if(self.connected and self.hasSuggestions):
-                self.sendSuggestions(self.suggestions)
+                tracer = self.frame.steno_engine.tracer
+                if(tracer is None):
+                    self.sendSuggestions(self.suggestions)
+                else:
+                    stroke_id = self.suggestionsStrokeId
+                    start = clock()
+                    self.sendSuggestions(self.suggestions)
+                    tracer.span('ime_send', start, clock(), stroke_id=stroke_id)
 
     def connectToServer(self):
         try:
@@ -107,6 +118,9 @@ class ImeConnection(threading.Thread):
     def setPossContAndSuggs(self, suggs):
         if(not self.connected or not self.isActive):
             return
+        tracer = self.frame.steno_engine.tracer
+        if(tracer is not None):
+            self.suggestionsStrokeId = tracer.stroke_id
         self.suggestions = suggs
         self.hasSuggestions = True
 
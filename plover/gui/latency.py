@@ -0,0 +1,114 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""A gui display of the steno pipeline latency."""
+
+import wx
+from wx.lib.utils import AdjustRectToScreen
+
+from plover.gui.util import find_fixed_width_font
+
+TITLE = 'Plover: Latency'
+UI_BORDER = 4
+REFRESH_INTERVAL = 1000 # milliseconds
+COLUMNS = ('count', 'mean', 'p50', 'p90', 'p99', 'max')
+DISABLED_TEXT = ('Latency monitoring is disabled.\n\n'
+                 'It can be enabled in the Logging configuration.')
+RESET_BUTTON_NAME = 'Reset'
+CLOSE_BUTTON_NAME = 'Close'
+
+
+def format_summary(summary):
+    """Format the latency monitor summary as a table (in microseconds)."""
+    lines = ['%-14s' % 'stage (us)' + ''.join('%10s' % c for c in COLUMNS)]
+    for stage, stats in summary.items():
+        line = '%-14s%10u' % (stage, stats['count'])
+        for column in COLUMNS[1:]:
+            value = stats[column]
+            line += '%10s' % ('-' if value is None else '%.1f' % (value * 1e6))
+        lines.append(line)
+    return '\n'.join(lines)
+
+
+def format_queue_stats(stats):
+    """Format the stroke queue metrics."""
+    if stats is None:
+        return 'stroke queue: disabled'
+    wait = stats['wait']
+    return ('stroke queue: depth %u/%u (max %u), %s on overflow '
+            '(blocked %u, dropped %u), wait p99 %s us' % (
+                stats['depth'], stats['size'], stats['max_depth'],
+                stats['overflow'], stats['blocked'], stats['dropped'],
+                '-' if wait['p99'] is None else '%.1f' % (wait['p99'] * 1e6)))
+
+
+class LatencyDisplayDialog(wx.Dialog):
+
+    other_instances = []
+
+    def __init__(self, parent, engine):
+        self.engine = engine
+        wx.Dialog.__init__(self, parent, title=TITLE,
+                           style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+
+        sizer = wx.BoxSizer(wx.VERTICAL)
+
+        self.table = wx.StaticText(self, label=format_summary({}))
+        self.table.SetFont(find_fixed_width_font())
+        sizer.Add(self.table, proportion=1, flag=wx.ALL | wx.EXPAND,
+                  border=UI_BORDER)
+
+        button_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        reset_button = wx.Button(self, label=RESET_BUTTON_NAME)
+        reset_button.Bind(wx.EVT_BUTTON, self.on_reset)
+        button_sizer.Add(reset_button, flag=wx.ALL, border=UI_BORDER)
+        close_button = wx.Button(self, wx.ID_CANCEL, CLOSE_BUTTON_NAME)
+        close_button.Bind(wx.EVT_BUTTON, self.on_close)
+        button_sizer.Add(close_button, flag=wx.ALL, border=UI_BORDER)
+        sizer.Add(button_sizer, flag=wx.ALIGN_RIGHT)
+
+        self.refresh()
+        self.SetSizer(sizer)
+        sizer.Fit(self)
+        self.SetRect(AdjustRectToScreen(self.GetRect()))
+
+        self.timer = wx.Timer(self)
+        self.Bind(wx.EVT_TIMER, lambda e: self.refresh(), self.timer)
+        self.timer.Start(REFRESH_INTERVAL)
+        self.Bind(wx.EVT_CLOSE, self.on_close)
+
+        for instance in self.other_instances:
+            instance.Close()
+        del self.other_instances[:]
+        self.other_instances.append(self)
+        self.Show()
+
+    def refresh(self):
+        monitor = self.engine.get_latency_monitor()
+        if monitor is None:
+            text = DISABLED_TEXT
+        else:
+            text = format_summary(monitor.summary())
+        queue = self.engine.get_stroke_queue()
+        text += '\n\n' + format_queue_stats(None if queue is None
+                                             else queue.stats())
+        if text != self.table.GetLabel():
+            self.table.SetLabel(text)
+            self.Fit()
+
+    def on_reset(self, event):
+        monitor = self.engine.get_latency_monitor()
+        if monitor is not None:
+            monitor.clear()
+        self.refresh()
+
+    def on_close(self, event=None):
+        self.timer.Stop()
+        if self in self.other_instances:
+            self.other_instances.remove(self)
+        self.Destroy()
+
+    @staticmethod
+    def display(parent, engine):
+        # LatencyDisplayDialog shows itself.
+        LatencyDisplayDialog(parent, engine)
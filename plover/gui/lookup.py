@@ -58,11 +58,12 @@ class LookupDialog(wx.Dialog):
         self.engine = engine
         
         # TODO: add functions on engine for state
-        self.previous_state = self.engine.translator.get_state()
-        # TODO: use state constructor?
-        self.engine.translator.clear_state()
-        self.translation_state = self.engine.translator.get_state()
-        self.engine.translator.set_state(self.previous_state)
+        with self.engine.lock:
+            self.previous_state = self.engine.translator.get_state()
+            # TODO: use state constructor?
+            self.engine.translator.clear_state()
+            self.translation_state = self.engine.translator.get_state()
+            self.engine.translator.set_state(self.previous_state)
         
         self.last_window = util.GetForegroundWindow()
         
@@ -75,7 +76,8 @@ class LookupDialog(wx.Dialog):
         self.other_instances.append(self)
 
     def on_close(self, event=None):
-        self.engine.translator.set_state(self.previous_state)
+        with self.engine.lock:
+            self.engine.translator.set_state(self.previous_state)
         self.other_instances.remove(self)
         self.Destroy()
         self.Update()  # confirm dialog is removed before setting fg window
@@ -103,10 +105,12 @@ class LookupDialog(wx.Dialog):
         self.GetSizer().Layout()
 
     def on_translation_gained_focus(self, event):
-        self.engine.translator.set_state(self.translation_state)
+        with self.engine.lock:
+            self.engine.translator.set_state(self.translation_state)
         
     def on_translation_lost_focus(self, event):
-        self.engine.translator.set_state(self.previous_state)
+        with self.engine.lock:
+            self.engine.translator.set_state(self.previous_state)
 
     def on_button_gained_focus(self, event):
         self.strokes_text.SetFocus()
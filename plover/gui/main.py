@@ -11,6 +11,7 @@ resumes stenotype translation and allows for application configuration.
 
 import sys
 import os
+import time
 
 import subprocess
 
@@ -19,7 +20,7 @@ import wx.animate
 from wx.lib.utils import AdjustRectToScreen
 import plover.app as app
 from plover.config import ASSETS_DIR, SPINNER_FILE, copy_default_dictionaries
-from plover.gui.config import ConfigurationDialog
+from plover.oslayer.config import CONFIG_DIR
 import plover.gui.add_translation
 import plover.gui.lookup
 from plover.oslayer.keyboardcontrol import KeyboardEmulation
@@ -27,6 +28,10 @@ from plover.machine.base import STATE_ERROR, STATE_INITIALIZING, STATE_RUNNING
 from plover.machine.registry import machine_registry
 from plover.gui.paper_tape import StrokeDisplayDialog
 from plover.gui.suggestions import SuggestionsDisplayDialog
+from plover.gui.latency import LatencyDisplayDialog
+from plover.latency import clock
+from plover.startup import startup_timer
+from plover.output_worker import OutputWorker
 from plover import log
 
 
@@ -102,6 +107,10 @@ class MainFrame(wx.Frame):
     COMMAND_CONFIGURE = 'CONFIGURE'
     COMMAND_FOCUS = 'FOCUS'
     COMMAND_QUIT = 'QUIT'
+    COMMAND_LATENCY = 'LATENCY'
+    COMMAND_DUMP_TRACE = 'DUMP_TRACE'
+    COMMAND_START_PROFILING = 'PROFILE:START'
+    COMMAND_STOP_PROFILING = 'PROFILE:STOP'
 
     COMMAND_PAUSEIME = 'IME:PAUSE'
     COMMAND_RESUMEIME = 'IME:RESUME'
@@ -268,6 +277,7 @@ class MainFrame(wx.Frame):
         self.Bind(wx.EVT_MOVE, self.on_move)
         self.reconnect_button.Bind(wx.EVT_BUTTON, lambda e: self._reconnect())
         self.ime_connection_button.Bind(wx.EVT_BUTTON, lambda e: self.toggleIMEProcess())
+        startup_timer.mark('gui build')
 
         try:
             with open(config.target_file, 'rb') as f:
@@ -276,6 +286,7 @@ class MainFrame(wx.Frame):
             log.error('loading configuration failed, reseting to default', exc_info=True)
             self.config.clear()
         copy_default_dictionaries(self.config)
+        startup_timer.mark('config load')
 
         rect = wx.Rect(config.get_main_frame_x(), config.get_main_frame_y(), *self.GetSize())
         self.SetRect(AdjustRectToScreen(rect))
@@ -283,8 +294,8 @@ class MainFrame(wx.Frame):
         self.steno_engine = app.StenoEngine(self)
         self.steno_engine.add_callback(
             lambda s: wx.CallAfter(self._update_status, s))
-        self.steno_engine.set_output(
-            Output(self.consume_command, self.steno_engine, self))
+        self.output = Output(self.consume_command, self.steno_engine, self)
+        self.steno_engine.set_output(self.output)
 
         self.steno_engine.add_stroke_listener(
             StrokeDisplayDialog.stroke_handler)
@@ -304,7 +315,8 @@ class MainFrame(wx.Frame):
 
         if(self.config.get_start_ime_on_startup()):
             self.toggleIMEProcess()
-            
+        startup_timer.mark('engine setup')
+
         try:
             app.init_engine(self.steno_engine, self.config)
         except Exception:
@@ -341,6 +353,16 @@ class MainFrame(wx.Frame):
         elif command == self.COMMAND_STARTIME:
             wx.CallAfter( self.sendToIME, self.IME_CMD_START)
             return True
+        elif command == self.COMMAND_DUMP_TRACE:
+            wx.CallAfter(self._dump_trace)
+            return True
+        elif command == self.COMMAND_START_PROFILING:
+            self.steno_engine.start_profiling()
+            return True
+        elif command == self.COMMAND_STOP_PROFILING:
+            filename = os.path.join(CONFIG_DIR, time.strftime('profile-%Y%m%d-%H%M%S.prof'))
+            self.steno_engine.stop_profiling(filename)
+            return True
 
         if not self.steno_engine.is_running:
             return False
@@ -366,6 +388,9 @@ class MainFrame(wx.Frame):
             wx.CallAfter(plover.gui.lookup.Show, 
                          self, self.steno_engine, self.config)
             return True
+        elif command == self.COMMAND_LATENCY:
+            wx.CallAfter(LatencyDisplayDialog.display, self, self.steno_engine)
+            return True
         elif command == self.COMMAND_SHOWIME:
             wx.CallAfter(self.sendToIME, self.IME_CMD_SHOW)
             return True
@@ -378,6 +403,16 @@ class MainFrame(wx.Frame):
             
         return False
 
+    def _dump_trace(self):
+        filename = os.path.join(CONFIG_DIR, time.strftime('trace-%Y%m%d-%H%M%S.json'))
+        try:
+            if self.steno_engine.dump_trace(filename):
+                log.info('strokes trace saved to %s', filename)
+            else:
+                log.warning('cannot dump the strokes trace: tracing is disabled')
+        except Exception:
+            log.error('dumping the strokes trace failed', exc_info=True)
+
     def _update_status(self, state):
         if state:
             machine_name = machine_registry.resolve_alias(
@@ -427,9 +462,12 @@ class MainFrame(wx.Frame):
             self.ime_connection.join()
         if self.steno_engine:
             self.steno_engine.destroy()
+        self.output.stop()
         self.Destroy()
 
     def _show_config_dialog(self, event=None):
+        # Imported on first use, to speed up startup.
+        from plover.gui.config import ConfigurationDialog
         dlg = ConfigurationDialog(self.steno_engine,
                                   self.config,
                                   parent=self)
@@ -479,27 +517,106 @@ class MainFrame(wx.Frame):
         return self.config.get_ime_number_of_suggestions()
 
 
+# On OS X, the keyboard emulation is done from the GUI thread,
+# elsewhere a dedicated output thread is used.
+USE_OUTPUT_WORKER = not sys.platform.startswith('darwin')
+
+
 class Output(object):
     def __init__(self, engine_command_callback, engine, mainFrame):
         self.engine_command_callback = engine_command_callback
-        self.keyboard_control = KeyboardEmulation()
         self.engine = engine
         self.frame = mainFrame
+        if USE_OUTPUT_WORKER:
+            # The keyboard emulation is owned by the worker thread.
+            self.keyboard_control = None
+            self.worker = OutputWorker()
+            self.worker.start()
+            self.worker.submit(self._create_keyboard_control)
+        else:
+            self.keyboard_control = KeyboardEmulation()
+            self.worker = None
+
+    def _create_keyboard_control(self):
+        self.keyboard_control = KeyboardEmulation()
 
-    def _xcall(self, fn, *args, **kwargs):
+    def stop(self):
+        if self.worker is not None:
+            self.worker.stop()
+
+    def _send(self, name, *args):
+        keyboard_control = self.keyboard_control
+        if name == 'send_edit' and not hasattr(keyboard_control, 'send_edit'):
+            backspaces, text = args
+            keyboard_control.send_backspaces(backspaces)
+            keyboard_control.send_string(text)
+        elif name == 'send_actions' and not hasattr(keyboard_control, 'send_actions'):
+            actions, = args
+            for action in actions:
+                if action[0] == 'edit':
+                    self._send('send_edit', *action[1:])
+                else:
+                    keyboard_control.send_key_combination(action[1])
+        else:
+            getattr(keyboard_control, name)(*args)
+
+    def _run(self, queued, stroke_id, name, *args):
+        monitor = self.engine.latency_monitor
+        tracer = self.engine.tracer
+        # Carry the stroke ID over to this thread when tracing.
+        if tracer is not None:
+            tracer.stroke_id = stroke_id
+        if monitor is not None:
+            start = clock()
+            if self.worker is None:
+                args_info = None
+            else:
+                args_info = {'depth': self.worker.depth}
+            monitor.add('output_queue', start - queued, args_info)
         try:
-            fn(*args, **kwargs)
+            self._send(name, *args)
         except Exception:
             log.error('output failed', exc_info=True)
+        if monitor is not None:
+            monitor.add('send', clock() - start, {'call': name})
+        if tracer is not None:
+            tracer.stroke_id = None
+
+    def _dispatch(self, name, *args):
+        tracer = self.engine.tracer
+        stroke_id = None if tracer is None else tracer.stroke_id
+        if self.worker is None:
+            wx.CallAfter(self._run, clock(), stroke_id, name, *args)
+        else:
+            self.worker.submit(self._run, clock(), stroke_id, name, *args)
 
     def send_backspaces(self, b):
-        wx.CallAfter(self._xcall, self.keyboard_control.send_backspaces, b)
+        self._dispatch('send_backspaces', b)
 
     def send_string(self, t):
-        wx.CallAfter(self._xcall, self.keyboard_control.send_string, t)
+        self._dispatch('send_string', t)
 
     def send_key_combination(self, c):
-        wx.CallAfter(self._xcall, self.keyboard_control.send_key_combination, c)
+        self._dispatch('send_key_combination', c)
+
+    def send_edit(self, b, t):
+        self._dispatch('send_edit', b, t)
+
+    def send_actions(self, actions):
+        # The edits and key combinations are sent with a single dispatch;
+        # engine commands are run here, so the keyboard actions before a
+        # command are dispatched first (a command can send backspaces).
+        keyboard_actions = []
+        for action in actions:
+            if action[0] == 'command':
+                if keyboard_actions:
+                    self._dispatch('send_actions', keyboard_actions)
+                    keyboard_actions = []
+                self.send_engine_command(action[1])
+            else:
+                keyboard_actions.append(action)
+        if keyboard_actions:
+            self._dispatch('send_actions', keyboard_actions)
 
     # TODO: test all the commands now
     def send_engine_command(self, c):
@@ -159,7 +159,7 @@ class StrokeDisplayDialog(wx.Dialog):
 
     def paper_format(self, stroke):
         text = [' '] * len(self.all_keys)
-        keys = stroke.steno_keys[:]
+        keys = list(stroke.steno_keys)
         if any(key in self.reverse_numbers for key in keys):
             keys.append('#')
         for key in keys:
@@ -0,0 +1,126 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Headless steno pipeline.
+
+Helpers to run a complete StenoEngine (translator, formatter and output
+helper) without a GUI, a machine or a keyboard emulation. This is used
+by the benchmarks and the stroke log replay tool.
+
+"""
+
+import os
+
+from plover.app import StenoEngine
+from plover.steno_dictionary import StenoDictionary
+from plover.suggestions import Suggestions
+from plover.steno import normalize_steno, stroke_to_keys
+from plover.config import DEFAULT_IME_NUMBER_OF_SUGGESTIONS
+
+
+class CaptureOutput(object):
+    """Output that records what would have been sent to the OS."""
+
+    def __init__(self):
+        self.instructions = []
+        self.text = u''
+
+    def send_backspaces(self, n):
+        self.text = self.text[:-n] if n else self.text
+        self.instructions.append(('b', n))
+
+    def send_string(self, s):
+        self.text += s
+        self.instructions.append(('s', s))
+
+    def send_key_combination(self, c):
+        self.instructions.append(('c', c))
+
+    def send_engine_command(self, c):
+        self.instructions.append(('e', c))
+
+
+class CaptureImeConnection(object):
+    """Stand-in for the IME connection thread, records the possible
+    continuations and suggestions instead of sending them."""
+
+    def __init__(self, active=True):
+        self.connected = active
+        self.isActive = active
+        self.suggestions = []
+
+    def setPossContAndSuggs(self, suggs):
+        if not self.connected or not self.isActive:
+            return
+        self.suggestions.append(suggs)
+
+
+class HeadlessFrame(object):
+    """The bits of the main frame needed by the engine."""
+
+    def __init__(self, max_poss=DEFAULT_IME_NUMBER_OF_SUGGESTIONS):
+        self.max_poss = max_poss
+
+    def get_max_poss(self):
+        return self.max_poss
+
+
+def create_engine(dicts, space_placement='Before Output', ime=False,
+                  undo_levels=100, output=None, frame=None):
+    """Create a running engine with the given dictionaries.
+
+    Arguments:
+
+    dicts -- A list of StenoDictionary, highest priority first.
+
+    space_placement -- 'Before Output' or 'After Output'.
+
+    ime -- Enable the IME path (possible continuations lookup).
+
+    Returns the engine; its output is engine.output, and its IME connection
+    engine.ime_connection.
+
+    """
+    if frame is None:
+        frame = HeadlessFrame()
+    if output is None:
+        output = CaptureOutput()
+    engine = StenoEngine(frame)
+    dictionary = engine.get_dictionary()
+    dictionary.set_dicts(dicts)
+    engine.suggestions = Suggestions(dictionary)
+    engine.translator.create_common_words_dict(os.devnull)
+    ime_connection = CaptureImeConnection(active=ime)
+    engine.translator.add_ime_connection(ime_connection)
+    engine.set_space_placement(space_placement)
+    engine.set_undo_levels(undo_levels)
+    engine.set_output(output)
+    engine.set_is_running(True)
+    engine.output = output
+    engine.ime_connection = ime_connection
+    return engine
+
+
+def dictionary_from_entries(entries):
+    """Create a StenoDictionary from an iterable of (steno, translation)."""
+    d = StenoDictionary()
+    d.update((normalize_steno(steno), translation)
+             for steno, translation in entries)
+    return d
+
+
+def steno_to_keys(steno):
+    """Convert a steno string (possibly multi-strokes) to a list of
+    keys lists, ready to be fed to the engine."""
+    return [stroke_to_keys(stroke) for stroke in normalize_steno(steno)]
+
+
+def send_keys(engine, keys):
+    """Feed a single stroke (list of keys) to the engine, as a machine would."""
+    engine._translator_machine_callback(keys)
+
+
+def send_strokes(engine, strokes):
+    """Feed several strokes (lists of keys) to the engine at once, as a
+    machine would with a batch."""
+    engine._translator_machine_batch_callback(strokes)
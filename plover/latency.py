@@ -0,0 +1,235 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Latency measurement.
+
+Histogram -- A fixed size latency histogram.
+
+LatencyMonitor -- Aggregate the latency of each stage of the steno pipeline.
+
+Tracer -- Record the stages of each stroke for export in Chrome trace format.
+
+"""
+
+import bisect
+import collections
+import itertools
+import json
+import os
+import threading
+import time
+
+
+# Best available monotonic clock (in seconds).
+clock = getattr(time, 'perf_counter', time.time)
+
+# Upper bounds of the histogram buckets, in seconds: 1us, 2us, 5us, 10us,
+# ..., 500ms, 1s. An extra bucket is used for longer durations.
+DEFAULT_BUCKETS = tuple(m * 10 ** e
+                        for e in range(-6, 0)
+                        for m in (1, 2, 5)) + (1.0,)
+
+# Maximum number of spans kept by a tracer.
+DEFAULT_TRACE_SIZE = 100000
+
+# Stages of the steno pipeline, in order.
+STAGES = (
+    # Machine: from receiving raw data to the steno keys.
+    'decode',
+    # Engine: waiting for the stroke to be handled (stroke queue, or
+    # thread_hook).
+    'queue',
+    # Engine: Stroke construction.
+    'stroke',
+    # Translator: dictionary lookups.
+    'lookup',
+    # Translator: suggestions.
+    'suggestions',
+    # Translator: IME possible continuations.
+    'continuations',
+    # Formatter: whole formatting (including rendering).
+    'format',
+    # Formatter: OutputHelper.render.
+    'render',
+    # Output: waiting for the output thread (or GUI thread).
+    'output_queue',
+    # Output: OS layer send_* calls.
+    'send',
+    # Engine: whole stroke handling, from the machine callback.
+    'total',
+)
+
+
+class Histogram(object):
+    """A fixed size latency histogram.
+
+    Durations are accumulated in buckets, so the memory usage does not
+    depend on the number of samples, and percentiles are approximated
+    (by the upper bound of the matching bucket).
+
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.clear()
+
+    def clear(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, duration):
+        self.counts[bisect.bisect_left(self.buckets, duration)] += 1
+        self.count += 1
+        self.total += duration
+        if self.min is None or duration < self.min:
+            self.min = duration
+        if self.max is None or duration > self.max:
+            self.max = duration
+
+    @property
+    def mean(self):
+        if not self.count:
+            return None
+        return self.total / self.count
+
+    def percentile(self, p):
+        """Approximate the p-th percentile (0 <= p <= 100)."""
+        if not self.count:
+            return None
+        threshold = p / 100.0 * self.count
+        cumulated = 0
+        for n, count in enumerate(self.counts):
+            cumulated += count
+            if count and cumulated >= threshold:
+                break
+        if n < len(self.buckets):
+            return min(self.buckets[n], self.max)
+        return self.max
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """Return a dictionary summarizing the histogram (durations in seconds)."""
+        summary = {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min,
+            'max': self.max,
+        }
+        for p in percentiles:
+            summary['p%s' % p] = self.percentile(p)
+        return summary
+
+
+class LatencyMonitor(object):
+    """Aggregate the latency of each stage of the steno pipeline.
+
+    Each stage has its own fixed size histogram. Stages are recorded from
+    multiple threads (machine, engine, GUI) without locking, so counts
+    may be slightly off under contention.
+
+    """
+
+    def __init__(self, stages=STAGES):
+        self.histograms = collections.OrderedDict((stage, Histogram())
+                                                  for stage in stages)
+
+    def add(self, stage, duration, args=None):
+        """Record the duration of a stage.
+
+        args is extra information on the stage, only used by the Tracer.
+
+        """
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.add(duration)
+
+    def clear(self):
+        for histogram in self.histograms.values():
+            histogram.clear()
+
+    def summary(self):
+        """Return an ordered dictionary of each stage summary."""
+        return collections.OrderedDict((stage, histogram.summary())
+                                       for stage, histogram
+                                       in self.histograms.items())
+
+
+class Tracer(object):
+    """Record the stages of each stroke for export in Chrome trace format.
+
+    A tracer implements the same add interface as a LatencyMonitor (to
+    which the durations are forwarded if one is set), but each call also
+    records a span in a bounded ring, tagged with the current thread's
+    stroke ID. The ring can then be dumped as a JSON file loadable by
+    chrome://tracing or Perfetto.
+
+    """
+
+    def __init__(self, size=DEFAULT_TRACE_SIZE, monitor=None):
+        self.monitor = monitor
+        # Spans: (name, start, end, thread ID, stroke ID, args).
+        self.spans = collections.deque(maxlen=size)
+        self._stroke_ids = itertools.count(1)
+        self._local = threading.local()
+        self._thread_names = {}
+
+    def new_stroke_id(self):
+        return next(self._stroke_ids)
+
+    @property
+    def stroke_id(self):
+        """ID of the stroke being handled by the current thread."""
+        return getattr(self._local, 'stroke_id', None)
+
+    @stroke_id.setter
+    def stroke_id(self, stroke_id):
+        self._local.stroke_id = stroke_id
+
+    def span(self, name, start, end, args=None, stroke_id=None):
+        """Record a span (start and end are clock() values)."""
+        thread = threading.current_thread()
+        if thread.ident not in self._thread_names:
+            self._thread_names[thread.ident] = thread.name
+        if stroke_id is None:
+            stroke_id = self.stroke_id
+        self.spans.append((name, start, end, thread.ident, stroke_id, args))
+
+    def add(self, stage, duration, args=None):
+        end = clock()
+        self.span(stage, end - duration, end, args)
+        if self.monitor is not None:
+            self.monitor.add(stage, duration)
+
+    def clear(self):
+        self.spans.clear()
+
+    def events(self):
+        """Return the list of Chrome trace events."""
+        pid = os.getpid()
+        events = [
+            {'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid,
+             'args': {'name': name}}
+            for tid, name in sorted(self._thread_names.items())
+        ]
+        for name, start, end, tid, stroke_id, args in list(self.spans):
+            event_args = {} if args is None else dict(args)
+            if stroke_id is not None:
+                event_args['stroke'] = stroke_id
+            events.append({
+                'name': name,
+                'cat': 'stroke',
+                'ph': 'X',
+                'ts': start * 1e6,
+                'dur': (end - start) * 1e6,
+                'pid': pid,
+                'tid': tid,
+                'args': event_args,
+            })
+        return events
+
+    def dump(self, fp):
+        """Write the trace in Chrome trace JSON format to a text file."""
+        json.dump({'traceEvents': self.events(), 'displayTimeUnit': 'ms'}, fp)
@@ -10,6 +10,8 @@ import serial
 import threading
 
 from plover import log
+from plover.latency import clock
+from plover.machine import decoding
 from plover.machine.keymap import Keymap
 from plover import system
 
@@ -27,16 +29,34 @@ class StenotypeBase(object):
     KEYS_LAYOUT = ''
     # And possible actions to map to.
     ACTIONS = system.KEYS + ('no-op',)
+    # For table driven decoding (see plover.machine.decoding), the
+    # protocol key tables: the corresponding action tables are
+    # available as `_action_tables`, and kept up-to-date with the keymap.
+    KEY_TABLES = None
+    # Set by the engine when latency monitoring is enabled.
+    latency_monitor = None
+    _received_time = None
 
     def __init__(self):
         self.keymap = Keymap(self.KEYS_LAYOUT.split(), self.ACTIONS)
         self.stroke_subscribers = []
+        # List of (subscriber callback, batch callback).
+        self._batch_callbacks = []
         self.state_subscribers = []
         self.state = STATE_STOPPED
+        self._update_action_tables()
 
     def set_mappings(self, mappings):
         """Setup machine keymap: mappings of action to keys."""
         self.keymap.set_mappings(mappings)
+        self._update_action_tables()
+
+    def _update_action_tables(self):
+        if self.KEY_TABLES is None:
+            self._action_tables = None
+        else:
+            self._action_tables = decoding.action_tables(self.KEY_TABLES,
+                                                         self.keymap)
 
     def start_capture(self):
         """Begin listening for output from the stenotype machine."""
@@ -46,16 +66,22 @@ class StenotypeBase(object):
         """Stop listening for output from the stenotype machine."""
         pass
 
-    def add_stroke_callback(self, callback):
+    def add_stroke_callback(self, callback, batch_callback=None):
         """Subscribe to output from the stenotype machine.
 
-        Argument:
+        Arguments:
 
         callback -- The function to call whenever there is output from
         the stenotype machine and output is being captured.
 
+        batch_callback -- Optional, the function to call (instead of
+        callback) with the list of strokes when several strokes are
+        received at once.
+
         """
         self.stroke_subscribers.append(callback)
+        if batch_callback is not None:
+            self._batch_callbacks.append((callback, batch_callback))
 
     def remove_stroke_callback(self, callback):
         """Unsubscribe from output from the stenotype machine.
@@ -66,6 +92,10 @@ class StenotypeBase(object):
 
         """
         self.stroke_subscribers.remove(callback)
+        for n, (subscriber, batch_callback) in enumerate(self._batch_callbacks):
+            if subscriber == callback:
+                del self._batch_callbacks[n]
+                break
 
     def add_state_callback(self, callback):
         self.state_subscribers.append(callback)
@@ -73,11 +103,50 @@ class StenotypeBase(object):
     def remove_state_callback(self, callback):
         self.state_subscribers.remove(callback)
 
+    def _received(self):
+        """Mark the reception of raw data from the machine.
+
+        Used to measure the decoding time when latency monitoring is
+        enabled: from this call to the next call to _notify.
+
+        """
+        if self.latency_monitor is not None:
+            self._received_time = clock()
+
     def _notify(self, steno_keys):
         """Invoke the callback of each subscriber with the given argument."""
+        monitor = self.latency_monitor
+        if monitor is not None and self._received_time is not None:
+            monitor.add('decode', clock() - self._received_time)
+            self._received_time = None
         for callback in self.stroke_subscribers:
             callback(steno_keys)
 
+    def _notify_batch(self, strokes):
+        """Invoke the callback of each subscriber with the given strokes.
+
+        Subscribers with a batch callback are called once with all the
+        strokes, the others once per stroke.
+
+        """
+        if len(strokes) <= 1:
+            for steno_keys in strokes:
+                self._notify(steno_keys)
+            return
+        monitor = self.latency_monitor
+        if monitor is not None and self._received_time is not None:
+            monitor.add('decode', clock() - self._received_time)
+            self._received_time = None
+        batch_callbacks = self._batch_callbacks
+        for callback in self.stroke_subscribers:
+            for subscriber, batch_callback in batch_callbacks:
+                if subscriber == callback:
+                    batch_callback(strokes)
+                    break
+            else:
+                for steno_keys in strokes:
+                    callback(steno_keys)
+
     def set_suppression(self, enabled):
         '''Enable keyboard suppression.
 
@@ -151,6 +220,64 @@ class ThreadedStenotypeBase(StenotypeBase, threading.Thread):
             pass
         self._stopped()
 
+class BufferedSerialReader(object):
+    """Buffered, blocking, reads from a serial port.
+
+    Each read waits for data (up to a timeout), and then grabs everything
+    available, appending it to `buffer` (a bytearray): bursts of data are
+    handled in bulk, and complete packets can be extracted with `split`.
+
+    A pending read can be interrupted with `cancel` (pyserial 3.1+,
+    otherwise the read will only return on timeout).
+
+    """
+
+    def __init__(self, serial_port):
+        self.serial_port = serial_port
+        self.buffer = bytearray()
+        self._timeout = serial_port.timeout
+
+    def read(self, timeout=None):
+        """Wait for data, and add it to the buffer.
+
+        timeout -- how long to wait (in seconds), by default the port timeout.
+
+        Return the number of bytes read: 0 on timeout or cancellation.
+
+        """
+        port = self.serial_port
+        if timeout is None:
+            timeout = self._timeout
+        if port.timeout != timeout:
+            port.timeout = timeout
+        data = port.read(max(1, port.inWaiting()))
+        self.buffer.extend(data)
+        return len(data)
+
+    def split(self, delimiter):
+        """Remove and return the complete packets (up to and including
+        delimiter) from the buffer."""
+        buffer = self.buffer
+        packets = []
+        start = 0
+        while True:
+            end = buffer.find(delimiter, start)
+            if end == -1:
+                break
+            end += len(delimiter)
+            packets.append(bytes(buffer[start:end]))
+            start = end
+        if start:
+            del buffer[:start]
+        return packets
+
+    def cancel(self):
+        """Interrupt a pending read."""
+        cancel_read = getattr(self.serial_port, 'cancel_read', None)
+        if cancel_read is not None:
+            cancel_read()
+
+
 class SerialStenotypeBase(ThreadedStenotypeBase):
     """For use with stenotype machines that connect via serial port.
 
@@ -170,6 +297,9 @@ class SerialStenotypeBase(ThreadedStenotypeBase):
         ThreadedStenotypeBase.__init__(self)
         self.serial_port = None
         self.serial_params = serial_params
+        # Set by subclasses using a BufferedSerialReader,
+        # so pending reads are interrupted on stop.
+        self._reader = None
 
     def _close_port(self):
         if self.serial_port is None:
@@ -196,6 +326,9 @@ class SerialStenotypeBase(ThreadedStenotypeBase):
 
     def stop_capture(self):
         """Stop listening for output from the stenotype machine."""
+        self.finished.set()
+        if self._reader is not None:
+            self._reader.cancel()
         ThreadedStenotypeBase.stop_capture(self)
         self._close_port()
 
@@ -0,0 +1,63 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Table driven decoding of stenotype machines packets.
+
+Most serial protocols encode each key as a bit of a given byte of the
+packet. Instead of testing each bit of each byte, a table per byte
+position maps every possible byte value to the corresponding keys, so
+decoding a packet is only a handful of table lookups.
+
+The key tables are built once per protocol (see key_tables). For a
+given machine, the keymap can be applied on top of them (see
+action_tables): this must be redone when the mappings change.
+
+"""
+
+
+def _byte_keys(chart, byte):
+    return tuple(key for mask, key in chart if key and (byte & mask))
+
+
+def key_tables(charts):
+    """Build the key tables of a protocol.
+
+    charts -- for each byte position, the sequence of (mask, key) for the
+    keys encoded in this byte, in the order the keys should be decoded; an
+    empty key can be used for unused bits.
+
+    Return a list of 256 entries tables: byte value -> tuple of keys.
+
+    """
+    return [tuple(_byte_keys(chart, byte) for byte in range(256))
+            for chart in charts]
+
+
+def action_tables(tables, keymap):
+    """Apply a keymap to key tables.
+
+    Return a list of 256 entries tables: byte value -> tuple of actions.
+    Keys mapped to 'no-op' (or unmapped) are dropped.
+
+    """
+    actions = {}
+    for table in tables:
+        for keys in table:
+            for key in keys:
+                if key not in actions:
+                    action = keymap.get_action(key)
+                    actions[key] = None if action == 'no-op' else action
+    return [tuple(tuple(actions[key] for key in keys
+                        if actions[key] is not None)
+                  for keys in table)
+            for table in tables]
+
+
+def decode(tables, data):
+    """Decode a packet: return the list of keys (or actions, depending on
+    the tables used) for its bytes; extra bytes are ignored.
+    """
+    decoded = []
+    for table, byte in zip(tables, bytearray(data)):
+        decoded.extend(table[byte])
+    return decoded
@@ -3,10 +3,8 @@
 
 """Thread-based monitoring of a Gemini PR stenotype machine."""
 
-# Python 2/3 compatibility.
-from six import iterbytes
-
 from plover.machine.base import SerialStenotypeBase
+from plover.machine.decoding import decode, key_tables
 
 # In the Gemini PR protocol, each packet consists of exactly six bytes
 # and the most significant bit (MSB) of every byte is used exclusively
@@ -24,6 +22,11 @@ STENO_KEY_CHART = ("Fn", "#1", "#2", "#3", "#4", "#5", "#6",
 
 BYTES_PER_STROKE = 6
 
+KEY_TABLES = key_tables([
+    [(0x80 >> j, STENO_KEY_CHART[i * 7 + j - 1]) for j in range(1, 8)]
+    for i in range(BYTES_PER_STROKE)
+])
+
 
 class GeminiPr(SerialStenotypeBase):
     """Standard stenotype interface for a Gemini PR machine.
@@ -39,6 +42,8 @@ class GeminiPr(SerialStenotypeBase):
         res2
     '''
 
+    KEY_TABLES = KEY_TABLES
+
     def run(self):
         """Overrides base class run method. Do not call directly."""
         self._ready()
@@ -48,15 +53,10 @@ class GeminiPr(SerialStenotypeBase):
             raw = self.serial_port.read(BYTES_PER_STROKE)
             if not raw:
                 continue
+            self._received()
 
             # Convert the raw to a list of steno keys.
-            steno_keys = []
-            for i, b in enumerate(iterbytes(raw)):
-                for j in range(1, 8):
-                    if (b & (0x80 >> j)):
-                        steno_keys.append(STENO_KEY_CHART[i * 7 + j - 1])
-
-            steno_keys = self.keymap.keys_to_actions(steno_keys)
+            steno_keys = decode(self._action_tables, raw)
             if steno_keys:
                 # Notify all subscribers.
                 self._notify(steno_keys)
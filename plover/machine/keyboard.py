@@ -102,6 +102,7 @@ class Keyboard(StenotypeBase):
         if self.arpeggiate:
             send_strokes &= key == self._arpeggiate_key
         if send_strokes:
+            self._received()
             steno_keys = list(self._down_keys)
             if steno_keys:
                 self._down_keys.clear()
@@ -3,14 +3,14 @@
 
 "Thread-based monitoring of a stenotype machine using the passport protocol."
 
-# Python 2/3 compatibility.
-from six.moves import zip_longest
-
-from plover.machine.base import SerialStenotypeBase
+from plover.machine.base import BufferedSerialReader, SerialStenotypeBase
 
 # Passport protocol is documented here:
 # http://www.eclipsecat.com/?q=system/files/Passport%20protocol_0.pdf
 
+# A key is pressed if its shadow is 8 or more.
+PRESSED_SHADOWS = frozenset('89abcdefABCDEF')
+
 class Passport(SerialStenotypeBase):
     """Passport interface."""
 
@@ -22,42 +22,28 @@ class Passport(SerialStenotypeBase):
         ! ^ +
     '''
 
-    def __init__(self, params):
-        super(Passport, self).__init__(params)
-        self.packet = []
-
-    def _read(self, b):
-        b = chr(b)
-        self.packet.append(b)
-        if b == '>':
-            self._handle_packet(''.join(self.packet))
-            del self.packet[:]
-
-    def _handle_packet(self, packet):
-        encoded = packet.split('/')[1]
-        steno_keys = []
-        for key, shadow in grouper(encoded, 2, 0):
-            shadow = int(shadow, base=16)
-            if shadow >= 8:
-                steno_keys.append(key)
-        steno_keys = self.keymap.keys_to_actions(steno_keys)
-        if steno_keys:
-            self._notify(steno_keys)
+    def _decode_packet(self, packet):
+        # Note: latin-1 so any byte can be decoded.
+        encoded = packet.split(b'/')[1].decode('latin-1')
+        # Pairs of key and shadow (hexadecimal digit).
+        steno_keys = [key for key, shadow in zip(encoded[0::2], encoded[1::2])
+                      if shadow in PRESSED_SHADOWS]
+        return self.keymap.keys_to_actions(steno_keys)
 
     def run(self):
         """Overrides base class run method. Do not call directly."""
+        reader = self._reader = BufferedSerialReader(self.serial_port)
         self._ready()
 
         while not self.finished.isSet():
-            # Grab data from the serial port.
-            raw = self.serial_port.read(self.serial_port.inWaiting())
-
-            # XXX : work around for python 3.1 and python 2.6 differences
-            if isinstance(raw, str):
-                raw = [ord(x) for x in raw]
-
-            for b in raw:
-                self._read(b)
+            # Wait for data from the serial port.
+            if not reader.read():
+                continue
+            self._received()
+            strokes = [self._decode_packet(packet)
+                       for packet in reader.split(b'>')]
+            self._notify_batch([steno_keys for steno_keys in strokes
+                                if steno_keys])
 
     @classmethod
     def get_option_info(cls):
@@ -74,11 +60,3 @@ class Passport(SerialStenotypeBase):
             'xonxoff': (False, bool_converter),
             'rtscts': (False, bool_converter)
         }
-
-
-def grouper(iterable, n, fillvalue=None):
-    "Collect data into fixed-length chunks or blocks"
-    # grouper('ABCDEFG', 3, 'x') --> ABC DEF Gxx
-    args = [iter(iterable)] * n
-    return zip_longest(fillvalue=fillvalue, *args)
-
@@ -3,10 +3,8 @@
 
 """Thread-based monitoring of a ProCAT stenotype machine."""
 
-# Python 2/3 compatibility.
-from six import iterbytes
-
 from plover.machine.base import SerialStenotypeBase
+from plover.machine.decoding import decode, key_tables
 
 """
 ProCAT machines send 4 bytes per stroke, with the last byte only consisting of
@@ -20,6 +18,12 @@ STENO_KEY_CHART = ('', '#', 'S-', 'T-', 'K-', 'P-', 'W-', 'H-',
 
 BYTES_PER_STROKE = 4
 
+# Only the first 3 bytes are used.
+KEY_TABLES = key_tables([
+    [(0x80 >> j, STENO_KEY_CHART[i * 8 + j]) for j in range(8)]
+    for i in range(3)
+])
+
 
 class ProCAT(SerialStenotypeBase):
     """Interface for ProCAT machines.
@@ -32,6 +36,8 @@ class ProCAT(SerialStenotypeBase):
                A- O- -E -U
     '''
 
+    KEY_TABLES = KEY_TABLES
+
     def run(self):
         """Overrides base class run method. Do not call directly."""
         self._ready()
@@ -41,11 +47,10 @@ class ProCAT(SerialStenotypeBase):
             raw = self.serial_port.read(BYTES_PER_STROKE)
             if not raw:
                 continue
+            self._received()
 
             # Convert the raw to a list of steno keys.
-            steno_keys = self.keymap.keys_to_actions(
-                self.process_steno_packet(raw)
-            )
+            steno_keys = decode(self._action_tables, raw)
             if steno_keys:
                 # Notify all subscribers.
                 self._notify(steno_keys)
@@ -53,13 +58,6 @@ class ProCAT(SerialStenotypeBase):
     @staticmethod
     def process_steno_packet(raw):
         # Raw packet has 4 bytes, we only care about the first 3
-        steno_keys = []
-        for i, b in enumerate(iterbytes(raw[:3])):
-            for j in range(0, 8):
-                if b & 0x80 >> j:
-                    key = STENO_KEY_CHART[i * 8 + j]
-                    if key:
-                        steno_keys.append(key)
-        return steno_keys
+        return decode(KEY_TABLES, raw)
 
 
@@ -3,40 +3,57 @@
 
 "Manager for stenotype machines types."
 
-from plover.machine.geminipr import GeminiPr
-from plover.machine.txbolt import TxBolt
-from plover.machine.keyboard import Keyboard
-from plover.machine.stentura import Stentura
-from plover.machine.passport import Passport
-from plover.machine.procat import ProCAT
-from plover.machine.treal import Treal
+import importlib
 
 class NoSuchMachineException(Exception):
-    def __init__(self, id):
+    def __init__(self, id, reason=None):
         self._id = id
+        self._reason = reason
 
     def __str__(self):
+        if self._reason is not None:
+            return 'Unavailable machine type: {} ({})'.format(self._id,
+                                                              self._reason)
         return 'Unrecognized machine type: {}'.format(self._id)
 
 class Registry(object):
     def __init__(self):
         self._machines = {}
+        self._lazy_machines = {}
         self._aliases = {}
 
     def register(self, name, machine):
+        self._lazy_machines.pop(name, None)
         self._machines[name] = machine
 
+    def register_lazy(self, name, module_name, class_name):
+        """Register a machine whose module is only imported on first use."""
+        self._lazy_machines[name] = (module_name, class_name)
+
     def add_alias(self, alias, name):
         self._aliases[alias] = name
 
     def get(self, name):
+        resolved_name = self.resolve_alias(name)
+        try:
+            return self._machines[resolved_name]
+        except KeyError:
+            pass
         try:
-            return self._machines[self.resolve_alias(name)]
+            module_name, class_name = self._lazy_machines[resolved_name]
         except KeyError:
             raise NoSuchMachineException(name)
+        try:
+            module = importlib.import_module(module_name)
+        except ImportError as e:
+            # E.g. a missing driver dependency.
+            raise NoSuchMachineException(name, str(e))
+        machine = getattr(module, class_name)
+        self.register(resolved_name, machine)
+        return machine
 
     def get_all_names(self):
-        return self._machines.keys()
+        return list(self._machines.keys()) + list(self._lazy_machines.keys())
         
     def resolve_alias(self, name):
         try:
@@ -44,14 +61,16 @@ class Registry(object):
         except KeyError:
             return name
 
+# Machine drivers are imported on first use: this speeds up startup,
+# and avoids requiring the dependencies of unused drivers (e.g. hid).
 machine_registry = Registry()
-machine_registry.register('Keyboard', Keyboard)
-machine_registry.register('Gemini PR', GeminiPr)
-machine_registry.register('TX Bolt', TxBolt)
-machine_registry.register('Stentura', Stentura)
-machine_registry.register('Passport', Passport)
-machine_registry.register('ProCAT', ProCAT)
-machine_registry.register('Treal', Treal)
+machine_registry.register_lazy('Keyboard', 'plover.machine.keyboard', 'Keyboard')
+machine_registry.register_lazy('Gemini PR', 'plover.machine.geminipr', 'GeminiPr')
+machine_registry.register_lazy('TX Bolt', 'plover.machine.txbolt', 'TxBolt')
+machine_registry.register_lazy('Stentura', 'plover.machine.stentura', 'Stentura')
+machine_registry.register_lazy('Passport', 'plover.machine.passport', 'Passport')
+machine_registry.register_lazy('ProCAT', 'plover.machine.procat', 'ProCAT')
+machine_registry.register_lazy('Treal', 'plover.machine.treal', 'Treal')
 
 # Legacy configuration
 machine_registry.add_alias('Microsoft Sidewinder X4', 'Keyboard')
@@ -0,0 +1,52 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Simulated stenotype machines, for testing and benchmarking.
+
+Each simulator opens a pseudo-terminal pair (so this is only available
+on POSIX systems) and speaks a serial protocol on the master side: the
+machine driver connects to it through the normal `port` option, e.g.:
+
+    simulator = create_simulator('Gemini PR', parse_script('S- T-'))
+    simulator.start()
+    machine = GeminiPr({'port': simulator.port, ...})
+    machine.start_capture()
+    # Once connected:
+    simulator.play()
+
+It can also be run as a script, see plover.machine.simulator.__main__.
+
+"""
+
+from plover.machine.simulator.base import Simulator, parse_script
+from plover.machine.simulator.protocols import (
+    GeminiPrSimulator,
+    PassportSimulator,
+    ProCATSimulator,
+    StenturaSimulator,
+    TxBoltSimulator,
+)
+
+
+# Machine name (see plover.machine.registry) to simulator class.
+SIMULATORS = {
+    'Gemini PR': GeminiPrSimulator,
+    'Passport': PassportSimulator,
+    'ProCAT': ProCATSimulator,
+    'Stentura': StenturaSimulator,
+    'TX Bolt': TxBoltSimulator,
+}
+
+
+def create_simulator(machine_name, script=(), **kwargs):
+    """Create (but do not start) a simulator for a machine."""
+    return SIMULATORS[machine_name](script, **kwargs)
+
+
+def machine_params(machine_class, simulator, **options):
+    """Return the options to connect a machine to a simulator."""
+    params = dict((name, value[0]) for name, value
+                  in machine_class.get_option_info().items())
+    params.update(options)
+    params['port'] = simulator.port
+    return params
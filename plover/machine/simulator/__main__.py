@@ -0,0 +1,65 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Run a simulated machine.
+
+Usage:
+
+    python -m plover.machine.simulator MACHINE [SCRIPT] [--interval 0.2] \
+        [--delay 10]
+
+The script (see plover.machine.simulator.base.parse_script) is read from
+standard input if no file is given. The pseudo-terminal to use as the
+machine port is printed, and the script is started after a delay (to
+leave time to connect the machine to it).
+
+"""
+
+from __future__ import print_function
+
+import argparse
+import io
+import sys
+import time
+
+from plover.machine.simulator import SIMULATORS, create_simulator, \
+    parse_script
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('machine', choices=sorted(SIMULATORS))
+    parser.add_argument('script', nargs='?', default=None,
+                        help='stroke script (default: standard input)')
+    parser.add_argument('-i', '--interval', type=float, default=0.0,
+                        help='delay after each stroke (in seconds)')
+    parser.add_argument('-d', '--delay', type=float, default=10.0,
+                        help='delay before starting the script (in seconds)')
+    args = parser.parse_args()
+
+    if args.script is None:
+        text = sys.stdin.read()
+    else:
+        with io.open(args.script, encoding='utf-8') as fp:
+            text = fp.read()
+    simulator = create_simulator(args.machine, parse_script(text),
+                                 interval=args.interval)
+    print('port: %s' % simulator.port)
+    simulator.start()
+    try:
+        time.sleep(args.delay)
+        simulator.play()
+        # Note: wait with a timeout so KeyboardInterrupt is handled.
+        while not simulator.wait(0.5):
+            pass
+        print('script done, interrupt to quit')
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        simulator.stop()
+
+
+if __name__ == '__main__':
+    main()
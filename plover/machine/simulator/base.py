@@ -0,0 +1,189 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Pseudo-terminal based stenotype machine simulator."""
+
+import os
+import random
+import select
+import threading
+import tty
+
+from plover import log
+
+
+# Script events.
+STROKES = 'strokes'
+WAIT = 'wait'
+NOISE = 'noise'
+DISCONNECT = 'disconnect'
+
+
+def parse_script(text):
+    """Parse a stroke script.
+
+    One event per line, empty lines and lines starting with '#' are
+    ignored:
+
+    - `S- T- A- -T`: a stroke, as a list of machine keys (see the machine
+      KEYS_LAYOUT); several strokes separated by '/' are sent in one burst
+    - `wait 0.5`: wait for this many seconds
+    - `noise 3`: send this many random bytes
+    - `disconnect`: hang up (this ends the script)
+
+    Return a list of (event, argument) tuples.
+
+    """
+    events = []
+    for line_number, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        words = line.split()
+        try:
+            if words[0] == WAIT:
+                events.append((WAIT, float(words[1])))
+            elif words[0] == NOISE:
+                events.append((NOISE, int(words[1])))
+            elif words[0] == DISCONNECT:
+                events.append((DISCONNECT, None))
+            else:
+                strokes = [stroke.split() for stroke in line.split('/')]
+                events.append((STROKES, [s for s in strokes if s]))
+        except (IndexError, ValueError):
+            raise ValueError('invalid script line %u: %s' % (line_number, line))
+    return events
+
+
+class Simulator(object):
+    """Simulate a stenotype machine on a pseudo-terminal pair.
+
+    The machine driver opens the slave side (see `port`) like a real
+    serial port; the simulator writes to the master side.
+
+    `start` must be called before the driver connects (for protocols with
+    requests), and `play` once it is connected to send the script.
+
+    Subclasses implement encode (a stroke to the protocol bytes), and can
+    override write_strokes and handle_input for request/response
+    protocols.
+
+    """
+
+    # Keys supported by the protocol.
+    KEYS = ()
+
+    def __init__(self, script=(), interval=0.0, seed=None):
+        """
+        script -- a list of events (see parse_script).
+        interval -- delay after each stroke (in seconds).
+        seed -- the random generator seed (used for noise).
+        """
+        script = list(script)
+        for event, argument in script:
+            if event != STROKES:
+                continue
+            for stroke in argument:
+                for key in stroke:
+                    if key not in self.KEYS:
+                        raise ValueError('invalid key: %s' % key)
+        self.master, self.slave = os.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+        self.script = script
+        self.interval = interval
+        self.random = random.Random(seed)
+        self.connected = True
+        self.strokes_sent = 0
+        self._stop = threading.Event()
+        self._write_lock = threading.Lock()
+        self._script_thread = threading.Thread(target=self._run_script,
+                                               name='Simulator-script')
+        self._script_thread.daemon = True
+        self._input_thread = threading.Thread(target=self._run_input,
+                                              name='Simulator-input')
+        self._input_thread.daemon = True
+
+    def encode(self, stroke):
+        """Return the bytes for a stroke (a list of machine keys)."""
+        raise NotImplementedError()
+
+    def write(self, data):
+        with self._write_lock:
+            if not self.connected:
+                return
+            while data:
+                data = data[os.write(self.master, data):]
+
+    def write_strokes(self, strokes):
+        """Send strokes at once."""
+        self.write(b''.join(self.encode(stroke) for stroke in strokes))
+        self.strokes_sent += len(strokes)
+
+    def handle_input(self, data):
+        """Handle data sent by the driver (ignored by default)."""
+        pass
+
+    def start(self):
+        """Start handling the driver requests."""
+        self._input_thread.start()
+
+    def play(self):
+        """Start playing the script."""
+        self._script_thread.start()
+
+    def wait(self, timeout=None):
+        """Wait for the end of the script, return False on timeout."""
+        self._script_thread.join(timeout)
+        return not self._script_thread.is_alive()
+
+    def disconnect(self):
+        """Hang up: the driver reads will fail."""
+        with self._write_lock:
+            if not self.connected:
+                return
+            self.connected = False
+            os.close(self.slave)
+            os.close(self.master)
+
+    def stop(self):
+        self._stop.set()
+        self.on_stop()
+        self.disconnect()
+        for thread in (self._script_thread, self._input_thread):
+            if thread.ident is not None:
+                thread.join()
+
+    def on_stop(self):
+        """Called when the simulator is stopped (before disconnecting)."""
+        pass
+
+    def _run_script(self):
+        for event, argument in self.script:
+            if self._stop.is_set() or not self.connected:
+                break
+            if event == STROKES:
+                self.write_strokes(argument)
+                if self.interval:
+                    self._stop.wait(self.interval)
+            elif event == WAIT:
+                self._stop.wait(argument)
+            elif event == NOISE:
+                self.write(bytes(bytearray(self.random.randrange(256)
+                                           for n in range(argument))))
+            elif event == DISCONNECT:
+                self.disconnect()
+
+    def _run_input(self):
+        while not self._stop.is_set() and self.connected:
+            try:
+                if not select.select([self.master], [], [], 0.1)[0]:
+                    continue
+                data = os.read(self.master, 4096)
+            except (OSError, ValueError):
+                # Disconnected.
+                break
+            try:
+                self.handle_input(data)
+            except Exception:
+                log.error('simulator failed to handle input', exc_info=True)
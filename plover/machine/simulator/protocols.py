@@ -0,0 +1,196 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Simulators for the serial stenotype protocols."""
+
+import struct
+import threading
+
+from plover.machine import geminipr, passport, procat, stentura, txbolt
+from plover.machine.simulator.base import Simulator
+
+
+def _key_bits(chart, bits_per_byte, key):
+    """Return the (byte index, bit index) of a key in a protocol chart."""
+    try:
+        index = chart.index(key)
+    except ValueError:
+        raise ValueError('invalid key: %s' % key)
+    return divmod(index, bits_per_byte)
+
+
+class GeminiPrSimulator(Simulator):
+    """Gemini PR: 6 bytes packets, the first one has its MSB set."""
+
+    KEYS = frozenset(geminipr.STENO_KEY_CHART)
+
+    def encode(self, stroke):
+        packet = bytearray(geminipr.BYTES_PER_STROKE)
+        packet[0] = 0x80
+        for key in stroke:
+            byte, bit = _key_bits(geminipr.STENO_KEY_CHART, 7, key)
+            packet[byte] |= 0x40 >> bit
+        return bytes(packet)
+
+
+class ProCATSimulator(Simulator):
+    """ProCAT: 4 bytes packets, the last one is always 0xFF."""
+
+    KEYS = frozenset(procat.STENO_KEY_CHART) - set([''])
+
+    def encode(self, stroke):
+        packet = bytearray(procat.BYTES_PER_STROKE)
+        packet[3] = 0xff
+        for key in stroke:
+            byte, bit = _key_bits(procat.STENO_KEY_CHART, 8, key)
+            packet[byte] |= 0x80 >> bit
+        return bytes(packet)
+
+
+class TxBoltSimulator(Simulator):
+    """TX Bolt: one byte per set of keys pressed, in order.
+
+    When the first set of a stroke comes after the last set of the
+    previous stroke, a zero byte is sent first, so the strokes are not
+    merged.
+
+    """
+
+    KEYS = frozenset(txbolt.STENO_KEY_CHART)
+
+    def __init__(self, *args, **kwargs):
+        super(TxBoltSimulator, self).__init__(*args, **kwargs)
+        self._last_key_set = 3
+
+    def encode(self, stroke):
+        sets = [0] * 4
+        for key in stroke:
+            key_set, bit = _key_bits(txbolt.STENO_KEY_CHART, 6, key)
+            sets[key_set] |= 1 << bit
+        packet = bytearray((key_set << 6) | bits
+                           for key_set, bits in enumerate(sets) if bits)
+        if not packet:
+            return b''
+        if packet[0] >> 6 > self._last_key_set:
+            packet.insert(0, 0)
+        self._last_key_set = packet[-1] >> 6
+        return bytes(packet)
+
+
+class PassportSimulator(Simulator):
+    """Passport: text packets, e.g. `<123/SfTf/0>`, listing each key
+    pressed followed by its shadow (a pressure, as an hexadecimal digit).
+    """
+
+    KEYS = frozenset(passport.Passport.KEYS_LAYOUT.split())
+
+    def __init__(self, *args, **kwargs):
+        super(PassportSimulator, self).__init__(*args, **kwargs)
+        self._counter = 0
+
+    def encode(self, stroke):
+        self._counter += 1
+        keys = ''.join(key + 'f' for key in stroke)
+        return ('<%u/%s/0>' % (self._counter, keys)).encode('ascii')
+
+
+class StenturaSimulator(Simulator):
+    """Stentura: answer OPEN and READC requests from the driver.
+
+    Strokes are appended to the realtime file, READC requests read from it
+    (ignoring the position parameters, like the realtime file on a real
+    machine), and are held off for up to `hold` seconds if there is no new
+    data.
+
+    """
+
+    KEYS = frozenset(stentura._STENO_KEY_CHART)
+
+    _RESPONSE_STRUCT = struct.Struct('<2B5H')
+    _REQUEST_STRUCT = struct.Struct('<2B7H')
+
+    def __init__(self, script=(), interval=0.0, seed=None,
+                 realtime=b'', hold=0.5):
+        """
+        realtime -- the initial content of the realtime file.
+        hold -- how long an empty READC response is held off (in seconds).
+        """
+        super(StenturaSimulator, self).__init__(script, interval, seed)
+        self.realtime = bytearray(realtime)
+        self.hold = hold
+        self.requests = 0
+        self._position = 0
+        self._input = bytearray()
+        self._condition = threading.Condition()
+
+    def encode(self, stroke):
+        packet = bytearray(b'\xc0\xc0\xc0\xc0')
+        for key in stroke:
+            byte, bit = _key_bits(stentura._STENO_KEY_CHART, 6, key)
+            packet[byte] |= 0x20 >> bit
+        return bytes(packet)
+
+    def write_strokes(self, strokes):
+        with self._condition:
+            for stroke in strokes:
+                self.realtime.extend(self.encode(stroke))
+            self.strokes_sent += len(strokes)
+            self._condition.notify()
+
+    def on_stop(self):
+        with self._condition:
+            self._condition.notify()
+
+    def _respond(self, seq, action, p1=0, data=b''):
+        length = 14 + (len(data) + 2 if data else 0)
+        response = bytearray(length)
+        self._RESPONSE_STRUCT.pack_into(response, 0, 1, seq, length,
+                                        action, 0, p1, 0)
+        struct.pack_into('<H', response, 12, stentura._crc(response, 1, 11))
+        if data:
+            response[14:14 + len(data)] = data
+            struct.pack_into('<H', response, 14 + len(data),
+                             stentura._crc(data))
+        self.write(bytes(response))
+
+    def _handle_request(self, request):
+        self.requests += 1
+        (soh, seq, length, action,
+         p1, p2, p3, p4, p5) = self._REQUEST_STRUCT.unpack_from(request)
+        if action == stentura._OPEN:
+            self._position = 0
+            self._respond(seq, action)
+        elif action == stentura._READC:
+            with self._condition:
+                if self._position == len(self.realtime):
+                    self._condition.wait(self.hold)
+                data = bytes(self.realtime[self._position:self._position + p3])
+                self._position += len(data)
+            self._respond(seq, action, p1=len(data), data=data)
+        else:
+            self._respond(seq, action)
+
+    def handle_input(self, data):
+        buf = self._input
+        buf.extend(data)
+        while True:
+            # Resynchronize on the start of a packet.
+            start = buf.find(b'\x01')
+            if start == -1:
+                del buf[:]
+                return
+            del buf[:start]
+            if len(buf) < 4:
+                return
+            length = struct.unpack_from('<H', buf, 2)[0]
+            if length < 18:
+                del buf[:1]
+                continue
+            if len(buf) < length:
+                return
+            request = bytes(buf[:length])
+            del buf[:length]
+            if stentura._crc(request, 1, 17) != 0:
+                # Corrupted request: no response, the driver will retry.
+                continue
+            self._handle_request(request)
@@ -154,6 +154,7 @@ from six import PY2, iterbytes
 
 from plover import log
 import plover.machine.base
+from plover.machine.decoding import decode, key_tables
 
 
 if PY2:
@@ -286,6 +287,11 @@ _STENO_KEY_CHART = ('^', '#', 'S-', 'T-', 'K-', 'P-',    # Byte #1
                     '-E', '-U', '-F', '-R', '-P', '-B',  # Byte #3
                     '-L', '-G', '-T', '-S', '-D', '-Z')  # Byte #4
 
+_KEY_TABLES = key_tables([
+    [(0x20 >> j, _STENO_KEY_CHART[i * 6 + j]) for j in range(6)]
+    for i in range(4)
+])
+
 
 def _parse_stroke(a, b, c, d):
     """Parse a stroke and return a list of keys pressed.
@@ -300,17 +306,16 @@ def _parse_stroke(a, b, c, d):
              e.g. ['S-', 'A-', '-T']
 
     """
-    fullstroke = (((a & 0x3f) << 18) | ((b & 0x3f) << 12) |
-                  ((c & 0x3f) << 6) | d & 0x3f)
-    return [_STENO_KEY_CHART[i] for i in range(24)
-            if (fullstroke & (1 << (23 - i)))]
+    return decode(_KEY_TABLES, (a, b, c, d))
 
 
-def _parse_strokes(data):
+def _parse_strokes(data, tables=_KEY_TABLES):
     """Parse strokes from a buffer and return a sequence of strokes.
 
     Args:
-    - data: A byte buffer.
+    - data: A byte buffer (can be a view of the response buffer).
+    - tables: The decoding tables (see plover.machine.decoding), by default
+      strokes are decoded to keys.
 
     Returns: A sequence of strokes. Each stroke is a sequence of pressed keys.
 
@@ -322,11 +327,14 @@ def _parse_strokes(data):
     if (len(data) % 4) != 0:
         raise _ProtocolViolationException(
             "Data size is not divisible by 4: %d" % (len(data)))
-    for b in iterbytes(data):
-        if (b & 0b11000000) != 0b11000000:
-            raise _ProtocolViolationException("Data is not stroke: 0x%X" % (b))
-    for a, b, c, d in zip(*([iterbytes(data)] * 4)):
-        strokes.append(_parse_stroke(a, b, c, d))
+    t1, t2, t3, t4 = tables
+    it = iterbytes(data)
+    for a, b, c, d in zip(it, it, it, it):
+        if (a & b & c & d & 0b11000000) != 0b11000000:
+            for byte in (a, b, c, d):
+                if (byte & 0b11000000) != 0b11000000:
+                    raise _ProtocolViolationException("Data is not stroke: 0x%X" % (byte))
+        strokes.append(list(t1[a] + t2[b] + t3[c] + t4[d]))
     return strokes
 
 # Actions
@@ -570,6 +578,42 @@ class _SequenceCounter(object):
         return cur
 
 
+def _read_block(port, stop, seq, request_buf, response_buf, block, byte):
+    """Read the next chunk (up to 512 bytes) of the current file.
+
+    The file should be opened first.
+
+    Args:
+    - port: The port to use.
+    - stop: The event used to request stopping.
+    - seq: A _SequenceCounter instance to use to track packets.
+    - request_buf: Buffer to use for request packet.
+    - response_buf: Buffer to use for response packet.
+    - block: The current block.
+    - byte: The current byte offset in the block.
+
+    Returns: The new block and byte offset, and the data read, as a slice
+    of response_buf (so only valid until the next read).
+
+    Raises:
+    _ProtocolViolationException: If the protocol is violated.
+    _StopException: If a stop is requested.
+    _ConnectionLostException: If we can't seem to talk to the machine.
+
+    """
+    packet = _make_read(request_buf, seq(), block, byte, length=512)
+    response = _send_receive(port, stop, packet, response_buf)
+    p1 = _SHORT_STRUCT.unpack(response[8:10])[0]
+    if not ((p1 == 0 and len(response) == 14) or  # No data.
+            (p1 == len(response) - 16)):          # Data.
+        raise _ProtocolViolationException()
+    byte += p1
+    if byte >= 512:
+        block += 1
+        byte -= 512
+    return block, byte, buffer(response, 14, p1)
+
+
 def _read(port, stop, seq, request_buf, response_buf, stroke_buf, block, byte):
     """Read the full contents of the current file from beginning to end.
 
@@ -581,7 +625,8 @@ def _read(port, stop, seq, request_buf, response_buf, stroke_buf, block, byte):
     - seq: A _SequenceCounter instance to use to track packets.
     - request_buf: Buffer to use for request packet.
     - response_buf: Buffer to use for response packet.
-    - stroke_buf: Buffer to use for strokes read from the file.
+    - stroke_buf: Buffer to use for strokes read from the file, or None
+      to only skip to the end of the file.
 
     Raises:
     _ProtocolViolationException: If the protocol is violated.
@@ -591,21 +636,15 @@ def _read(port, stop, seq, request_buf, response_buf, stroke_buf, block, byte):
     """
     bytes_read = 0
     while True:
-        packet = _make_read(request_buf, seq(), block, byte, length=512)
-        response = _send_receive(port, stop, packet, response_buf)
-        p1 = _SHORT_STRUCT.unpack(response[8:10])[0]
-        if not ((p1 == 0 and len(response) == 14) or  # No data.
-                (p1 == len(response) - 16)):          # Data.
-            raise _ProtocolViolationException()
-        if p1 == 0:
+        block, byte, data = _read_block(port, stop, seq, request_buf,
+                                        response_buf, block, byte)
+        if not data:
+            if stroke_buf is None:
+                return block, byte, None
             return block, byte, buffer(stroke_buf, 0, bytes_read)
-        data = buffer(response, 14, p1)
-        _write_to_buffer(stroke_buf, bytes_read, data)
+        if stroke_buf is not None:
+            _write_to_buffer(stroke_buf, bytes_read, data)
         bytes_read += len(data)
-        byte += p1
-        if byte >= 512:
-            block += 1
-            byte -= 512
 
 def _loop(port, stop, callback, ready_callback, timeout=1):
     """Enter into a loop talking to the machine and returning strokes.
@@ -613,8 +652,9 @@ def _loop(port, stop, callback, ready_callback, timeout=1):
     Args:
     - port: The port to use.
     - stop: The event used to signal that it's time to stop.
-    - callback: A function that takes a list of pressed keys, called for each
-    stroke.
+    - callback: A function called with the strokes data each time some
+    strokes are read (see _parse_strokes); the data is a slice of the
+    response buffer, and is only valid during the call.
     - ready_callback: A function that is called when the machine is ready.
     - timeout: Timeout to use when waiting for a response in seconds. Should be
     1 when talking to a real machine. (default: 1)
@@ -638,20 +678,22 @@ def _loop(port, stop, callback, ready_callback, timeout=1):
     # allow resizing the original bytearray(), so make sure our buffers are big
     # enough to begin with.
     request_buf, response_buf = _allocate_buffer(), _allocate_buffer()
-    stroke_buf = _allocate_buffer()
     seq = _SequenceCounter()
     request = _make_open(request_buf, seq(), b'A', b'REALTIME.000')
     # Any checking needed on the response packet?
     _send_receive(port, stop, request, response_buf)
-    # Do a full read to get to the current position in the realtime file.
+    # Do a full read to get to the current position in the realtime
+    # file (the strokes already there are skipped, not copied).
     block, byte = 0, 0
-    block, byte, _ = _read(port, stop, seq, request_buf, response_buf, stroke_buf, block, byte)
+    block, byte, _ = _read(port, stop, seq, request_buf, response_buf, None, block, byte)
     ready_callback()
     while True:
-        block, byte, data = _read(port, stop, seq, request_buf, response_buf, stroke_buf, block, byte)
-        strokes = _parse_strokes(data)
-        for stroke in strokes:
-            callback(stroke)
+        # Deliver strokes as soon as they are read: waiting for the
+        # end of the file would mean waiting for an empty READC
+        # response, which the machine can hold off for up to 500ms.
+        block, byte, data = _read_block(port, stop, seq, request_buf, response_buf, block, byte)
+        if data:
+            callback(data)
 
 
 class Stentura(plover.machine.base.SerialStenotypeBase):
@@ -670,15 +712,18 @@ class Stentura(plover.machine.base.SerialStenotypeBase):
         ^
     '''
 
-    def _on_stroke(self, keys):
-        steno_keys = self.keymap.keys_to_actions(keys)
-        if steno_keys:
-            self._notify(steno_keys)
+    KEY_TABLES = _KEY_TABLES
+
+    def _on_strokes(self, data):
+        self._received()
+        self._notify_batch([steno_keys for steno_keys
+                            in _parse_strokes(data, self._action_tables)
+                            if steno_keys])
 
     def run(self):
         """Overrides base class run method. Do not call directly."""
         try:
-            _loop(self.serial_port, self.finished, self._on_stroke, self._ready)
+            _loop(self.serial_port, self.finished, self._on_strokes, self._ready)
         except _StopException:
             pass
         except Exception:
@@ -12,6 +12,7 @@ import hid
 
 from plover import log
 from plover.machine.base import ThreadedStenotypeBase
+from plover.machine.decoding import decode, key_tables
 
 
 STENO_KEY_CHART = (('K-', 'W-', 'R-', '*2', '-R', '-B', '-G', '-S'),
@@ -20,16 +21,13 @@ STENO_KEY_CHART = (('K-', 'W-', 'R-', '*2', '-R', '-B', '-G', '-S'),
                    ('#1', '#2', '#3', '#4', '#5', '#6', '#7', '#8'),
                    ('', '', '-Z', 'A-', 'O-', 'X3', '-E', '-U'))
 
+KEY_TABLES = key_tables([
+    [(1 << i, map[-i + 7]) for i in range(8)]
+    for map in STENO_KEY_CHART
+])
+
 def packet_to_stroke(p):
-   keys = []
-   for i, b in enumerate(p):
-       map = STENO_KEY_CHART[i]
-       for i in range(8):
-           if (b >> i) & 1:
-               key = map[-i + 7]
-               if key:
-                   keys.append(key)
-   return keys
+   return decode(KEY_TABLES, p)
 
 VENDOR_ID = 3526
 PRODUCT_IDS = range(1, 11)
@@ -38,13 +36,14 @@ EMPTY = [0] * 5
 
 class DataHandler(object):
 
-    def __init__(self, callback):
+    def __init__(self, callback, decode=packet_to_stroke):
         self._callback = callback
+        self._decode = decode
         self._pressed = EMPTY
 
     def update(self, p):
         if p == EMPTY and self._pressed != EMPTY:
-            stroke = packet_to_stroke(self._pressed)
+            stroke = self._decode(self._pressed)
             if stroke:
                 self._callback(stroke)
             self._pressed = EMPTY
@@ -61,14 +60,14 @@ class Treal(ThreadedStenotypeBase):
                    A- O- X3 -E -U
     '''
 
+    KEY_TABLES = KEY_TABLES
+
     def __init__(self, params):
         super(Treal, self).__init__()
         self._machine = None
 
-    def _on_stroke(self, keys):
-        steno_keys = self.keymap.keys_to_actions(keys)
-        if steno_keys:
-            self._notify(steno_keys)
+    def _decode(self, packet):
+        return decode(self._action_tables, packet)
 
     def _connect(self):
         connected = False
@@ -109,7 +108,8 @@ class Treal(ThreadedStenotypeBase):
         return connected
 
     def run(self):
-        handler = DataHandler(self._on_stroke)
+        # Strokes are directly decoded to actions.
+        handler = DataHandler(self._notify, decode=self._decode)
         self._ready()
         while not self.finished.isSet():
             try:
@@ -121,6 +121,7 @@ class Treal(ThreadedStenotypeBase):
                     log.warning('Treal reconnected.')
             else:
                 if len(packet) is 5:
+                    self._received()
                     handler.update(packet)
 
     def stop_capture(self):
@@ -3,9 +3,6 @@
 
 "Thread-based monitoring of a stenotype machine using the TX Bolt protocol."
 
-# Python 2/3 compatibility.
-from six import iterbytes
-
 import plover.machine.base
 
 # In the TX Bolt protocol, there are four sets of keys grouped in
@@ -32,6 +29,18 @@ STENO_KEY_CHART = ("S-", "T-", "K-", "P-", "W-", "H-",  # 00
                    "-F", "-R", "-P", "-B", "-L", "-G",  # 10
                    "-T", "-S", "-D", "-Z", "#")         # 11
 
+# Delay after which a stroke is considered finished
+# if no more data is received (in seconds).
+STROKE_TIMEOUT = 0.1
+
+# Each byte identifies its own set, so a single
+# table is used (see plover.machine.decoding).
+KEY_TABLES = [tuple(
+    tuple(STENO_KEY_CHART[(byte >> 6) * 6 + i] for i in range(6)
+          if (byte >> i) & 1 and (byte >> 6) * 6 + i < len(STENO_KEY_CHART))
+    for byte in range(256)
+)]
+
 
 class TxBolt(plover.machine.base.SerialStenotypeBase):
     """TX Bolt interface.
@@ -49,44 +58,58 @@ class TxBolt(plover.machine.base.SerialStenotypeBase):
               A- O-   -E -U
     '''
 
+    KEY_TABLES = KEY_TABLES
+
     def __init__(self, params):
         super(TxBolt, self).__init__(params)
+        # Strokes finished, but not notified yet.
+        self._strokes = []
         self._reset_stroke_state()
 
     def _reset_stroke_state(self):
-        self._pressed_keys = []
+        # Actions of the keys pressed so far, and whether any key was.
+        self._pressed_actions = []
+        self._pressed = False
         self._last_key_set = 0
 
     def _finish_stroke(self):
-        steno_keys = self.keymap.keys_to_actions(self._pressed_keys)
-        if steno_keys:
-            self._notify(self._pressed_keys)
+        if self._pressed_actions:
+            self._strokes.append(self._pressed_actions)
         self._reset_stroke_state()
 
+    def _notify_strokes(self):
+        strokes = self._strokes
+        if strokes:
+            self._strokes = []
+            self._notify_batch(strokes)
+
     def run(self):
         """Overrides base class run method. Do not call directly."""
-        settings = self.serial_port.getSettingsDict()
-        settings['timeout'] = 0.1 # seconds
-        self.serial_port.applySettingsDict(settings)
+        reader = self._reader = plover.machine.base.BufferedSerialReader(self.serial_port)
+        buffer = reader.buffer
         self._ready()
         while not self.finished.isSet():
-            # Grab data from the serial port, or wait for timeout if none available.
-            raw = self.serial_port.read(max(1, self.serial_port.inWaiting()))
-
-            if not raw and len(self._pressed_keys) > 0:
-                self._finish_stroke()
+            # Grab data from the serial port: while a stroke is in
+            # progress, wait for timeout if none available, as it
+            # may be finished; otherwise wait for the next stroke.
+            if not reader.read(STROKE_TIMEOUT if self._pressed else None):
+                if self._pressed:
+                    self._finish_stroke()
+                    self._notify_strokes()
                 continue
+            self._received()
 
-            for byte in iterbytes(raw):
+            action_table = self._action_tables[0]
+            for byte in buffer:
                 key_set = byte >> 6
-                if (key_set <= self._last_key_set
-                    and len(self._pressed_keys) > 0):
+                if key_set <= self._last_key_set and self._pressed:
                     self._finish_stroke()
                 self._last_key_set = key_set
-                for i in range(6):
-                    if (byte >> i) & 1:
-                        self._pressed_keys.append(
-                            STENO_KEY_CHART[(key_set * 6) + i])
+                if byte & 0x3f:
+                    self._pressed = True
+                    self._pressed_actions.extend(action_table[byte])
                 if 3 == key_set:
                     # Last possible set, the stroke is finished.
                     self._finish_stroke()
+            del buffer[:]
+            self._notify_strokes()
@@ -12,6 +12,11 @@ import sys
 import traceback
 import argparse
 
+from plover.startup import startup_timer
+# Imported first, so the system setup is timed on its own.
+import plover.system
+startup_timer.mark('system setup')
+
 WXVER = '3.0'
 if not hasattr(sys, 'frozen'):
     import wxversion
@@ -29,6 +34,8 @@ from plover import log
 from plover import __name__ as __software_name__
 from plover import __version__
 
+startup_timer.mark('imports')
+
 def show_error(title, message):
     """Report error to the user.
 
@@ -81,7 +88,10 @@ def main():
             log.info('Plover %s', __version__)
             config = Config()
             config.target_file = CONFIG_FILE
+            startup_timer.mark('setup')
             gui = plover.gui.main.PloverGUI(config)
+            startup_timer.mark('window')
+            log.info('%s', startup_timer.report())
             gui.MainLoop()
             with open(config.target_file, 'wb') as f:
                 config.save(f)
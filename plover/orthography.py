@@ -3,59 +3,156 @@
 
 """Functions that implement some English orthographic rules."""
 
+from collections import OrderedDict
+import re
+
 from plover import system
 
 
+# Separator between the word and the suffix in orthography rules.
+RULE_SEPARATOR = ' ^ '
+RE_RULE_SEPARATOR = r' \^ '
+
+# Maximum number of (word, suffix) results kept in the cache.
+SUFFIX_CACHE_SIZE = 10000
+
+
+class _SuffixRules(object):
+    """The orthography rules applicable to a given suffix.
+
+    Rules whose suffix part cannot match the suffix are dropped, and the
+    remaining rules are combined into a single matcher, so words no rule
+    applies to are rejected with only one regex match.
+
+    """
+
+    def __init__(self, suffix, rules):
+        self.rules = [r for r in rules if _rule_accepts_suffix(r[0], suffix)]
+        if self.rules:
+            self.matcher = re.compile('|'.join('(?:%s)' % r[0].pattern
+                                               for r in self.rules), re.I)
+        else:
+            self.matcher = None
+
+    def expand(self, word, suffix):
+        """Return the list of expansions from the rules matching, in order."""
+        if self.matcher is None:
+            return []
+        s = word + RULE_SEPARATOR + suffix
+        if self.matcher.match(s) is None:
+            return []
+        expansions = []
+        for pattern, replacement in self.rules:
+            m = pattern.match(s)
+            if m:
+                expansions.append(m.expand(replacement))
+        return expansions
+
+
+def _rule_accepts_suffix(pattern, suffix):
+    """Return False if the rule pattern can never match the suffix.
+
+    Rules are of the form '^WORD \\^ SUFFIX$': the suffix part is checked
+    on its own. If the pattern cannot be split this way, the rule is kept.
+
+    """
+    parts = pattern.pattern.split(RE_RULE_SEPARATOR)
+    if len(parts) != 2:
+        return True
+    try:
+        suffix_pattern = re.compile('(?:%s)' % parts[1], pattern.flags)
+    except re.error:
+        return True
+    return suffix_pattern.match(suffix) is not None
+
+
+class _Cache(object):
+    """Per system caches: rules by suffix, and a LRU of results."""
+
+    def __init__(self, rules, words):
+        self.rules = rules
+        self.words = words
+        self.suffix_rules = {}
+        self.results = OrderedDict()
+
+    def get_suffix_rules(self, suffix):
+        suffix_rules = self.suffix_rules.get(suffix)
+        if suffix_rules is None:
+            suffix_rules = self.suffix_rules[suffix] = _SuffixRules(suffix, self.rules)
+        return suffix_rules
+
+
+_cache = None
+
+
+def _get_cache():
+    global _cache
+    cache = _cache
+    # The system can be changed (see plover.system.setup).
+    if (cache is None or
+        cache.rules is not system.ORTHOGRAPHY_RULES or
+        cache.words is not system.ORTHOGRAPHY_WORDS):
+        cache = _cache = _Cache(system.ORTHOGRAPHY_RULES, system.ORTHOGRAPHY_WORDS)
+    return cache
+
+
 def make_candidates_from_rules(word, suffix, check=lambda x: True):
-    candidates = []
-    for r in system.ORTHOGRAPHY_RULES:
-        m = r[0].match(word + " ^ " + suffix)
-        if m:   
-            expanded = m.expand(r[1])
-            if check(expanded):
-                candidates.append(expanded)
-    return candidates
+    expansions = _get_cache().get_suffix_rules(suffix).expand(word, suffix)
+    return [e for e in expansions if check(e)]
 
 def _add_suffix(word, suffix):
-    in_dict_f = lambda x: x in system.ORTHOGRAPHY_WORDS
+    cache = _get_cache()
+    words = cache.words
 
     candidates = []
-    
+
     alias = system.ORTHOGRAPHY_RULES_ALIASES.get(suffix, None)
     if alias is not None:
-        candidates.extend(make_candidates_from_rules(word, alias, in_dict_f))
-    
+        candidates.extend(e for e in cache.get_suffix_rules(alias).expand(word, alias)
+                          if e in words)
+
     # Try a simple join if it is in the dictionary.
     simple = word + suffix
-    if in_dict_f(simple):
+    if simple in words:
         candidates.append(simple)
-    
+
     # Try rules with dict lookup.
-    candidates.extend(make_candidates_from_rules(word, suffix, in_dict_f))
+    expansions = cache.get_suffix_rules(suffix).expand(word, suffix)
+    candidates.extend(e for e in expansions if e in words)
 
     # For all candidates sort by prominence in dictionary and, since sort is
     # stable, also by the order added to candidates list.
     if candidates:
-        candidates.sort(key=lambda x: system.ORTHOGRAPHY_WORDS[x])
+        candidates.sort(key=lambda x: words[x])
         return candidates[0]
-    
+
     # Try rules without dict lookup.
-    candidates = make_candidates_from_rules(word, suffix)
-    if candidates:
-        return candidates[0]
-    
+    if expansions:
+        return expansions[0]
+
     # If all else fails then just do a simple join.
     return simple
 
+def _cached_add_suffix(word, suffix):
+    results = _get_cache().results
+    key = (word, suffix)
+    result = results.pop(key, None)
+    if result is None:
+        result = _add_suffix(word, suffix)
+        if len(results) >= SUFFIX_CACHE_SIZE:
+            results.popitem(last=False)
+    results[key] = result
+    return result
+
 def add_suffix(word, suffix):
     """Add a suffix to a word by applying the rules above
-    
+
     Arguments:
-        
+
     word -- A word
     suffix -- The suffix to add
-    
+
     """
     suffix, sep, rest = suffix.partition(' ')
-    expanded = _add_suffix(word, suffix)
+    expanded = _cached_add_suffix(word, suffix)
     return expanded + sep + rest
@@ -21,6 +21,7 @@ http://tronche.com/gui/x/xlib/input/keyboard-encoding.html
 
 """
 
+from collections import OrderedDict
 import errno
 import os
 import string
@@ -1129,6 +1130,15 @@ class KeyboardEmulation(object):
         """Prepare to emulate keyboard events."""
         self.display = display.Display()
         self.time = 0
+        # Number of custom mappings reassigned to a new keysym.
+        self.remaps = 0
+        # Number of characters sent using an already assigned custom mapping.
+        self.remap_hits = 0
+        # Number of keyboard mapping changes (not done by us) applied.
+        self.keymap_updates = 0
+        # Pending MappingNotify events for our own
+        # changes, as a dictionary of keycode to count.
+        self._own_mapping_changes = {}
         self._update_keymap()
 
     def _update_keymap(self):
@@ -1136,58 +1146,134 @@ class KeyboardEmulation(object):
         and find unused keycodes that can be used for unmapped keysyms.
         '''
         self.keymap = {}
-        self.custom_mappings_queue = []
+        # Mappings of each keycode.
+        self.keycode_mappings = {}
+        # LRU of custom mappings: the least recently used
+        # one is reassigned first when a new keysym is needed.
+        self.custom_mappings_queue = OrderedDict()
+        # Cache of character to mapping, only for the characters
+        # using a mapping of the original keymap (custom mappings
+        # can be reassigned to another character).
+        self.char_mappings = {}
+        # Cache of modifiers mask to modifiers keycodes.
+        self.modifiers_keycodes = {}
         # Analyse X11 keymap.
-        keycode = self.display.display.info.min_keycode
-        keycode_count = self.display.display.info.max_keycode - keycode + 1
-        for mapping in self.display.get_keyboard_mapping(keycode, keycode_count):
-            mapping = tuple(mapping)
-            while mapping and X.NoSymbol == mapping[-1]:
-                mapping = mapping[:-1]
-            if not mapping:
-                # Free never used before keycode.
-                custom_mapping = [X.NoSymbol] * self.CUSTOM_MAPPING_LENGTH
-                custom_mapping[-1] = self.PLOVER_MAPPING_KEYSYM
-                mapping = custom_mapping
-            elif self.CUSTOM_MAPPING_LENGTH == len(mapping) and \
-                    self.PLOVER_MAPPING_KEYSYM == mapping[-1]:
-                # Keycode was previously used by Plover.
-                custom_mapping = list(mapping)
-            else:
-                # Used keycode.
-                custom_mapping = None
-            for keysym_index, keysym in enumerate(mapping):
-                if keysym == self.PLOVER_MAPPING_KEYSYM:
-                    continue
-                if not keysym_index in (0, 1, 4, 5):
-                    continue
-                modifiers = 0
-                if 1 == (keysym_index % 2):
-                    # The keycode needs the Shift modifier.
-                    modifiers |= X.ShiftMask
-                if 4 <= keysym_index <= 5:
-                    # 3rd (AltGr) level.
-                    modifiers |= X.Mod5Mask
-                mapping = self.Mapping(keycode, modifiers, keysym, custom_mapping)
-                if keysym != X.NoSymbol:
-                    # Some keysym are mapped multiple times, prefer lower modifiers combos.
-                    previous_mapping = self.keymap.get(keysym)
-                    if previous_mapping is None or mapping.modifiers < previous_mapping.modifiers:
-                        self.keymap[keysym] = mapping
-                if custom_mapping is not None:
-                    self.custom_mappings_queue.append(mapping)
-            keycode += 1
+        min_keycode = self.display.display.info.min_keycode
+        keycode_count = self.display.display.info.max_keycode - min_keycode + 1
+        self._update_keycodes(min_keycode, keycode_count)
         log.debug('keymap:')
         for mapping in sorted(self.keymap.values(), key=lambda m: (m.keycode, m.modifiers)):
             log.debug('%s', mapping)
         log.info('%u custom mappings(s)', len(self.custom_mappings_queue))
         # Determine the backspace mapping.
+        self._update_backspace_mapping()
+        # Get modifier mapping.
+        self.modifier_mapping = self.display.get_modifier_mapping()
+
+    def _update_backspace_mapping(self):
         backspace_keysym = XK.string_to_keysym('BackSpace')
         self.backspace_mapping = self._get_mapping(backspace_keysym)
         assert self.backspace_mapping is not None
         assert self.backspace_mapping.custom_mapping is None
-        # Get modifier mapping.
-        self.modifier_mapping = self.display.get_modifier_mapping()
+
+    def _update_keycodes(self, first_keycode, count):
+        '''(Re)analyse the keymap for a range of keycodes.'''
+        # Forget about the previous mappings.
+        removed_keysyms = set()
+        for keycode in range(first_keycode, first_keycode + count):
+            for mapping in self.keycode_mappings.pop(keycode, ()):
+                self.custom_mappings_queue.pop(mapping, None)
+                if self.keymap.get(mapping.keysym) is mapping:
+                    del self.keymap[mapping.keysym]
+                    removed_keysyms.add(mapping.keysym)
+        keycode = first_keycode
+        for mapping in self.display.get_keyboard_mapping(first_keycode, count):
+            self.keycode_mappings[keycode] = self._analyse_keycode(keycode, mapping)
+            keycode += 1
+        # A removed keysym may still be available through another keycode.
+        removed_keysyms.difference_update(self.keymap)
+        if removed_keysyms:
+            for mappings in self.keycode_mappings.values():
+                for mapping in mappings:
+                    if mapping.keysym in removed_keysyms:
+                        self._add_mapping(mapping)
+
+    def _analyse_keycode(self, keycode, mapping):
+        '''Analyse a keycode X11 mapping, return the corresponding mappings.'''
+        mappings = []
+        mapping = tuple(mapping)
+        while mapping and X.NoSymbol == mapping[-1]:
+            mapping = mapping[:-1]
+        if not mapping:
+            # Free never used before keycode.
+            custom_mapping = [X.NoSymbol] * self.CUSTOM_MAPPING_LENGTH
+            custom_mapping[-1] = self.PLOVER_MAPPING_KEYSYM
+            mapping = custom_mapping
+        elif self.CUSTOM_MAPPING_LENGTH == len(mapping) and \
+                self.PLOVER_MAPPING_KEYSYM == mapping[-1]:
+            # Keycode was previously used by Plover.
+            custom_mapping = list(mapping)
+        else:
+            # Used keycode.
+            custom_mapping = None
+        for keysym_index, keysym in enumerate(mapping):
+            if keysym == self.PLOVER_MAPPING_KEYSYM:
+                continue
+            if not keysym_index in (0, 1, 4, 5):
+                continue
+            modifiers = 0
+            if 1 == (keysym_index % 2):
+                # The keycode needs the Shift modifier.
+                modifiers |= X.ShiftMask
+            if 4 <= keysym_index <= 5:
+                # 3rd (AltGr) level.
+                modifiers |= X.Mod5Mask
+            mapping = self.Mapping(keycode, modifiers, keysym, custom_mapping)
+            self._add_mapping(mapping)
+            if custom_mapping is not None:
+                self.custom_mappings_queue[mapping] = None
+            mappings.append(mapping)
+        return mappings
+
+    def _add_mapping(self, mapping):
+        if mapping.keysym == X.NoSymbol:
+            return
+        # Some keysym are mapped multiple times, prefer lower modifiers combos.
+        previous_mapping = self.keymap.get(mapping.keysym)
+        if previous_mapping is None or mapping.modifiers < previous_mapping.modifiers:
+            self.keymap[mapping.keysym] = mapping
+
+    def _process_events(self):
+        '''Handle pending events, applying keyboard mapping changes.'''
+        while self.display.pending_events():
+            event = self.display.next_event()
+            if event.type != X.MappingNotify:
+                continue
+            if event.request == X.MappingModifier:
+                self.modifier_mapping = self.display.get_modifier_mapping()
+                self.modifiers_keycodes = {}
+                continue
+            if event.request != X.MappingKeyboard:
+                continue
+            self.display.refresh_keyboard_mapping(event)
+            if event.count == 1:
+                # Ignore the notifications for our own changes,
+                # our keymap is already up-to-date.
+                pending = self._own_mapping_changes.get(event.first_keycode)
+                if pending is not None:
+                    if pending == 1:
+                        del self._own_mapping_changes[event.first_keycode]
+                    else:
+                        self._own_mapping_changes[event.first_keycode] = pending - 1
+                    continue
+            log.debug('keyboard mapping changed: %u keycode(s) from %u',
+                      event.count, event.first_keycode)
+            self.keymap_updates += 1
+            self._update_keycodes(event.first_keycode, event.count)
+            self.char_mappings = {}
+            if event.first_keycode <= self.backspace_mapping.keycode < \
+               event.first_keycode + event.count:
+                self._update_backspace_mapping()
 
     def send_backspaces(self, number_of_backspaces):
         """Emulate the given number of backspaces.
@@ -1199,11 +1285,20 @@ class KeyboardEmulation(object):
         number_of_backspace -- The number of backspaces to emulate.
 
         """
-        for x in range(number_of_backspaces):
-            self._send_keycode(self.backspace_mapping.keycode,
-                               self.backspace_mapping.modifiers)
+        self._process_events()
+        self._send_backspaces(number_of_backspaces)
         self.display.sync()
 
+    def _send_backspaces(self, number_of_backspaces):
+        if not number_of_backspaces:
+            return
+        mapping = self.backspace_mapping
+        modifiers_list = self._press_modifiers(mapping.modifiers)
+        for x in range(number_of_backspaces):
+            xtest.fake_input(self.display, X.KeyPress, mapping.keycode)
+            xtest.fake_input(self.display, X.KeyRelease, mapping.keycode)
+        self._release_modifiers(modifiers_list)
+
     def send_string(self, s):
         """Emulate the given string.
 
@@ -1214,14 +1309,63 @@ class KeyboardEmulation(object):
         s -- The string to emulate.
 
         """
+        self._process_events()
+        self._send_string(s)
+        self.display.sync()
+
+    def _send_string(self, s):
         assert isinstance(s, text_type)
+        char_mappings = self.char_mappings
+        # Modifiers are only pressed/released when they change
+        # between consecutive characters.
+        modifiers = 0
+        modifiers_list = []
+        # Keycodes used since the last sync.
+        sent_keycodes = set()
         for char in s:
-            keysym = uchr_to_keysym(char)
-            mapping = self._get_mapping(keysym)
+            mapping = char_mappings.get(char)
             if mapping is None:
-                continue
-            self._send_keycode(mapping.keycode,
-                               mapping.modifiers)
+                keysym = uchr_to_keysym(char)
+                if (keysym not in self.keymap and
+                    self.custom_mappings_queue and
+                    next(iter(self.custom_mappings_queue)).keycode in sent_keycodes):
+                    # The custom mapping about to be reassigned was already
+                    # used for this string: make sure the corresponding
+                    # events are handled before changing the keymap.
+                    self._release_modifiers(modifiers_list)
+                    modifiers = 0
+                    modifiers_list = []
+                    self.display.sync()
+                    sent_keycodes.clear()
+                mapping = self._get_mapping(keysym)
+                if mapping is None:
+                    continue
+                if mapping.custom_mapping is None:
+                    char_mappings[char] = mapping
+            if mapping.modifiers != modifiers:
+                self._release_modifiers(modifiers_list)
+                modifiers = mapping.modifiers
+                modifiers_list = self._press_modifiers(modifiers)
+            xtest.fake_input(self.display, X.KeyPress, mapping.keycode)
+            xtest.fake_input(self.display, X.KeyRelease, mapping.keycode)
+            sent_keycodes.add(mapping.keycode)
+        self._release_modifiers(modifiers_list)
+
+    def send_edit(self, number_of_backspaces, s):
+        """Emulate backspaces followed by a string, with a single sync.
+
+        The emulated events are not detected by KeyboardCapture.
+
+        Arguments:
+
+        number_of_backspace -- The number of backspaces to emulate.
+
+        s -- The string to emulate.
+
+        """
+        self._process_events()
+        self._send_backspaces(number_of_backspaces)
+        self._send_string(s)
         self.display.sync()
 
     def send_key_combination(self, combo_string):
@@ -1246,6 +1390,11 @@ class KeyboardEmulation(object):
         and release the Tab key, and then release the left Alt key.
 
         """
+        self._process_events()
+        self._send_key_combination(combo_string)
+        self.display.sync()
+
+    def _send_key_combination(self, combo_string):
         # Parse and validate combo.
         key_events = [
             (keycode, X.KeyPress if pressed else X.KeyRelease) for keycode, pressed
@@ -1254,6 +1403,25 @@ class KeyboardEmulation(object):
         # Emulate the key combination by sending key events.
         for keycode, event_type in key_events:
             xtest.fake_input(self.display, event_type, keycode)
+
+    def send_actions(self, actions):
+        """Emulate a sequence of edits and key combinations, with a single
+        sync.
+
+        Arguments:
+
+        actions -- A list of ('edit', number_of_backspaces, string) and
+        ('combo', combo_string) tuples (see send_edit and
+        send_key_combination).
+
+        """
+        self._process_events()
+        for action in actions:
+            if action[0] == 'edit':
+                self._send_backspaces(action[1])
+                self._send_string(action[2])
+            else:
+                self._send_key_combination(action[1])
         self.display.sync()
 
     def _send_keycode(self, keycode, modifiers=0):
@@ -1268,18 +1436,28 @@ class KeyboardEmulation(object):
         Control, and Alt.
 
         """
-        modifiers_list = [
-            self.modifier_mapping[n][0]
-            for n in range(8)
-            if (modifiers & (1 << n))
-        ]
         # Press modifiers.
-        for mod_keycode in modifiers_list:
-            xtest.fake_input(self.display, X.KeyPress, mod_keycode)
+        modifiers_list = self._press_modifiers(modifiers)
         # Press and release the base key.
         xtest.fake_input(self.display, X.KeyPress, keycode)
         xtest.fake_input(self.display, X.KeyRelease, keycode)
         # Release modifiers.
+        self._release_modifiers(modifiers_list)
+
+    def _press_modifiers(self, modifiers):
+        """Press the keys for a modifiers mask, return their keycodes."""
+        modifiers_list = self.modifiers_keycodes.get(modifiers)
+        if modifiers_list is None:
+            modifiers_list = self.modifiers_keycodes[modifiers] = [
+                self.modifier_mapping[n][0]
+                for n in range(8)
+                if (modifiers & (1 << n))
+            ]
+        for mod_keycode in modifiers_list:
+            xtest.fake_input(self.display, X.KeyPress, mod_keycode)
+        return modifiers_list
+
+    def _release_modifiers(self, modifiers_list):
         for mod_keycode in reversed(modifiers_list):
             xtest.fake_input(self.display, X.KeyRelease, mod_keycode)
 
@@ -1319,25 +1497,29 @@ class KeyboardEmulation(object):
             if 0 == len(self.custom_mappings_queue):
                 # Nope...
                 return None
-            mapping = self.custom_mappings_queue.pop(0)
+            mapping = self.custom_mappings_queue.popitem(last=False)[0]
             previous_keysym = mapping.keysym
-            keysym_index = mapping.custom_mapping.index(previous_keysym)
+            keysym_index = 1 if mapping.modifiers & X.ShiftMask else 0
             # Update X11 keymap.
             mapping.custom_mapping[keysym_index] = keysym
             self.display.change_keyboard_mapping(mapping.keycode, [mapping.custom_mapping])
+            self._own_mapping_changes[mapping.keycode] = \
+                self._own_mapping_changes.get(mapping.keycode, 0) + 1
+            self.remaps += 1
             # Update our keymap.
-            if previous_keysym in self.keymap:
+            if self.keymap.get(previous_keysym) is mapping:
                 del self.keymap[previous_keysym]
             mapping.keysym = keysym
             self.keymap[keysym] = mapping
             log.debug(u'new mapping: %s', mapping)
             # Move custom mapping back at the end of
             # the queue so we don't use it too soon.
-            self.custom_mappings_queue.append(mapping)
+            self.custom_mappings_queue[mapping] = None
         elif mapping.custom_mapping is not None:
             # Same as above; prevent mapping
             # from being reused to soon.
-            self.custom_mappings_queue.remove(mapping)
-            self.custom_mappings_queue.append(mapping)
+            del self.custom_mappings_queue[mapping]
+            self.custom_mappings_queue[mapping] = None
+            self.remap_hits += 1
         return mapping
 
@@ -0,0 +1,58 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""A dedicated thread for sending output."""
+
+import threading
+
+from six.moves import queue
+
+from plover import log
+
+
+class OutputWorker(threading.Thread):
+    """Run output calls in order, on a dedicated thread.
+
+    This way, the output is not delayed when the GUI thread is busy.
+    The OS layer output object can be created by the worker (see
+    submit), so it is only ever used from this thread.
+
+    """
+
+    def __init__(self):
+        threading.Thread.__init__(self, name='OutputWorker')
+        self.daemon = True
+        self._queue = queue.Queue()
+        # Maximum number of calls waiting in the queue.
+        self.max_depth = 0
+
+    @property
+    def depth(self):
+        """Number of calls waiting in the queue."""
+        return self._queue.qsize()
+
+    def submit(self, fn, *args):
+        """Queue a call, calls are run in order."""
+        self._queue.put((fn, args))
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def stop(self):
+        """Stop the worker once all pending calls have been run."""
+        self._queue.put(None)
+        if self.is_alive():
+            self.join()
+        log.debug('output worker stopped, maximum queue depth: %u',
+                  self.max_depth)
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            fn, args = item
+            try:
+                fn(*args)
+            except Exception:
+                log.error('output failed', exc_info=True)
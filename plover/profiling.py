@@ -0,0 +1,40 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Profiling of the stroke processing path."""
+
+import cProfile
+import pstats
+
+from six import StringIO
+
+
+class StrokeProfiler(object):
+    """A cProfile profiler only enabled while a stroke is processed.
+
+    This way, the GUI idle time (or the time spent waiting for the next
+    stroke) does not drown out the results.
+
+    """
+
+    def __init__(self):
+        self.profile = cProfile.Profile()
+        self.strokes = 0
+
+    def enable(self):
+        self.strokes += 1
+        self.profile.enable()
+
+    def disable(self):
+        self.profile.disable()
+
+    def dump(self, filename):
+        """Save the profile data (loadable with pstats, snakeviz, ...)."""
+        self.profile.dump_stats(filename)
+
+    def summary(self, limit=20, sort='cumulative'):
+        """Return a text summary of the top functions."""
+        stream = StringIO()
+        stats = pstats.Stats(self.profile, stream=stream)
+        stats.sort_stats(sort).print_stats(limit)
+        return 'profile of %u strokes\n%s' % (self.strokes, stream.getvalue())
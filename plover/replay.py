@@ -0,0 +1,274 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Replay stroke logs through a headless engine.
+
+Stroke logs (and their rotated backups) are parsed back into strokes,
+which are then fed to a headless engine, either as fast as possible or
+with the original timing. The translated output, per-stage latency
+histograms and the strokes exceeding the latency budget are reported.
+
+Usage:
+
+    python -m plover.replay [-d DICTIONARY]... [--timing original]
+                            [--budget MS] STROKE_LOG...
+
+"""
+
+# Python 2/3 compatibility.
+from __future__ import print_function
+
+import argparse
+import calendar
+import collections
+import json
+import os
+import re
+import sys
+import time
+
+from plover.config import CONFIG_FILE, Config
+from plover.dictionary.loading_manager import manager as dict_manager
+from plover.headless import CaptureOutput, create_engine, send_keys
+from plover.latency import Histogram, clock
+from plover.log import LOG_COUNT
+from plover.steno import Stroke
+from plover import system
+
+
+STROKE_LOG_RX = re.compile(r'^(?P<date>\d{4}-\d\d-\d\d \d\d:\d\d:\d\d),(?P<msecs>\d{3}) '
+                           r'\*?Stroke\((?P<rtfcre>.*) : \[(?P<keys>.*)\]\)\s*$')
+STENO_KEY_RX = re.compile(r'''u?(['"])(.*?)\1''')
+
+LoggedStroke = collections.namedtuple('LoggedStroke', 'timestamp rtfcre keys')
+
+
+def stroke_log_files(filename, backups=True):
+    """Return the list of files for a stroke log, oldest first.
+
+    The rotated backups (filename.9, ..., filename.1) are included if
+    backups is true and they exist.
+
+    """
+    files = []
+    if backups:
+        for n in range(LOG_COUNT, 0, -1):
+            backup = '%s.%u' % (filename, n)
+            if os.path.exists(backup):
+                files.append(backup)
+    files.append(filename)
+    return files
+
+
+def _steno_keys(logged_keys):
+    # Logged strokes use the keys after the number key conversion
+    # (e.g. '1-' instead of '#' and 'S-'), so undo it.
+    numbers = dict((v, k) for k, v in system.NUMBERS.items())
+    keys = []
+    for key in logged_keys:
+        if key in numbers:
+            if system.NUMBER_KEY not in keys:
+                keys.append(system.NUMBER_KEY)
+            key = numbers[key]
+        keys.append(key)
+    return keys
+
+
+def parse_stroke_log(lines):
+    """Parse stroke log lines, yielding a LoggedStroke for each stroke.
+
+    Other lines (e.g. translations) are ignored.
+
+    """
+    for line in lines:
+        m = STROKE_LOG_RX.match(line)
+        if m is None:
+            continue
+        timestamp = calendar.timegm(time.strptime(m.group('date'),
+                                                  '%Y-%m-%d %H:%M:%S'))
+        timestamp += int(m.group('msecs')) / 1000.0
+        logged_keys = [k[1] for k in STENO_KEY_RX.findall(m.group('keys'))]
+        yield LoggedStroke(timestamp, m.group('rtfcre'), _steno_keys(logged_keys))
+
+
+def load_stroke_logs(filenames, backups=True):
+    """Load strokes from a list of stroke logs."""
+    strokes = []
+    for filename in filenames:
+        for f in stroke_log_files(filename, backups=backups):
+            with open(f) as fp:
+                strokes.extend(parse_stroke_log(fp))
+    return strokes
+
+
+class TimedOutput(object):
+    """Capture output, recording the time spent sending it."""
+
+    def __init__(self, output, monitor=None):
+        self.output = output
+        self.monitor = monitor
+
+    def _timed(name):
+        def send(self, arg):
+            start = clock()
+            getattr(self.output, name)(arg)
+            if self.monitor is not None:
+                self.monitor.add('send', clock() - start)
+        send.__name__ = name
+        return send
+
+    send_backspaces = _timed('send_backspaces')
+    send_string = _timed('send_string')
+    send_key_combination = _timed('send_key_combination')
+    send_engine_command = _timed('send_engine_command')
+
+    del _timed
+
+
+class Replayer(object):
+    """Replay strokes through a headless engine, timing each stage.
+
+    The engine latency monitoring is enabled, see plover.latency.STAGES
+    for the list of stages ('decode' is not available, since there is no
+    machine).
+
+    """
+
+    def __init__(self, dicts, space_placement='Before Output', ime=False):
+        self.output = CaptureOutput()
+        timed_output = TimedOutput(self.output)
+        self.engine = create_engine(dicts, space_placement=space_placement,
+                                    ime=ime, output=timed_output)
+        self.engine.enable_latency_monitoring(True)
+        self.monitor = timed_output.monitor = self.engine.get_latency_monitor()
+        self.histograms = self.monitor.histograms
+        # List of (stroke, latency) over budget.
+        self.over_budget = []
+
+    def send(self, stroke, budget=None):
+        """Send a single LoggedStroke, returns its latency."""
+        start = clock()
+        send_keys(self.engine, stroke.keys)
+        latency = clock() - start
+        if budget is not None and latency > budget:
+            self.over_budget.append((stroke, latency))
+        return latency
+
+    def replay(self, strokes, budget=None, original_timing=False, speed=1.0):
+        """Replay a list of LoggedStroke.
+
+        If original_timing is true, the original delay between strokes
+        is reproduced (divided by speed).
+
+        """
+        if not strokes:
+            return
+        first_timestamp = strokes[0].timestamp
+        start = time.time()
+        for stroke in strokes:
+            if original_timing:
+                delay = (stroke.timestamp - first_timestamp) / speed
+                wait = start + delay - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+            self.send(stroke, budget=budget)
+
+
+def _config_dictionaries():
+    config = Config()
+    if os.path.exists(CONFIG_FILE):
+        with open(CONFIG_FILE, 'rb') as f:
+            config.load(f)
+    return config.get_dictionary_file_names(), config.get_space_placement()
+
+
+def _format_us(duration):
+    if duration is None:
+        return '-'
+    return '%.1f' % (duration * 1e6)
+
+
+def main():
+    """Replay stroke logs."""
+    description = 'Replay Plover stroke logs through a headless engine.'
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('stroke_log', nargs='+',
+                        help='stroke log file (rotated backups are included)')
+    parser.add_argument('-d', '--dictionary', action='append', default=None,
+                        help='dictionary to use, highest priority first '
+                        '(default: the dictionaries from the configuration)')
+    parser.add_argument('--no-backups', action='store_true',
+                        help='do not include the rotated backups')
+    parser.add_argument('--timing', choices=('fast', 'original'), default='fast',
+                        help='replay as fast as possible, or with the original '
+                        'delay between strokes')
+    parser.add_argument('--speed', type=float, default=1.0,
+                        help='speed factor when using the original timing')
+    parser.add_argument('-b', '--budget', type=float, default=20.0,
+                        help='latency budget per stroke, in milliseconds')
+    parser.add_argument('-s', '--spaces', choices=('before', 'after'), default=None,
+                        help='space placement (default: from the configuration)')
+    parser.add_argument('--ime', action='store_true',
+                        help='enable the IME possible continuations lookup')
+    parser.add_argument('-q', '--quiet', action='store_true',
+                        help='do not print the translated output')
+    parser.add_argument('-o', '--output', default=None,
+                        help='save the results to this JSON file')
+    args = parser.parse_args(args=sys.argv[1:])
+
+    dictionaries, space_placement = _config_dictionaries()
+    if args.dictionary is not None:
+        dictionaries = args.dictionary
+    if args.spaces is not None:
+        space_placement = '%s Output' % args.spaces.capitalize()
+    strokes = load_stroke_logs(args.stroke_log, backups=not args.no_backups)
+    mismatches = [s for s in strokes if Stroke(s.keys).rtfcre != s.rtfcre]
+    if mismatches:
+        print('warning: %u strokes do not match the current system, first: %s'
+              % (len(mismatches), mismatches[0].rtfcre), file=sys.stderr)
+
+    replayer = Replayer(dict_manager.load(dictionaries),
+                        space_placement=space_placement, ime=args.ime)
+    budget = args.budget / 1000.0
+    replayer.replay(strokes, budget=budget,
+                    original_timing=args.timing == 'original',
+                    speed=args.speed)
+
+    if not args.quiet:
+        print(replayer.output.text)
+        print()
+    print('%u strokes replayed' % len(strokes))
+    print('%-10s %8s %10s %10s %10s %10s %10s' % ('stage (us)', 'count', 'mean',
+                                                  'p50', 'p90', 'p99', 'max'))
+    for stage, histogram in replayer.histograms.items():
+        summary = histogram.summary()
+        print('%-10s %8u %10s %10s %10s %10s %10s' % (
+            stage, summary['count'], _format_us(summary['mean']),
+            _format_us(summary['p50']), _format_us(summary['p90']),
+            _format_us(summary['p99']), _format_us(summary['max'])))
+    print('%u strokes over the %gms budget' % (len(replayer.over_budget),
+                                                 args.budget))
+    for stroke, latency in replayer.over_budget:
+        print('  %s %-20s %10.1fms' % (
+            time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(stroke.timestamp)),
+            stroke.rtfcre, latency * 1000))
+
+    if args.output is not None:
+        report = {
+            'strokes': len(strokes),
+            'output': replayer.output.text,
+            'budget_ms': args.budget,
+            'stages': dict((stage, histogram.summary())
+                           for stage, histogram in replayer.histograms.items()),
+            'histograms': dict((stage, histogram.counts)
+                               for stage, histogram in replayer.histograms.items()),
+            'buckets': list(Histogram().buckets),
+            'over_budget': [(stroke.timestamp, stroke.rtfcre, latency)
+                            for stroke, latency in replayer.over_budget],
+        }
+        with open(args.output, 'w') as fp:
+            json.dump(report, fp, indent=2, sort_keys=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Timing of the application startup phases."""
+
+from plover.latency import clock
+
+
+class StartupTimer(object):
+    """Record the duration of consecutive startup phases.
+
+    Each call to mark ends the current phase (started at the previous
+    mark, or when the timer was created). Once the report is done, marks
+    are ignored, so code shared with later reconfigurations (e.g.
+    plover.app.update_engine) can mark phases unconditionally.
+
+    """
+
+    def __init__(self):
+        self.start = self.last = clock()
+        self.phases = []
+        self.finished = False
+
+    def mark(self, name):
+        if self.finished:
+            return
+        now = clock()
+        self.phases.append((name, now - self.last))
+        self.last = now
+
+    @property
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        """Finish timing, and return a summary of the phases."""
+        self.finished = True
+        phases = ', '.join('%s: %.0fms' % (name, duration * 1000)
+                           for name, duration in self.phases)
+        return 'startup took %.0fms (%s)' % (self.total * 1000, phases)
+
+
+# Started on first import (i.e. by plover.main).
+startup_timer = StartupTimer()
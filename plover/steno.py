@@ -9,8 +9,16 @@ This module contains the following class:
 
 Stroke -- A data model class that encapsulates a sequence of steno keys.
 
+Use stroke_from_keys to get a shared (cached) stroke instead of creating a
+new one.
+
+Strokes can also be represented as integer bitmasks, with one bit per steno
+key in system.KEY_ORDER (see keys_to_mask, mask_to_rtfcre and
+rtfcre_to_mask).
+
 """
 
+import collections
 import re
 
 from plover import system
@@ -21,7 +29,69 @@ STROKE_DELIMITER = '/'
 _NUMBERS = set('0123456789')
 _IMPLICIT_NUMBER_RX = re.compile('(^|[1-4])([6-9])')
 
+# Maximum number of shared strokes (the least recently used are evicted
+# first).
+STROKE_CACHE_SIZE = 10000
+# Maximum number of normalized strokes (the cache is cleared when full).
+NORMALIZED_STROKE_CACHE_SIZE = 200000
+# Maximum number of RTF/CRE strokes kept in the bitmasks cache (the least
+# recently converted are evicted first).
+MASK_CACHE_SIZE = 200000
+
+
+class _SystemCaches(object):
+    """Tables and caches for the current system."""
+
+    def __init__(self):
+        self.keys = system.KEYS
+        number_keys = set(system.NUMBERS.values())
+        number_mask = 1 << system.KEY_ORDER[system.NUMBER_KEY]
+        # Key -> bitmask.
+        self.key_masks = {}
+        for key, order in system.KEY_ORDER.items():
+            mask = 1 << order
+            if key in number_keys:
+                mask |= number_mask
+            self.key_masks[key] = mask
+        # Bitmask -> RTF/CRE.
+        self.rtfcre = {}
+        # RTF/CRE -> bitmask (LRU).
+        self.masks = collections.OrderedDict()
+        # Keys -> shared Stroke (LRU).
+        self.strokes = collections.OrderedDict()
+        # Stroke -> normalized stroke.
+        self.normalized = {}
+        # Normalized stroke -> the same, shared string.
+        self.interned = {}
+
+_system_caches = None
+
+def _get_caches():
+    global _system_caches
+    caches = _system_caches
+    if caches is None or caches.keys is not system.KEYS:
+        caches = _system_caches = _SystemCaches()
+    return caches
+
 def normalize_stroke(stroke):
+    """Convert a steno stroke to its normalized form.
+
+    Results are cached, and identical normalized strokes share the same
+    string.
+
+    """
+    caches = _get_caches()
+    normalized = caches.normalized.get(stroke)
+    if normalized is None:
+        if len(caches.normalized) >= NORMALIZED_STROKE_CACHE_SIZE:
+            caches.normalized.clear()
+            caches.interned.clear()
+        normalized = _normalize_stroke(stroke)
+        normalized = caches.interned.setdefault(normalized, normalized)
+        caches.normalized[stroke] = normalized
+    return normalized
+
+def _normalize_stroke(stroke):
     letters = set(stroke)
     if letters & _NUMBERS:
         if system.NUMBER_KEY in letters:
@@ -40,8 +110,161 @@ def normalize_stroke(stroke):
 
 def normalize_steno(strokes_string):
     """Convert steno strings to one common form."""
-    return tuple(normalize_stroke(stroke) for stroke
-                 in strokes_string.split(STROKE_DELIMITER))
+    strokes = strokes_string.split(STROKE_DELIMITER)
+    normalized = tuple(map(_get_caches().normalized.get, strokes))
+    if None in normalized:
+        normalized = tuple(normalize_stroke(stroke) for stroke in strokes)
+    return normalized
+
+def normalize_steno_batch(strokes_strings):
+    """Normalize an iterable of steno strings, like normalize_steno.
+
+    Yield the normalized keys, in order. This is faster than calling
+    normalize_steno for each steno string, and is meant for loading
+    dictionaries: the same strokes share the same strings.
+
+    """
+    cached = _get_caches().normalized.get
+    for strokes_string in strokes_strings:
+        strokes = strokes_string.split(STROKE_DELIMITER)
+        normalized = tuple(map(cached, strokes))
+        if None in normalized:
+            normalized = tuple(normalize_stroke(stroke) for stroke in strokes)
+        yield normalized
+
+def stroke_to_keys(stroke):
+    """Convert a normalized RTF/CRE stroke back to a list of steno keys.
+
+    This is the reverse of what Stroke does with its steno keys, e.g.
+    'STKPW-FR' gives ['S-', 'T-', 'K-', 'P-', 'W-', '-F', '-R'] and
+    '1-9' gives ['S-', '-T', '#'].
+
+    Raises ValueError if the stroke cannot be parsed.
+
+    """
+    keys = []
+    numeral = False
+    index = 0
+    for letter in stroke:
+        if letter == '-':
+            # Jump to the right side of the keyboard.
+            while index < len(system.KEYS) and not system.KEYS[index].startswith('-'):
+                index += 1
+            continue
+        while index < len(system.KEYS):
+            key = system.KEYS[index]
+            index += 1
+            if letter in _NUMBERS:
+                if system.NUMBERS.get(key, '').strip('-') == letter:
+                    keys.append(key)
+                    numeral = True
+                    break
+            elif key.strip('-') == letter:
+                keys.append(key)
+                break
+        else:
+            raise ValueError('invalid stroke: %r' % stroke)
+    if numeral and system.NUMBER_KEY not in keys:
+        keys.append(system.NUMBER_KEY)
+    return keys
+
+
+def key_mask(key):
+    """Return the bitmask of a single steno key."""
+    return _get_caches().key_masks[key]
+
+def keys_to_mask(steno_keys):
+    """Convert steno keys to a stroke bitmask.
+
+    Returns None if one of the keys is not a valid steno key.
+
+    """
+    key_masks = _get_caches().key_masks
+    mask = 0
+    for key in steno_keys:
+        key_mask = key_masks.get(key)
+        if key_mask is None:
+            return None
+        mask |= key_mask
+    return mask
+
+def mask_to_keys(mask):
+    """Convert a stroke bitmask to the list of steno keys, in order."""
+    return [key for order, key in enumerate(system.KEYS) if mask & (1 << order)]
+
+def mask_to_rtfcre(mask):
+    """Convert a stroke bitmask to its RTF/CRE string."""
+    cache = _get_caches().rtfcre
+    rtfcre = cache.get(mask)
+    if rtfcre is None:
+        rtfcre = cache[mask] = _normalize_keys(mask_to_keys(mask))[1]
+    return rtfcre
+
+def rtfcre_to_mask(rtfcre):
+    """Convert a normalized RTF/CRE stroke to a bitmask.
+
+    Returns None if the stroke is not a valid steno stroke, or is not
+    normalized (so converting the bitmask back gives the same string).
+
+    """
+    cache = _get_caches().masks
+    try:
+        mask = cache.pop(rtfcre)
+    except KeyError:
+        try:
+            mask = keys_to_mask(stroke_to_keys(rtfcre))
+        except ValueError:
+            mask = None
+        if mask is not None and mask_to_rtfcre(mask) != rtfcre:
+            mask = None
+        if len(cache) >= MASK_CACHE_SIZE:
+            cache.popitem(last=False)
+    cache[rtfcre] = mask
+    return mask
+
+def steno_to_masks(strokes):
+    """Convert a sequence of normalized RTF/CRE strokes to bitmasks.
+
+    Returns a tuple, or None if one of the strokes cannot be converted (see
+    rtfcre_to_mask).
+
+    """
+    masks = tuple(map(_get_caches().masks.get, strokes))
+    if None in masks:
+        masks = tuple(map(rtfcre_to_mask, strokes))
+        if None in masks:
+            return None
+    return masks
+
+def _normalize_keys(steno_keys):
+    """Return the ordered steno keys (with numbers), and the RTF/CRE string."""
+    # Remove duplicate keys and save local versions of the input
+    # parameters.
+    steno_keys_set = set(steno_keys)
+    steno_keys = list(steno_keys_set)
+
+    # Order the steno keys so comparisons can be made.
+    steno_keys.sort(key=lambda x: system.KEY_ORDER.get(x, -1))
+
+    # Convert strokes involving the number bar to numbers.
+    if system.NUMBER_KEY in steno_keys:
+        numeral = False
+        for i, e in enumerate(steno_keys):
+            if e in system.NUMBERS:
+                steno_keys[i] = system.NUMBERS[e]
+                numeral = True
+        if numeral:
+            steno_keys.remove(system.NUMBER_KEY)
+
+    if steno_keys_set & system.IMPLICIT_HYPHEN_KEYS:
+        rtfcre = ''.join(key.strip('-') for key in steno_keys)
+    else:
+        pre = ''.join(k.strip('-') for k in steno_keys if k[-1] == '-' or
+                      k == system.NUMBER_KEY)
+        post = ''.join(k.strip('-') for k in steno_keys if k[0] == '-')
+        rtfcre = '-'.join([pre, post]) if post else pre
+
+    return steno_keys, rtfcre
 
 
 class Stroke(object):
@@ -57,6 +280,8 @@ class Stroke(object):
 
     """
 
+    __slots__ = ('steno_keys', 'rtfcre', 'is_correction', '_mask')
+
     def __init__(self, steno_keys) :
         """Create a steno stroke by formatting steno keys.
 
@@ -65,47 +290,35 @@ class Stroke(object):
         steno_keys -- A sequence of pressed keys.
 
         """
-        # Remove duplicate keys and save local versions of the input 
-        # parameters.
-        steno_keys_set = set(steno_keys)
-        steno_keys = list(steno_keys_set)
-
-        # Order the steno keys so comparisons can be made.
-        steno_keys.sort(key=lambda x: system.KEY_ORDER.get(x, -1))
-         
-        # Convert strokes involving the number bar to numbers.
-        if system.NUMBER_KEY in steno_keys:
-            numeral = False
-            for i, e in enumerate(steno_keys):
-                if e in system.NUMBERS:
-                    steno_keys[i] = system.NUMBERS[e]
-                    numeral = True
-            if numeral:
-                steno_keys.remove(system.NUMBER_KEY)
-        
-        if steno_keys_set & system.IMPLICIT_HYPHEN_KEYS:
-            self.rtfcre = ''.join(key.strip('-') for key in steno_keys)
-        else:
-            pre = ''.join(k.strip('-') for k in steno_keys if k[-1] == '-' or 
-                          k == system.NUMBER_KEY)
-            post = ''.join(k.strip('-') for k in steno_keys if k[0] == '-')
-            self.rtfcre = '-'.join([pre, post]) if post else pre
-
+        steno_keys, rtfcre = _normalize_keys(steno_keys)
         self.steno_keys = steno_keys
+        self.rtfcre = rtfcre
 
         # Determine if this stroke is a correction stroke.
         self.is_correction = (self.rtfcre == system.UNDO_STROKE_STENO)
 
+    @property
+    def mask(self):
+        """The stroke bitmask, or None if the stroke cannot be represented as
+        a bitmask (see rtfcre_to_mask)."""
+        try:
+            return self._mask
+        except AttributeError:
+            # Computed on first use.
+            mask = self._mask = rtfcre_to_mask(self.rtfcre)
+            return mask
+
     def __str__(self):
         if self.is_correction:
             prefix = '*'
         else:
             prefix = ''
-        return '%sStroke(%s : %s)' % (prefix, self.rtfcre, self.steno_keys)
+        return '%sStroke(%s : %s)' % (prefix, self.rtfcre, list(self.steno_keys))
 
     def __eq__(self, other):
+        # Note: shared strokes keys are tuples.
         return (isinstance(other, Stroke)
-                and self.steno_keys == other.steno_keys)
+                and tuple(self.steno_keys) == tuple(other.steno_keys))
 
     def __ne__(self, other):
         return not self.__eq__(other)
@@ -113,3 +326,41 @@ class Stroke(object):
     def __repr__(self):
         return str(self)
 
+
+class _SharedStroke(Stroke):
+    """An immutable stroke, shared through the stroke cache.
+
+    Its steno keys are a tuple, so they cannot be modified in place either.
+
+    """
+
+    __slots__ = ()
+
+    def __init__(self, stroke):
+        object.__setattr__(self, 'steno_keys', tuple(stroke.steno_keys))
+        for name in ('rtfcre', 'is_correction'):
+            object.__setattr__(self, name, getattr(stroke, name))
+        object.__setattr__(self, '_mask', stroke.mask)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('shared strokes cannot be modified')
+
+
+def stroke_from_keys(steno_keys):
+    """Return the stroke for the pressed steno keys.
+
+    Same as Stroke(steno_keys), but the returned stroke is shared with
+    other calls for the same keys, and cannot be modified (its steno keys
+    are a tuple).
+
+    """
+    cache = _get_caches().strokes
+    cache_key = frozenset(steno_keys)
+    stroke = cache.pop(cache_key, None)
+    if stroke is None:
+        stroke = _SharedStroke(Stroke(cache_key))
+        if len(cache) >= STROKE_CACHE_SIZE:
+            cache.popitem(last=False)
+    cache[cache_key] = stroke
+    return stroke
+
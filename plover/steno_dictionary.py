@@ -9,6 +9,19 @@ A steno dictionary maps sequences of steno strokes to translations.
 
 import collections
 import csv
+import sys
+
+from six import integer_types, iteritems
+
+from plover.steno import mask_to_rtfcre, steno_to_masks
+
+
+def _unpack_key(masks):
+    return tuple(mask_to_rtfcre(mask) for mask in masks)
+
+def _is_packed(key):
+    return bool(key) and isinstance(key[0], integer_types)
+
 
 class StenoDictionary(collections.MutableMapping):
     """A steno dictionary.
@@ -16,13 +29,28 @@ class StenoDictionary(collections.MutableMapping):
     This dictionary maps immutable sequences to translations and tracks the
     length of the longest key.
 
+    Keys can optionally be stored as integers (see set_int_keys): the
+    strokes of a key are converted to bitmasks, which take less memory (the
+    same stroke is always the same int object) and are cheaper to hash
+    than strings. Keys with strokes that cannot be represented as bitmasks
+    are stored as is.
+
+    In compact mode (see set_storage), identical translations share the
+    same string, and the reverse lookup tables only use a list (or a set)
+    when there are several entries for the same translation.
+
     Attributes:
     longest_key -- A read only property holding the length of the longest key.
     save -- If set, is a function that will save this dictionary.
+    int_keys -- True if keys are stored as tuples of integers.
+    compact -- True if using the compact storage.
 
     """
     def __init__(self, *args, **kw):
         self._dict = {}
+        self._str_dict = {}
+        self.int_keys = False
+        self.compact = False
         self._longest_key_length = 0
         self._longest_listener_callbacks = set()
         self.reverse = collections.defaultdict(list)
@@ -38,30 +66,206 @@ class StenoDictionary(collections.MutableMapping):
         return self._longest_key
 
     def __len__(self):
-        return self._dict.__len__()
+        return self._dict.__len__() + self._str_dict.__len__()
         
     def __iter__(self):
-        return self._dict.__iter__()
+        if not self.int_keys:
+            return self._dict.__iter__()
+        return self._iter_int_keys()
+
+    def _iter_int_keys(self):
+        for packed in self._dict:
+            yield _unpack_key(packed)
+        for key in self._str_dict:
+            yield key
+
+    def _storage(self, key):
+        """Return the storage dictionary and the stored key for <key>."""
+        if self.int_keys:
+            packed = steno_to_masks(key)
+            if packed is not None:
+                return self._dict, packed
+            return self._str_dict, key
+        return self._dict, key
 
     def __getitem__(self, key):
-        return self._dict.__getitem__(key)
+        if not self.int_keys:
+            return self._dict.__getitem__(key)
+        storage, stored_key = self._storage(key)
+        return storage[stored_key]
+
+    def get_masks(self, masks):
+        """Lookup a key given as a sequence of stroke bitmasks.
+
+        Returns None if there is no entry for the key.
+
+        """
+        if self.int_keys:
+            return self._dict.get(tuple(masks))
+        return self._dict.get(tuple(mask_to_rtfcre(mask) for mask in masks))
 
     def __setitem__(self, key, value):
         self._longest_key = max(self._longest_key, len(key))
-        self._dict[key] = value
-        self.reverse[value].append(key)
-        # Case-insensitive reverse dict
-        self.casereverse[value.lower()].add(value)
+        storage, stored_key = self._storage(key)
+        storage[stored_key] = value
+        if not self.compact:
+            self.reverse[value].append(stored_key)
+            # Case-insensitive reverse dict
+            self.casereverse[value.lower()].add(value)
+            return
+        keys = self.reverse.get(value)
+        if keys is None:
+            self.reverse[value] = stored_key
+        elif isinstance(keys, list):
+            keys.append(stored_key)
+        else:
+            self.reverse[value] = [keys, stored_key]
+        lowercase = value.lower()
+        if lowercase == value:
+            lowercase = value
+        values = self.casereverse.get(lowercase)
+        if values is None:
+            self.casereverse[lowercase] = value
+        elif isinstance(values, set):
+            values.add(value)
+        elif values != value:
+            self.casereverse[lowercase] = set((values, value))
 
     def __delitem__(self, key):
-        value = self._dict.pop(key)
-        self.reverse[value].remove(key)
+        storage, stored_key = self._storage(key)
+        value = storage.pop(stored_key)
+        if not self.compact:
+            self.reverse[value].remove(stored_key)
+        else:
+            keys = self.reverse[value]
+            if not isinstance(keys, list):
+                del self.reverse[value]
+            else:
+                keys.remove(stored_key)
+                if len(keys) == 1:
+                    self.reverse[value] = keys[0]
         if len(key) == self.longest_key:
-            if self._dict:
-                self._longest_key = max(len(x) for x in self._dict)
+            if self._dict or self._str_dict:
+                self._longest_key = max(self._key_lengths())
             else:
                 self._longest_key = 0
 
+    def _key_lengths(self):
+        for storage in (self._dict, self._str_dict):
+            for key in storage:
+                yield len(key)
+
+    def reverse_lookup(self, value):
+        """Return the list of keys with the translation <value>."""
+        keys = self.reverse.get(value)
+        if keys is None:
+            return []
+        if self.compact and not isinstance(keys, list):
+            keys = [keys]
+        if not self.int_keys:
+            return list(keys)
+        return [_unpack_key(k) if _is_packed(k) else k for k in keys]
+
+    def continuations(self, key):
+        """Return the entries continuing <key>, as (key, translation) pairs.
+
+        That is, the entries with a longer key starting with the strokes
+        of <key>.
+
+        """
+        key = tuple(key)
+        key_len = len(key)
+        if not self.int_keys:
+            return [(k, v) for k, v in iteritems(self._dict)
+                    if len(k) > key_len and k[:key_len] == key]
+        entries = []
+        masks = steno_to_masks(key)
+        if masks is not None:
+            entries.extend((_unpack_key(k), v)
+                           for k, v in iteritems(self._dict)
+                           if len(k) > key_len and k[:key_len] == masks)
+        entries.extend((k, v) for k, v in iteritems(self._str_dict)
+                       if len(k) > key_len and k[:key_len] == key)
+        return entries
+
+    def casereverse_lookup(self, value):
+        """Return the set of translations with the lowercase form <value>."""
+        values = self.casereverse.get(value)
+        if values is None or isinstance(values, set):
+            return values
+        return set((values,))
+
+    def set_int_keys(self, enabled):
+        """Switch between string keys and integer keys storage."""
+        self.set_storage(enabled, self.compact)
+
+    def set_storage(self, int_keys=False, compact=False):
+        """Change how the entries are stored.
+
+        Arguments:
+
+        int_keys -- Store keys as tuples of integers.
+
+        compact -- Use the compact storage.
+
+        """
+        if int_keys == self.int_keys and compact == self.compact:
+            return
+        # Fill new tables, and only then switch to them, so lookups still
+        # work in the meantime.
+        new = StenoDictionary()
+        new.int_keys = int_keys
+        new.compact = compact
+        if compact:
+            new.reverse = {}
+            new.casereverse = {}
+            translations = {}
+            for key, value in self.items():
+                new[key] = translations.setdefault(value, value)
+        else:
+            for key, value in self.items():
+                new[key] = value
+        self._dict = new._dict
+        self._str_dict = new._str_dict
+        self.reverse = new.reverse
+        self.casereverse = new.casereverse
+        self.int_keys = int_keys
+        self.compact = compact
+
+    def memory_usage(self):
+        """Return an estimate of the memory used by the entries, in bytes.
+
+        Returns a dictionary with the size of the entries tables, the keys,
+        the translations, the reverse lookup tables, and the total. Objects
+        shared between entries are only counted once.
+
+        """
+        seen = set()
+        def size(objects):
+            total = 0
+            for obj in objects:
+                if id(obj) not in seen:
+                    seen.add(id(obj))
+                    total += sys.getsizeof(obj)
+            return total
+        keys = list(self._dict)
+        keys.extend(self._str_dict)
+        usage = {
+            'entries': size((self._dict, self._str_dict)),
+            'keys': size(keys) + size(s for key in keys for s in key),
+            'translations': size(self._dict.values()) +
+                            size(self._str_dict.values()),
+            'reverse': size((self.reverse,)) +
+                       size(self.reverse.values()) +
+                       size(k for keys in self.reverse.values()
+                            if isinstance(keys, list) for k in keys),
+            'casereverse': size((self.casereverse,)) +
+                           size(self.casereverse) +
+                           size(self.casereverse.values()),
+        }
+        usage['total'] = sum(usage.values())
+        return usage
+
     def __contains__(self, key):
         return self.get(key) is not None
 
@@ -98,6 +302,8 @@ class StenoDictionaryCollection(object):
         self.longest_key = 0
         self.longest_key_callbacks = set()
         self.engine = engine
+        # True if all the dictionaries store their keys as integers.
+        self.int_keys = False
 
     def set_dicts(self, dicts):
         for d in self.dicts:
@@ -106,6 +312,7 @@ class StenoDictionaryCollection(object):
         self.dicts.reverse()
         for d in dicts:
             d.add_longest_key_listener(self._longest_key_listener)
+        self.int_keys = bool(dicts) and all(d.int_keys for d in dicts)
         self._longest_key_listener()
 
     def _lookup(self, key, dicts=None, filters=()):
@@ -127,13 +334,35 @@ class StenoDictionaryCollection(object):
     def lookup(self, key):
         return self._lookup(key, filters=self.filters)
 
+    def lookup_masks(self, masks):
+        """Lookup a key given as a sequence of stroke bitmasks.
+
+        Same as lookup, but without building the RTF/CRE strings: they are
+        only needed when there are filters to apply.
+
+        """
+        key_len = len(masks)
+        if key_len > self.longest_key:
+            return None
+        for d in self.dicts:
+            if key_len > d.longest_key:
+                continue
+            value = d.get_masks(masks)
+            if value:
+                if self.filters:
+                    key = tuple(mask_to_rtfcre(mask) for mask in masks)
+                    for f in self.filters:
+                        if f(key, value):
+                            return None
+                return value
+
     def raw_lookup(self, key):
         return self._lookup(key)
 
     def reverse_lookup(self, value):
         keys = []
         for n, d in enumerate(self.dicts):
-            for k in d.reverse.get(value, ()):
+            for k in d.reverse_lookup(value):
                 # Ignore key if it's overriden by a higher priority dictionary.
                 if self._lookup(k, dicts=self.dicts[:n]) is None:
                     keys.append(k)
@@ -141,7 +370,7 @@ class StenoDictionaryCollection(object):
 
     def casereverse_lookup(self, value):
         for d in self.dicts:
-            key = d.casereverse.get(value)
+            key = d.casereverse_lookup(value)
             if key:
                 return key
 
@@ -210,12 +439,8 @@ class StenoDictionaryCollection(object):
         for d in self.dicts:
             if key_len > d.longest_key:
                 continue
-            for entry in d:
-                if(self.isPossibleContinue(key, entry)):
-                    entry_key = ()
-                    for i in range(0,len(entry)):
-                        entry_key += (str(entry[i]),)
-                    possibilities[(entry,)] = d.get(entry_key)
+            for entry, translation in d.continuations(key):
+                possibilities[(entry,)] = translation
 
         possibilities = self.shrinkPossibilities(possibilities)
         possibilities[(currentKey,)] = curr_key + u":" + tr + u":"
@@ -281,7 +506,7 @@ class StenoDictionaryCollection(object):
         return self.getPopularElements(poss)
 
     def getFirstFewElements(self, poss):
-        return {k: poss[k] for k in poss.keys()[:self.engine.get_max_poss()]}
+        return {k: poss[k] for k in list(poss.keys())[:self.engine.get_max_poss()]}
 
     def getPopularElements(self, poss):
         # Indexing
@@ -316,12 +541,12 @@ class StenoDictionaryCollection(object):
         for i in range(0, len(poss_sorted)):
             poss_ret[poss_sorted[i][0]] = poss_sorted[i][1]
         more_left = len(poss) - self.engine.get_max_poss()
-        poss_ret = {k: poss_ret[k] for k in poss_ret.keys()[:self.engine.get_max_poss()]}
+        poss_ret = {k: poss_ret[k] for k in list(poss_ret.keys())[:self.engine.get_max_poss()]}
         poss_ret[((u'ime--lop',),)] = str(more_left)
         return poss_ret
 
     def common_words_dist_has_it(self, poss, key):
-        if(self.common_words_dict.has_key(poss[key])):
+        if(poss[key] in self.common_words_dict):
             return (key, poss[key], int(self.common_words_dict[poss[key]]))
         return (key, poss[key], 0)
 
@@ -0,0 +1,116 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""A bounded queue of strokes, drained by a dedicated translation thread."""
+
+import threading
+
+from six.moves import queue
+
+from plover import log
+from plover.latency import Histogram, clock
+
+
+# What to do when a stroke is submitted to a full queue: wait for the
+# translation thread to catch up, or drop the stroke.
+OVERFLOW_BLOCK = 'block'
+OVERFLOW_DROP = 'drop'
+OVERFLOW_POLICIES = (OVERFLOW_BLOCK, OVERFLOW_DROP)
+
+
+class StrokeQueue(threading.Thread):
+    """Run stroke handling calls in order, on a dedicated thread.
+
+    This way, the machine threads do not wait for the translation, unless
+    the queue is full and the overflow policy is to block.
+
+    """
+
+    def __init__(self, size, overflow=OVERFLOW_BLOCK):
+        threading.Thread.__init__(self, name='StrokeQueue')
+        self.daemon = True
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError('invalid overflow policy: %s' % overflow)
+        self.size = size
+        self.overflow = overflow
+        # Note: the queue itself is not bounded, so calls that must not
+        # be dropped (see call) can always be added; the number of
+        # pending strokes is bounded by the slots.
+        self._queue = queue.Queue()
+        self._slots = threading.Semaphore(size)
+        # Maximum number of calls waiting in the queue.
+        self.max_depth = 0
+        # Number of calls submitted to a full queue: blocked or dropped,
+        # depending on the overflow policy.
+        self.blocked = 0
+        self.dropped = 0
+        # Time spent waiting in the queue.
+        self.wait = Histogram()
+
+    @property
+    def depth(self):
+        """Number of calls waiting in the queue."""
+        return self._queue.qsize()
+
+    def submit(self, fn, *args):
+        """Queue a call, calls are run in order.
+
+        Return False if the call was dropped.
+
+        """
+        if not self._slots.acquire(False):
+            if self.overflow == OVERFLOW_DROP:
+                self.dropped += 1
+                return False
+            self.blocked += 1
+            self._slots.acquire()
+        self._queue.put((clock(), fn, args, True))
+        depth = self._queue.qsize()
+        if depth > self.max_depth:
+            self.max_depth = depth
+        return True
+
+    def call(self, fn, *args):
+        """Queue a call that is never dropped, and does not wait for a free
+        slot (so it can be used from the queue thread).
+
+        Such calls are run in order with the strokes, but are not counted
+        against the queue size.
+
+        """
+        self._queue.put((clock(), fn, args, False))
+
+    def stats(self):
+        """Return a dictionary of the queue metrics (durations in seconds)."""
+        return {
+            'size': self.size,
+            'overflow': self.overflow,
+            'depth': self.depth,
+            'max_depth': self.max_depth,
+            'blocked': self.blocked,
+            'dropped': self.dropped,
+            'wait': self.wait.summary(),
+        }
+
+    def stop(self):
+        """Stop the thread once all pending calls have been run."""
+        self._queue.put(None)
+        if self.is_alive():
+            self.join()
+        log.debug('stroke queue stopped, maximum depth: %u, '
+                  'blocked: %u, dropped: %u',
+                  self.max_depth, self.blocked, self.dropped)
+
+    def run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            queued, fn, args, stroke = item
+            if stroke:
+                self._slots.release()
+                self.wait.add(clock() - queued)
+            try:
+                fn(*args)
+            except Exception:
+                log.error('stroke handling failed', exc_info=True)
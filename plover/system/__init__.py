@@ -1,25 +1,14 @@
 
-from plover.oslayer.config import CONFIG_DIR, ASSETS_DIR
+from plover.system.wordlist import WordList
 
-from io import open
-import os
 import re
 
 
 def _load_wordlist(filename):
     if filename is None:
         return {}
-    path = None
-    for dir in (CONFIG_DIR, ASSETS_DIR):
-        path = os.path.realpath(os.path.join(dir, filename))
-        if os.path.exists(path):
-            break
-    words = {}
-    with open(path, encoding='utf-8') as f:
-        pairs = [word.strip().rsplit(' ', 1) for word in f]
-        pairs.sort(reverse=True, key=lambda x: int(x[1]))
-        words = {p[0].lower(): int(p[1]) for p in pairs}
-    return words
+    # Loaded on first use.
+    return WordList(filename)
 
 def _key_order(keys, numbers):
     key_order = {}
@@ -0,0 +1,233 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""A compact, lazily loaded, orthography word list.
+
+The text word list (one "word rank" pair per line) is compiled to a binary
+file cached in the configuration directory, holding:
+
+- the sorted list of (lowercase) words, UTF-8 encoded, concatenated,
+- the offset of each word in the above,
+- the rank of each word.
+
+The binary file is loaded with a single read, and lookups use a binary
+search: this is both faster to load and much smaller in memory than a
+dictionary with a string and an integer object per word.
+
+"""
+
+from array import array
+import io
+import os
+import struct
+import sys
+
+from plover.oslayer.config import CONFIG_DIR, ASSETS_DIR
+
+
+MAGIC = b'PLWL'
+VERSION = 1
+# Magic, version, byte order, offset item size, rank item size,
+# source size, source modification time, source path length,
+# number of words, words data length.
+HEADER = struct.Struct('<4sIcBBqqIII')
+CACHE_EXTENSION = '.cache'
+
+_OFFSET_TYPE = 'I'
+_RANK_TYPE = 'i'
+_BYTEORDER = b'l' if sys.byteorder == 'little' else b'b'
+
+
+def _array_from_bytes(typecode, data):
+    a = array(typecode)
+    if hasattr(a, 'frombytes'):
+        a.frombytes(data)
+    else:
+        a.fromstring(data)
+    return a
+
+
+def _array_to_bytes(a):
+    if hasattr(a, 'tobytes'):
+        return a.tobytes()
+    return a.tostring()
+
+
+def find_wordlist(filename):
+    """Return the path to a word list: in the configuration directory if
+    it exists there, in the assets directory otherwise."""
+    path = None
+    for dir in (CONFIG_DIR, ASSETS_DIR):
+        path = os.path.realpath(os.path.join(dir, filename))
+        if os.path.exists(path):
+            break
+    return path
+
+
+def parse_wordlist(fp):
+    """Parse a text word list, return a dictionary of word to rank.
+
+    Words are lowercased, the best (lowest) rank is kept for duplicates.
+
+    """
+    words = {}
+    for line in fp:
+        line = line.strip()
+        if not line:
+            continue
+        word, rank = line.rsplit(' ', 1)
+        word = word.lower()
+        rank = int(rank)
+        if rank < words.get(word, rank + 1):
+            words[word] = rank
+    return words
+
+
+def _source_info(source):
+    st = os.stat(source)
+    return st.st_size, int(st.st_mtime), os.path.realpath(source).encode('utf-8')
+
+
+def compile_wordlist(words, source):
+    """Compile a dictionary of word to rank to the binary format."""
+    size, mtime, path = _source_info(source)
+    encoded = sorted((word.encode('utf-8'), rank) for word, rank in words.items())
+    offsets = array(_OFFSET_TYPE, [0])
+    ranks = array(_RANK_TYPE)
+    position = 0
+    for word, rank in encoded:
+        position += len(word)
+        offsets.append(position)
+        ranks.append(rank)
+    data = b''.join(word for word, rank in encoded)
+    header = HEADER.pack(MAGIC, VERSION, _BYTEORDER,
+                         offsets.itemsize, ranks.itemsize,
+                         size, mtime, len(path), len(encoded), len(data))
+    return b''.join((header, path, _array_to_bytes(offsets),
+                     _array_to_bytes(ranks), data))
+
+
+def load_compiled_wordlist(contents, source):
+    """Load a compiled word list.
+
+    Return (offsets, ranks, data), or None if the compiled word list is
+    not valid or out of date with respect to source.
+
+    """
+    if len(contents) < HEADER.size:
+        return None
+    (magic, version, byteorder, offset_size, rank_size, size, mtime,
+     path_length, count, data_length) = HEADER.unpack_from(contents)
+    if (magic, version, byteorder) != (MAGIC, VERSION, _BYTEORDER):
+        return None
+    if (offset_size != array(_OFFSET_TYPE).itemsize or
+        rank_size != array(_RANK_TYPE).itemsize):
+        return None
+    position = HEADER.size
+    path = contents[position:position + path_length]
+    if (size, mtime, path) != _source_info(source):
+        return None
+    position += path_length
+    offsets_length = (count + 1) * offset_size
+    ranks_length = count * rank_size
+    if len(contents) != position + offsets_length + ranks_length + data_length:
+        return None
+    offsets = _array_from_bytes(_OFFSET_TYPE,
+                                contents[position:position + offsets_length])
+    position += offsets_length
+    ranks = _array_from_bytes(_RANK_TYPE,
+                              contents[position:position + ranks_length])
+    position += ranks_length
+    return offsets, ranks, contents[position:]
+
+
+class WordList(object):
+    """A read-only mapping of word to rank, loaded on first access."""
+
+    def __init__(self, filename, cache_dir=CONFIG_DIR):
+        self.filename = filename
+        self.cache_dir = cache_dir
+        self._offsets = None
+        self._ranks = None
+        self._data = None
+
+    @property
+    def cache_filename(self):
+        return os.path.join(self.cache_dir,
+                            os.path.basename(self.filename) + CACHE_EXTENSION)
+
+    def _load(self):
+        source = find_wordlist(self.filename)
+        if not os.path.exists(source):
+            from plover import log
+            log.warning('orthography word list not found: %s', self.filename)
+            self._offsets = array(_OFFSET_TYPE, [0])
+            self._ranks = array(_RANK_TYPE)
+            self._data = b''
+            return
+        cache_filename = self.cache_filename
+        loaded = None
+        if os.path.exists(cache_filename):
+            with open(cache_filename, 'rb') as fp:
+                loaded = load_compiled_wordlist(fp.read(), source)
+        if loaded is None:
+            with io.open(source, encoding='utf-8') as fp:
+                contents = compile_wordlist(parse_wordlist(fp), source)
+            try:
+                temp_filename = cache_filename + '.tmp'
+                with open(temp_filename, 'wb') as fp:
+                    fp.write(contents)
+                if os.path.exists(cache_filename):
+                    os.remove(cache_filename)
+                os.rename(temp_filename, cache_filename)
+            except (IOError, OSError):
+                from plover import log
+                log.warning('could not save compiled word list to %s',
+                            cache_filename, exc_info=True)
+            loaded = load_compiled_wordlist(contents, source)
+        self._offsets, self._ranks, self._data = loaded
+
+    def _index(self, word):
+        if self._data is None:
+            self._load()
+        key = word.encode('utf-8')
+        offsets = self._offsets
+        data = self._data
+        lo, hi = 0, len(self._ranks)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if data[offsets[mid]:offsets[mid + 1]] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self._ranks) and data[offsets[lo]:offsets[lo + 1]] == key:
+            return lo
+        return -1
+
+    def __contains__(self, word):
+        return self._index(word) != -1
+
+    def __getitem__(self, word):
+        index = self._index(word)
+        if index == -1:
+            raise KeyError(word)
+        return self._ranks[index]
+
+    def get(self, word, default=None):
+        index = self._index(word)
+        if index == -1:
+            return default
+        return self._ranks[index]
+
+    def __len__(self):
+        if self._data is None:
+            self._load()
+        return len(self._ranks)
+
+    def __iter__(self):
+        if self._data is None:
+            self._load()
+        offsets = self._offsets
+        data = self._data
+        for n in range(len(self._ranks)):
+            yield data[offsets[n]:offsets[n + 1]].decode('utf-8')
@@ -21,9 +21,10 @@ import sys
 import re
 import csv
 
-from plover.steno import Stroke
+from plover.steno import key_mask, mask_to_rtfcre, stroke_from_keys
 from plover.steno_dictionary import StenoDictionaryCollection
 from plover import system
+from plover.latency import clock
 import plover.formatting as formatting
 from plover.suggestions import Suggestion
 
@@ -79,8 +80,13 @@ class Translation(object):
     formatting -- Information stored on the translation by the formatter for
     sticky state (e.g. capitalize next stroke) and to hold undo info.
 
+    stroke_id -- When tracing, the ID of the stroke that produced this
+    translation.
+
     """
 
+    stroke_id = None
+
     def __init__(self, outline, translation):
         """Create a translation by looking up strokes in a dictionary.
 
@@ -165,6 +171,10 @@ class Translator(object):
     """
     start_capitalized = False
     start_attached = False
+    # Set by the engine when latency monitoring is enabled.
+    latency_monitor = None
+    # Set by the engine when tracing is enabled.
+    tracer = None
 
     def __init__(self, steno_engine):
         self._undo_length = 0
@@ -181,6 +191,72 @@ class Translator(object):
         self._translate_stroke(stroke)
         self._resize_translations()
 
+    def translate_strokes(self, strokes):
+        """Process a batch of strokes.
+
+        The strokes are translated in order, but the listeners are only
+        called once: translations done and undone in the batch are never
+        output, and the undo/do of consecutive strokes are merged.
+
+        """
+        if len(strokes) == 1:
+            self.translate(strokes[0])
+            return
+        state = self._state
+        # The translations that were output before the batch.
+        previous = state.translations[:]
+        previous_tail = state.tail
+        undo = []
+        do = []
+        for stroke in strokes:
+            stroke_undo, stroke_do, add_to_history = self._lookup_stroke(stroke)
+            if not add_to_history:
+                # The translation is not part of the history (e.g. an
+                # asterisk with nothing left to undo), so it cannot be
+                # merged: it must not be the context of the next ones.
+                self._output_batch(previous, previous_tail, undo, do)
+                prev = state.last()
+                self._output(stroke_undo, stroke_do, prev)
+                self._suggest(stroke_undo, stroke_do, prev)
+                previous = state.translations[:]
+                previous_tail = state.tail
+                undo = []
+                do = []
+                self._resize_translations()
+                continue
+            for t in reversed(stroke_undo):
+                if do and do[-1] is t:
+                    do.pop()
+                else:
+                    undo.insert(0, t)
+            do.extend(stroke_do)
+            state.translations.extend(stroke_do)
+            self._resize_translations()
+        self._output_batch(previous, previous_tail, undo, do)
+
+    def _output_batch(self, previous, previous_tail, undo, do):
+        """Output the merged undo/do of a batch of strokes.
+
+        <previous> and <previous_tail> are the translations and tail of
+        the state before the batch.
+
+        """
+        # Translations undone and then done again (e.g. a multi-strokes
+        # translation corrected with an asterisk) are left as is.
+        common = 0
+        while (common < len(undo) and common < len(do) and
+               undo[common] is do[common]):
+            common += 1
+        if common:
+            undo = undo[common:]
+            do = do[common:]
+        # The undo translations are the most recent previous ones.
+        index = len(previous) - len(undo) - 1
+        prev = previous[index] if index >= 0 else previous_tail
+        if undo or do:
+            self._output(undo, do, prev)
+            self._suggest(undo, do, prev)
+
     def set_dictionary(self, d):
         """Set the dictionary."""
         callback = self._dict_callback
@@ -252,6 +328,24 @@ class Translator(object):
         stroke -- The Stroke object to process.
 
         """
+        undo, do, add_to_history = self._lookup_stroke(stroke)
+        prev = self._state.last()
+        self._output(undo, do, prev)
+        self._suggest(undo, do, prev)
+        if add_to_history:
+            self._state.translations.extend(do)
+
+    def _lookup_stroke(self, stroke):
+        """Find the translations to undo and do for a stroke.
+
+        The undone translations are removed from the state, the caller
+        is responsible for adding the new ones (if the third value
+        returned, add_to_history, is true).
+
+        """
+        monitor = self.latency_monitor
+        if monitor is not None:
+            start = clock()
 
         undo = []
         do = []
@@ -296,14 +390,35 @@ class Translator(object):
                 do.append(t)
                 undo.extend(t.replaced)
         del self._state.translations[len(self._state.translations) - len(undo):]
-        self._output(undo, do, self._state.last())
-
-        suggestions = self.get_best_suggestions(do, undo, self._state.last())
+        if monitor is not None:
+            tracer = self.tracer
+            if tracer is None:
+                monitor.add('lookup', clock() - start)
+            else:
+                stroke_id = tracer.stroke_id
+                for t in do:
+                    if t.stroke_id is None:
+                        t.stroke_id = stroke_id
+                monitor.add('lookup', clock() - start, {
+                    'undo': [('/'.join(t.rtfcre), t.english) for t in undo],
+                    'do': [('/'.join(t.rtfcre), t.english) for t in do],
+                })
+        return undo, do, add_to_history
+
+    def _suggest(self, undo, do, prev):
+        """Update the suggestions, and the IME possible continuations."""
+        monitor = self.latency_monitor
+        if monitor is not None:
+            start = clock()
+        suggestions = self.get_best_suggestions(do, undo, prev)
+        if monitor is not None:
+            monitor.add('suggestions', clock() - start)
         if(self.steno_engine.is_running and self.ime_connection.isActive):
+            if monitor is not None:
+                start = clock()
             self.find_possible_continues(do, undo, suggestions)
-
-        if add_to_history:
-            self._state.translations.extend(do)
+            if monitor is not None:
+                monitor.add('continuations', clock() - start)
 
     def _find_translation(self, stroke, mapping):
         t = self._find_translation_helper(stroke)
@@ -381,22 +496,30 @@ class Translator(object):
                 return t
 
     def _lookup(self, strokes, suffixes=()):
+        if self._dictionary.int_keys:
+            masks = [s.mask for s in strokes]
+            if None not in masks:
+                return self._lookup_masks(masks, strokes[-1], suffixes)
         dict_key = tuple(s.rtfcre for s in strokes)
         result = self._dictionary.lookup(dict_key)
         if result != None:
             return result
 
+        last = strokes[-1]
         for key in suffixes:
-            if key in strokes[-1].steno_keys:
-                dict_key = (Stroke([key]).rtfcre,)
+            if key in last.steno_keys:
+                suffix_mask = key_mask(key)
+                dict_key = (mask_to_rtfcre(suffix_mask),)
                 suffix_mapping = self._dictionary.lookup(dict_key)
                 if suffix_mapping is None:
                     continue
-                keys = strokes[-1].steno_keys[:]
-                keys.remove(key)
-                copy = strokes[:]
-                copy[-1] = Stroke(keys)
-                dict_key = tuple(s.rtfcre for s in copy)
+                if last.mask is None:
+                    keys = list(last.steno_keys)
+                    keys.remove(key)
+                    rtfcre = stroke_from_keys(keys).rtfcre
+                else:
+                    rtfcre = mask_to_rtfcre(last.mask & ~suffix_mask)
+                dict_key = tuple(s.rtfcre for s in strokes[:-1]) + (rtfcre,)
                 main_mapping = self._dictionary.lookup(dict_key)
                 if main_mapping is None:
                     continue
@@ -404,6 +527,27 @@ class Translator(object):
 
         return None
 
+    def _lookup_masks(self, masks, last, suffixes=()):
+        # Same as _lookup, with the strokes as bitmasks, for integer keys
+        # dictionaries.
+        result = self._dictionary.lookup_masks(masks)
+        if result != None:
+            return result
+
+        for key in suffixes:
+            if key in last.steno_keys:
+                suffix_mask = key_mask(key)
+                suffix_mapping = self._dictionary.lookup_masks([suffix_mask])
+                if suffix_mapping is None:
+                    continue
+                masks[-1] = last.mask & ~suffix_mask
+                main_mapping = self._dictionary.lookup_masks(masks)
+                if main_mapping is None:
+                    continue
+                return main_mapping + ' ' + suffix_mapping
+
+        return None
+
     def find_possible_continues(self, do, undo, suggestions):
         # check if current outline ends
         if(len(do) < 1):
@@ -546,18 +690,17 @@ def _toggle_asterisk(translations, undo, do):
     translations.remove(replaced[0])
     translations.extend(redo)
     last_stroke = replaced[0].strokes[len(replaced[0].strokes)-1]
-    keys = last_stroke.steno_keys[:]
+    keys = list(last_stroke.steno_keys)
     if '*' in keys:
         keys.remove('*')
     else:
         keys.append('*')
-    return Stroke(keys)
+    return stroke_from_keys(keys)
 
 def _repeat_last_stroke(translations):
     replaced = translations[len(translations)-1:]
     if len(replaced) < 1:
         return
     last_stroke = replaced[0].strokes[len(replaced[0].strokes)-1]
-    keys = last_stroke.steno_keys[:]
-    return Stroke(keys)
+    return stroke_from_keys(last_stroke.steno_keys)
 
@@ -397,7 +397,7 @@ if __name__ == '__main__':
             'setuptools.installation': ['eggsecutable=plover.main:main'],
         },
         packages=[
-            'plover', 'plover.machine', 'plover.gui',
+            'plover', 'plover.machine', 'plover.machine.simulator', 'plover.gui',
             'plover.oslayer', 'plover.dictionary',
             'plover.system',
         ],
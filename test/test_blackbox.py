@@ -1,7 +1,7 @@
 
 import unittest
 
-from plover.steno import Stroke
+from plover.steno import Stroke, stroke_to_keys
 from plover.formatting import Formatter
 from plover.translation import Translator
 from plover.steno import normalize_steno
@@ -31,9 +31,8 @@ class CaptureOutput(object):
 
 
 def steno_to_stroke(steno):
-    stroke = Stroke(())
-    stroke.rtfcre = steno
-    stroke.is_correction = steno == '*'
+    stroke = Stroke(stroke_to_keys(steno))
+    assert stroke.rtfcre == steno
     return stroke
 
 
@@ -45,6 +45,18 @@ class ConfigTestCase(unittest.TestCase):
         ('auto_start', config.MACHINE_CONFIG_SECTION, 
          config.MACHINE_AUTO_START_OPTION, config.DEFAULT_MACHINE_AUTO_START, 
          True, False, True),
+        ('stroke_queue_size', config.MACHINE_CONFIG_SECTION,
+         config.STROKE_QUEUE_SIZE_OPTION, config.DEFAULT_STROKE_QUEUE_SIZE,
+         0, 10, 500),
+        ('stroke_queue_overflow', config.MACHINE_CONFIG_SECTION,
+         config.STROKE_QUEUE_OVERFLOW_OPTION,
+         config.DEFAULT_STROKE_QUEUE_OVERFLOW, 'drop', 'block', 'drop'),
+        ('dictionary_int_keys', config.DICTIONARY_STORAGE_SECTION,
+         config.DICTIONARY_INT_KEYS_OPTION,
+         config.DEFAULT_DICTIONARY_INT_KEYS, True, False, True),
+        ('dictionary_compact', config.DICTIONARY_STORAGE_SECTION,
+         config.DICTIONARY_COMPACT_OPTION,
+         config.DEFAULT_DICTIONARY_COMPACT, True, False, True),
         ('show_stroke_display', config.STROKE_DISPLAY_SECTION, 
          config.STROKE_DISPLAY_SHOW_OPTION, config.DEFAULT_STROKE_DISPLAY_SHOW, 
          True, False, True),
@@ -0,0 +1,44 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for decoding.py."""
+
+import unittest
+
+from plover.machine.decoding import action_tables, decode, key_tables
+from plover.machine.geminipr import GeminiPr
+from plover.machine.keymap import Keymap
+
+
+class DecodingTestCase(unittest.TestCase):
+
+    def test_key_tables(self):
+        tables = key_tables([
+            [(0x01, 'A'), (0x02, 'B'), (0x04, '')],
+            [(0x80, 'C')],
+        ])
+        self.assertEqual(len(tables), 2)
+        self.assertEqual(tables[0][0x00], ())
+        self.assertEqual(tables[0][0x03], ('A', 'B'))
+        self.assertEqual(tables[0][0x04], ())
+        self.assertEqual(tables[1][0xff], ('C',))
+        self.assertEqual(decode(tables, b'\x03\x80'), ['A', 'B', 'C'])
+        # Extra bytes are ignored.
+        self.assertEqual(decode(tables, b'\x01\x00\xff'), ['A'])
+
+    def test_action_tables(self):
+        tables = key_tables([[(0x01, 'A'), (0x02, 'B'), (0x04, 'C')]])
+        keymap = Keymap(('A', 'B', 'C'), ('a', 'b', 'no-op'))
+        keymap.set_mappings({'a': ['A'], 'b': ['B'], 'no-op': ['C']})
+        tables = action_tables(tables, keymap)
+        self.assertEqual(decode(tables, b'\x07'), ['a', 'b'])
+        self.assertEqual(decode(tables, b'\x04'), [])
+
+    def test_set_mappings(self):
+        machine = GeminiPr({})
+        # Fn, S1-, -Z.
+        packet = b'\xc0\x40\x00\x00\x00\x01'
+        machine.set_mappings({'S-': ['S1-'], '-Z': ['-Z'], 'no-op': ['Fn']})
+        self.assertEqual(decode(machine._action_tables, packet), ['S-', '-Z'])
+        machine.set_mappings({'S-': ['S1-'], '#': ['Fn']})
+        self.assertEqual(decode(machine._action_tables, packet), ['#', 'S-'])
@@ -19,11 +19,17 @@ class FakeConfig(object):
             ('auto_start'                , False                        ),
             ('machine_type'              , 'Fake'                       ),
             ('machine_specific_options'  , {}                           ),
+            ('stroke_queue_size'         , 0                            ),
+            ('stroke_queue_overflow'     , 'block'                      ),
             ('system_keymap'             , [(k, k) for k in system.KEYS]),
             ('dictionary_file_names'     , []                           ),
+            ('dictionary_int_keys'       , False                        ),
+            ('dictionary_compact'        , False                        ),
             ('log_file_name'             , os.devnull                   ),
             ('enable_stroke_logging'     , False                        ),
             ('enable_translation_logging', False                        ),
+            ('enable_latency_monitoring' , False                        ),
+            ('enable_tracing'            , False                        ),
             ('space_placement'           , 'Before Output'              ),
             ('undo_levels'               , 10                           ),
             ('start_capitalized'         , True                         ),
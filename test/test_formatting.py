@@ -29,6 +29,16 @@ class CaptureOutput(object):
     def send_engine_command(self, c):
         self.instructions.append(('e', c))
 
+class CaptureEditOutput(CaptureOutput):
+
+    def send_edit(self, b, s):
+        self.instructions.append(('edit', b, s))
+
+class CaptureActionsOutput(CaptureEditOutput):
+
+    def send_actions(self, actions):
+        self.instructions.append(('actions', actions))
+
 class MockTranslation(object):
     def __init__(self, rtfcre=tuple(), english=None, formatting=None):
         self.rtfcre = rtfcre
@@ -1087,6 +1097,28 @@ class FormatterTestCase(unittest.TestCase):
         cases = [('', None), ('{PLOVER:command}', 'command')]
         self.check(formatting._get_engine_command, cases)
     
+    def test_parse_translation(self):
+        P = formatting._ParsedAtom
+        cases = [
+            ('', ()),
+            ('  ', ()),
+            ('123', (P(formatting.ATOM_GLUE, '123', False, False),)),
+            (r'a \{b\} {.}', (P(formatting.ATOM_TEXT, 'a {b}', False, False),
+                              P(formatting.ATOM_STOP, '.', False, False))),
+            ('{^ing}', (P(formatting.ATOM_ATTACH, 'ing', True, False),)),
+            ('{^}', (P(formatting.ATOM_ATTACH, '', True, True),)),
+            ('{PLOVER:TOGGLE}{#Return}', (
+                P(formatting.ATOM_COMMAND, 'TOGGLE', False, False),
+                P(formatting.ATOM_KEY_COMBINATION, 'Return', False, False))),
+            ('{*(c)}{*(c}', (
+                P(formatting.ATOM_RETRO_FORMAT, '*(c)', False, False),
+                P(formatting.ATOM_UNKNOWN, '*(c', False, False))),
+        ]
+        self.check(formatting._parse_translation, cases)
+        # Parsed translations are cached.
+        self.assertIs(formatting._parse_translation('{^ing}'),
+                      formatting._parse_translation('{^ing}'))
+
     def test_capitalize(self):
         cases = [('', ''), ('abc', 'Abc'), ('ABC', 'ABC')]
         self.check(formatting._capitalize, cases)
@@ -1170,6 +1202,19 @@ class FormatterTestCase(unittest.TestCase):
                 translation(english='{#a}{#b}'),
 
             ], [('c', 'a'), ('c', 'b')]),
+            # Characters outside the BMP are never split.
+            ([
+                translation(english=u'a\U0001f600'),
+            ], [
+                translation(english=u'a\U0001f601'),
+
+            ], [('s', u' a\U0001f600'), ('b', 1), ('s', u'\U0001f601')]),
+            ([
+                translation(english=u'\U0001f600\U0001f600'),
+            ], [
+                translation(english=u'\U0001f600'),
+
+            ], [('s', u' \U0001f600\U0001f600'), ('b', 1)]),
         ):
             output = CaptureOutput()
             formatter = formatting.Formatter()
@@ -1177,3 +1222,37 @@ class FormatterTestCase(unittest.TestCase):
             formatter.format([], undo, None)
             formatter.format(undo, do, None)
             self.assertEqual(output.instructions, expected_instructions)
+
+    def test_send_edit(self):
+        output = CaptureEditOutput()
+        formatter = formatting.Formatter()
+        formatter.set_output(output)
+        formatter.set_space_placement('After Output')
+        prev = translation(english='test')
+        formatter.format([], [prev], None)
+        comma = translation(english='{^,}{#Return}{^}{.}')
+        formatter.format([], [comma], prev)
+        formatter.format([comma], [], prev)
+        self.assertEqual(output.instructions, [
+            # Text only does not use send_edit.
+            ('s', 'test '), ('edit', 1, ', '), ('c', 'Return'), ('s', '. '),
+            ('edit', 4, ' '),
+        ])
+
+    def test_send_actions(self):
+        output = CaptureActionsOutput()
+        formatter = formatting.Formatter()
+        formatter.set_output(output)
+        formatter.set_space_placement('After Output')
+        prev = translation(english='test')
+        formatter.format([], [prev], None)
+        comma = translation(english='{^,}{#Return}{^}{.}{PLOVER:LOOKUP}')
+        formatter.format([], [comma], prev)
+        formatter.format([comma], [], prev)
+        # One call per stroke, with everything in order.
+        self.assertEqual(output.instructions, [
+            ('actions', [('edit', 0, 'test ')]),
+            ('actions', [('edit', 1, ', '), ('combo', 'Return'),
+                         ('edit', 0, '. '), ('command', 'LOOKUP')]),
+            ('actions', [('edit', 4, ' ')]),
+        ])
@@ -0,0 +1,95 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for latency.py."""
+
+import json
+import threading
+import unittest
+
+from six import StringIO
+
+from plover.latency import STAGES, Histogram, LatencyMonitor, Tracer
+
+
+class HistogramTestCase(unittest.TestCase):
+
+    def test_empty(self):
+        h = Histogram()
+        self.assertEqual(h.count, 0)
+        self.assertIsNone(h.mean)
+        self.assertIsNone(h.percentile(50))
+
+    def test_add(self):
+        h = Histogram(buckets=(0.001, 0.01, 0.1))
+        for duration in (0.0005, 0.002, 0.003, 0.05, 2.0):
+            h.add(duration)
+        self.assertEqual(h.counts, [1, 2, 1, 1])
+        self.assertEqual(h.count, 5)
+        self.assertEqual(h.min, 0.0005)
+        self.assertEqual(h.max, 2.0)
+        self.assertAlmostEqual(h.mean, 2.0555 / 5)
+        # Percentiles are approximated by the bucket upper bound.
+        self.assertEqual(h.percentile(0), 0.001)
+        self.assertEqual(h.percentile(50), 0.01)
+        self.assertEqual(h.percentile(80), 0.1)
+        # But never over the maximum.
+        self.assertEqual(h.percentile(100), 2.0)
+        h.clear()
+        self.assertEqual(h.counts, [0, 0, 0, 0])
+        self.assertEqual(h.count, 0)
+
+
+class LatencyMonitorTestCase(unittest.TestCase):
+
+    def test_monitor(self):
+        monitor = LatencyMonitor()
+        self.assertEqual(tuple(monitor.histograms), STAGES)
+        monitor.add('lookup', 0.001)
+        monitor.add('lookup', 0.003)
+        monitor.add('custom', 0.5)
+        summary = monitor.summary()
+        self.assertEqual(tuple(summary), STAGES + ('custom',))
+        self.assertEqual(summary['lookup']['count'], 2)
+        self.assertEqual(summary['lookup']['max'], 0.003)
+        self.assertEqual(summary['custom']['count'], 1)
+        self.assertEqual(summary['decode']['count'], 0)
+        monitor.clear()
+        self.assertEqual(monitor.summary()['lookup']['count'], 0)
+
+
+class TracerTestCase(unittest.TestCase):
+
+    def test_tracer(self):
+        monitor = LatencyMonitor()
+        tracer = Tracer(size=3, monitor=monitor)
+        stroke_id = tracer.new_stroke_id()
+        self.assertEqual(tracer.new_stroke_id(), stroke_id + 1)
+        tracer.stroke_id = stroke_id
+        tracer.add('lookup', 0.001, {'do': [('KAT', 'cat')]})
+        # The stroke ID is per thread.
+        thread = threading.Thread(target=tracer.add, args=('decode', 0.002))
+        thread.start()
+        thread.join()
+        tracer.span('ime_send', 1.0, 1.5, stroke_id=42)
+        self.assertEqual(monitor.histograms['lookup'].count, 1)
+        self.assertEqual(monitor.histograms['decode'].count, 1)
+        self.assertEqual([(s[0], s[4]) for s in tracer.spans],
+                         [('lookup', stroke_id), ('decode', None), ('ime_send', 42)])
+        # The ring is bounded.
+        tracer.add('render', 0.001)
+        self.assertEqual([s[0] for s in tracer.spans],
+                         ['decode', 'ime_send', 'render'])
+        fp = StringIO()
+        tracer.dump(fp)
+        events = json.loads(fp.getvalue())['traceEvents']
+        metadata = [e for e in events if e['ph'] == 'M']
+        spans = [e for e in events if e['ph'] == 'X']
+        self.assertEqual(len(metadata), 2)
+        self.assertEqual([e['name'] for e in spans], ['decode', 'ime_send', 'render'])
+        self.assertEqual(spans[1]['args'], {'stroke': 42})
+        self.assertEqual(spans[1]['ts'], 1e6)
+        self.assertEqual(spans[1]['dur'], 0.5e6)
+        self.assertEqual(spans[2]['args'], {'stroke': stroke_id})
+        tracer.clear()
+        self.assertEqual(len(tracer.spans), 0)
@@ -2,6 +2,8 @@
 # See LICENSE.txt for details.
 
 from plover.orthography import add_suffix
+from plover import orthography
+from plover import system
 import unittest
 
 
@@ -114,3 +116,22 @@ class OrthographyTestCase(unittest.TestCase):
                 word, suffix, result, expected,
             )
             self.assertEqual(result, expected, msg=msg)
+
+    def test_suffix_rules(self):
+        rules = orthography._get_cache().get_suffix_rules('ing').rules
+        self.assertTrue(rules)
+        self.assertTrue(all(r in system.ORTHOGRAPHY_RULES for r in rules))
+        # The sibilant pluralization rule only applies to 's'.
+        patterns = [r[0].pattern for r in rules]
+        self.assertFalse([p for p in patterns if p.endswith(r'\^ s$')])
+        self.assertEqual(orthography._get_cache().get_suffix_rules('').rules, [])
+
+    def test_cache_invalidation(self):
+        self.assertEqual(add_suffix('narrate', 'ing'), 'narrating')
+        rules = system.ORTHOGRAPHY_RULES
+        try:
+            system.ORTHOGRAPHY_RULES = []
+            self.assertEqual(add_suffix('narrate', 'ing'), 'narrateing')
+        finally:
+            system.ORTHOGRAPHY_RULES = rules
+        self.assertEqual(add_suffix('narrate', 'ing'), 'narrating')
@@ -0,0 +1,39 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for output_worker.py."""
+
+import threading
+import unittest
+
+from plover.output_worker import OutputWorker
+
+
+class OutputWorkerTestCase(unittest.TestCase):
+
+    def test_worker(self):
+        worker = OutputWorker()
+        calls = []
+        threads = set()
+        def call(n):
+            threads.add(threading.current_thread().name)
+            calls.append(n)
+        def fail():
+            raise ValueError('failed')
+        # Block the worker, so calls pile up in the queue.
+        blocked = threading.Event()
+        worker.submit(blocked.wait)
+        for n in range(3):
+            worker.submit(call, n)
+        # Errors do not stop the worker.
+        worker.submit(fail)
+        worker.submit(call, 3)
+        self.assertEqual(worker.depth, 6)
+        self.assertEqual(worker.max_depth, 6)
+        worker.start()
+        blocked.set()
+        worker.stop()
+        self.assertFalse(worker.is_alive())
+        self.assertEqual(calls, [0, 1, 2, 3])
+        self.assertEqual(threads, set(['OutputWorker']))
+        self.assertEqual(worker.depth, 0)
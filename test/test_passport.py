@@ -18,6 +18,7 @@ class MockSerial(object):
     
     inputs = []
     index = 0
+    timeout = 2.0
     
     def __init__(self, **params):
       MockSerial.index = 0
@@ -34,10 +35,14 @@ class MockSerial(object):
         return len(self._get())
 
     def read(self, size=1):
-        assert size == self.inWaiting()
-        result = [ord(x) for x in self._get()]
+        data = self._get()
+        if not data:
+            # Timeout.
+            time.sleep(0.001)
+            return b''
+        assert size == len(data)
         MockSerial.index += 1
-        return result
+        return data.encode('ascii')
         
     def close(self):
         pass
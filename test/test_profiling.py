@@ -0,0 +1,63 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for profiling.py."""
+
+import os
+import pstats
+import shutil
+import tempfile
+import unittest
+
+from plover.headless import create_engine, dictionary_from_entries, \
+    send_keys, steno_to_keys
+from plover.profiling import StrokeProfiler
+
+
+def _work():
+    return sum(range(1000))
+
+
+class StrokeProfilerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_profiler(self):
+        profiler = StrokeProfiler()
+        for n in range(3):
+            profiler.enable()
+            try:
+                _work()
+            finally:
+                profiler.disable()
+        self.assertEqual(profiler.strokes, 3)
+        summary = profiler.summary()
+        self.assertTrue(summary.startswith('profile of 3 strokes\n'))
+        self.assertIn('_work', summary)
+        filename = os.path.join(self.directory, 'test.prof')
+        profiler.dump(filename)
+        stats = pstats.Stats(filename)
+        functions = [f[2] for f in stats.stats]
+        self.assertIn('_work', functions)
+
+    def test_engine(self):
+        d = dictionary_from_entries((('KAT', 'cat'),))
+        engine = create_engine([d])
+        engine.set_stroke_queue(10)
+        filename = os.path.join(self.directory, 'engine.prof')
+        engine.start_profiling()
+        for keys in steno_to_keys('KAT/KAT'):
+            send_keys(engine, keys)
+        engine.stop_profiling(filename)
+        # The profiler is started and stopped on the queue thread, in
+        # order with the strokes.
+        engine.set_stroke_queue(0)
+        self.assertIsNone(engine.profiler)
+        self.assertEqual(engine.output.text, ' cat cat')
+        stats = pstats.Stats(filename)
+        functions = [f[2] for f in stats.stats]
+        self.assertIn('_process_stroke', functions)
@@ -33,6 +33,21 @@ class RegistryClassTestCase(unittest.TestCase):
         registry.add_alias('c', 'b')
         self.assertEqual(['a', 'b'], sorted(registry.get_all_names()))
 
+    def test_lazy(self):
+        registry = Registry()
+        registry.register_lazy('a', 'collections', 'OrderedDict')
+        registry.register_lazy('b', 'no_such_module_for_plover', 'Machine')
+        registry.add_alias('c', 'a')
+        self.assertEqual(['a', 'b'], sorted(registry.get_all_names()))
+        import collections
+        self.assertIs(collections.OrderedDict, registry.get('c'))
+        self.assertIs(collections.OrderedDict, registry.get('a'))
+        # Import errors are reported as unavailable machines.
+        with self.assertRaises(NoSuchMachineException) as cm:
+            registry.get('b')
+        self.assertIn('no_such_module_for_plover', str(cm.exception))
+        self.assertEqual(['a', 'b'], sorted(registry.get_all_names()))
+
 class MachineRegistryTestCase(unittest.TestCase):
     def test_keyboard_as_sidewinder(self):
         self.assertEqual(machine_registry.get("Keyboard"),
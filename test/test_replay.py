@@ -0,0 +1,83 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for replay.py."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from plover.headless import dictionary_from_entries
+from plover.replay import (
+    LoggedStroke,
+    Replayer,
+    load_stroke_logs,
+    parse_stroke_log,
+    stroke_log_files,
+)
+from plover.steno import Stroke
+
+
+def log_line(timestamp, keys):
+    return '%s %s\n' % (timestamp, Stroke(keys))
+
+
+class ReplayTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_parse_stroke_log(self):
+        lines = [
+            log_line('2016-10-19 12:00:00,100', ['K-', 'A-', '-T']),
+            "2016-10-19 12:00:00,150 Translation(('KAT',) : \"cat\")\n",
+            log_line('2016-10-19 12:00:01,350', ['*']),
+            log_line('2016-10-19 12:00:02,000', ['#', 'S-', '-T']),
+            "2016-10-19 12:00:02,000 Stroke(S : [u'S-'])\n",
+        ]
+        strokes = list(parse_stroke_log(lines))
+        self.assertEqual([s.rtfcre for s in strokes], ['KAT', '*', '1-9', 'S'])
+        self.assertEqual(strokes[0].keys, ['K-', 'A-', '-T'])
+        self.assertEqual(strokes[1].keys, ['*'])
+        self.assertEqual(strokes[2].keys, ['#', 'S-', '-T'])
+        self.assertEqual(strokes[3].keys, ['S-'])
+        self.assertAlmostEqual(strokes[1].timestamp - strokes[0].timestamp, 1.25)
+        for s in strokes:
+            self.assertEqual(Stroke(s.keys).rtfcre, s.rtfcre)
+
+    def test_stroke_log_files(self):
+        filename = os.path.join(self.directory, 'strokes.log')
+        for n, keys in (('.2', ['S-']), ('.1', ['T-']), ('', ['K-'])):
+            with open(filename + n, 'w') as fp:
+                fp.write(log_line('2016-10-19 12:00:00,000', keys))
+        self.assertEqual(stroke_log_files(filename),
+                         [filename + '.2', filename + '.1', filename])
+        self.assertEqual(stroke_log_files(filename, backups=False), [filename])
+        self.assertEqual([s.rtfcre for s in load_stroke_logs([filename])],
+                         ['S', 'T', 'K'])
+
+    def test_replay(self):
+        d = dictionary_from_entries((
+            ('KAT', 'cat'),
+            ('KAT/HROG', 'catalog'),
+            ('-S', '{^s}'),
+        ))
+        replayer = Replayer([d])
+        strokes = [LoggedStroke(n, None, keys) for n, keys in enumerate((
+            ['K-', 'A-', '-T'],
+            ['H-', 'R-', 'O-', '-G'],
+            ['-S'],
+            ['K-', 'A-', '-T'],
+            ['*'],
+        ))]
+        replayer.replay(strokes, budget=0)
+        self.assertEqual(replayer.output.text, ' catalogs')
+        for stage, histogram in replayer.histograms.items():
+            # No machine, no output queue, and IME is disabled.
+            expected = 0 if stage in ('decode', 'continuations', 'output_queue') else 5
+            self.assertEqual(histogram.count, expected, msg=stage)
+        self.assertEqual(len(replayer.over_budget), 5)
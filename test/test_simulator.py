@@ -0,0 +1,101 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""End to end tests of the serial machines, using simulators."""
+
+import os
+import threading
+import unittest
+
+from plover import system
+from plover.machine.base import STATE_RUNNING
+from plover.machine.registry import machine_registry
+
+
+if hasattr(os, 'openpty'):
+    from plover.machine.simulator import create_simulator, machine_params, \
+        parse_script
+    from plover.machine.simulator.base import DISCONNECT, NOISE, STROKES, WAIT
+
+
+# Machine, script, expected strokes.
+CASES = (
+    ('Gemini PR', '''
+     S1- T- A- -T
+     wait 0.01
+     K- -E -B / #1 -Z
+     ''', [['S-', 'T-', 'A-', '-T'], ['K-', '-E', '-B'], ['#', '-Z']]),
+    ('TX Bolt', '''
+     S- T- A- -T
+     -E -B / K- / R- -R
+     ''', [['S-', 'T-', 'A-', '-T'], ['-E', '-B'], ['K-'], ['R-', '-R']]),
+    ('Passport', '''
+     S T A Y
+     K E B / # Z
+     ''', [['S-', 'T-', 'A-', '-T'], ['K-', '-E', '-B'], ['#', '-Z']]),
+    ('ProCAT', '''
+     S- T- A- -T
+     K- -E -B / # -Z
+     ''', [['S-', 'T-', 'A-', '-T'], ['K-', '-E', '-B'], ['#', '-Z']]),
+    ('Stentura', '''
+     S- T- A- -T
+     K- -E -B / # -Z
+     ''', [['S-', 'T-', 'A-', '-T'], ['K-', '-E', '-B'], ['#', '-Z']]),
+)
+
+
+class SimulatorTestCase(unittest.TestCase):
+
+    def test_parse_script(self):
+        if not hasattr(os, 'openpty'):
+            raise unittest.SkipTest('no pseudo-terminals')
+        self.assertEqual(parse_script('''
+                                      # Comment.
+                                      S- T-
+                                      wait 0.5
+                                      A- / -T
+                                      noise 3
+                                      disconnect
+                                      '''), [
+                                          (STROKES, [['S-', 'T-']]),
+                                          (WAIT, 0.5),
+                                          (STROKES, [['A-'], ['-T']]),
+                                          (NOISE, 3),
+                                          (DISCONNECT, None),
+                                      ])
+        with self.assertRaises(ValueError):
+            parse_script('wait')
+        with self.assertRaises(ValueError):
+            create_simulator('Gemini PR', parse_script('S- T-'))
+
+    def test_machines(self):
+        if not hasattr(os, 'openpty'):
+            raise unittest.SkipTest('no pseudo-terminals')
+        for machine_name, script, expected in CASES:
+            machine_class = machine_registry.get(machine_name)
+            simulator = create_simulator(machine_name, parse_script(script))
+            machine = machine_class(machine_params(machine_class, simulator,
+                                                   timeout=0.1))
+            machine.set_mappings(system.KEYMAPS[machine_name])
+            strokes = []
+            ready = threading.Event()
+            done = threading.Event()
+            def on_state(state):
+                if state == STATE_RUNNING:
+                    ready.set()
+            def on_stroke(steno_keys):
+                strokes.append(sorted(steno_keys, key=system.KEY_ORDER.get))
+                if len(strokes) == len(expected):
+                    done.set()
+            machine.add_state_callback(on_state)
+            machine.add_stroke_callback(on_stroke)
+            simulator.start()
+            try:
+                machine.start_capture()
+                self.assertTrue(ready.wait(5), machine_name)
+                simulator.play()
+                self.assertTrue(done.wait(5), machine_name)
+            finally:
+                machine.stop_capture()
+                simulator.stop()
+            self.assertEqual(strokes, expected, machine_name)
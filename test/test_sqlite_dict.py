@@ -0,0 +1,144 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for sqlite_dict.py."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from plover.dictionary import base, sqlite_dict
+from plover.dictionary.sqlite_dict import SqliteDictionary
+from plover.headless import create_engine, send_keys, steno_to_keys
+from plover.steno import rtfcre_to_mask
+from plover.steno_dictionary import StenoDictionary, \
+    StenoDictionaryCollection
+
+
+class SqliteDictionaryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        tmpdir = tempfile.mkdtemp()
+        # Note: cleanups are run last in, first out, so the dictionaries
+        # are closed before the directory is removed.
+        self.addCleanup(shutil.rmtree, tmpdir)
+        self.path = os.path.join(tmpdir, 'test.db')
+
+    def _load(self):
+        d = sqlite_dict.load_dictionary(self.path)
+        self.addCleanup(d.close)
+        return d
+
+    def test_dictionary(self):
+        d = self._load()
+        self.assertEqual(len(d), 0)
+        self.assertEqual(d.longest_key, 0)
+        d.update({
+            ('KAT',): 'cat',
+            ('KAT', 'HROG'): 'catalog',
+            ('TKOG',): 'dog',
+        })
+        d[('TKOG', 'S', '-Z')] = 'dogs'
+        self.assertEqual(len(d), 4)
+        self.assertEqual(d.longest_key, 3)
+        self.assertEqual(d[('KAT', 'HROG')], 'catalog')
+        self.assertEqual(d.get(('HROG',)), None)
+        self.assertIn(('TKOG',), d)
+        self.assertEqual(d.get_masks([rtfcre_to_mask('KAT')]), 'cat')
+        d[('KAT',)] = 'Kat'
+        self.assertEqual(d[('KAT',)], 'Kat')
+        del d[('TKOG', 'S', '-Z')]
+        self.assertEqual(d.longest_key, 2)
+        with self.assertRaises(KeyError):
+            del d[('TKOG', 'S', '-Z')]
+        with self.assertRaises(KeyError):
+            d[('TKOG', 'S', '-Z')]
+        self.assertEqual(sorted(d.items()), [
+            (('KAT',), 'Kat'),
+            (('KAT', 'HROG'), 'catalog'),
+            (('TKOG',), 'dog'),
+        ])
+        self.assertEqual(sorted(d), [('KAT',), ('KAT', 'HROG'), ('TKOG',)])
+
+    def test_iteration(self):
+        d = self._load()
+        entries = dict(((('S%u' % n,), str(n))
+                        for n in range(sqlite_dict.ITERATION_BATCH_SIZE + 10)))
+        d.update(entries)
+        self.assertEqual(dict(d.items()), entries)
+        self.assertEqual(len(list(d)), len(entries))
+
+    def test_save(self):
+        d = self._load()
+        d[('KAT', 'HROG')] = 'catalog'
+        d.save()
+        d[('TKOG',)] = 'dog'
+        # Changes are only written to the database when saved.
+        other = SqliteDictionary()
+        other.set_path(self.path)
+        self.addCleanup(other.close)
+        self.assertEqual(len(other), 1)
+        self.assertEqual(other.longest_key, 2)
+        self.assertEqual(other[('KAT', 'HROG')], 'catalog')
+        self.assertNotIn(('TKOG',), other)
+
+    def test_lookups(self):
+        d = self._load()
+        d.update({
+            ('KAT',): 'cat',
+            ('KAT', 'HROG'): 'catalog',
+            ('KAT', 'HROG', '-S'): 'catalogs',
+            ('KAPT',): 'Cat',
+            ('K*AT',): 'cat',
+            ('KATS',): 'cats',
+        })
+        self.assertEqual(sorted(d.reverse_lookup('cat')),
+                         [('K*AT',), ('KAT',)])
+        self.assertEqual(d.reverse_lookup('dog'), [])
+        self.assertEqual(d.casereverse_lookup('cat'), set(['cat', 'Cat']))
+        self.assertIsNone(d.casereverse_lookup('dog'))
+        self.assertEqual(sorted(d.continuations(('KAT',))), [
+            (('KAT', 'HROG'), 'catalog'),
+            (('KAT', 'HROG', '-S'), 'catalogs'),
+        ])
+        self.assertEqual(d.continuations(('KATS',)), [])
+
+    def test_continuations(self):
+        # The in-memory implementation must match.
+        for d in (StenoDictionary(), self._load()):
+            d.update({
+                ('KAT',): 'cat',
+                ('KAT', 'HROG'): 'catalog',
+                ('KATS',): 'cats',
+            })
+            self.assertEqual(d.continuations(('KAT',)),
+                             [(('KAT', 'HROG'), 'catalog')])
+
+    def test_load_dictionary(self):
+        d = base.create_dictionary(self.path)
+        self.addCleanup(d.close)
+        self.assertIsInstance(d, SqliteDictionary)
+        d[('KAT',)] = 'cat'
+        d.save()
+        d = base.load_dictionary(self.path)
+        self.addCleanup(d.close)
+        self.assertIsInstance(d, SqliteDictionary)
+        self.assertEqual(d[('KAT',)], 'cat')
+        self.assertEqual(d.save, d._save)
+
+    def test_translation(self):
+        d = self._load()
+        d.update({
+            ('KAT',): 'cat',
+            ('KAT', 'HROG'): 'catalog',
+            ('-S',): '{^s}',
+            ('TKOG',): 'dog',
+        })
+        collection = StenoDictionaryCollection(None)
+        collection.set_dicts([d])
+        self.assertEqual(collection.longest_key, 2)
+        engine = create_engine([d])
+        for keys in steno_to_keys('KAT/HROGS/TKOGS/KAT'):
+            send_keys(engine, keys)
+        self.assertEqual(engine.output.text, ' catalogs dogs cat')
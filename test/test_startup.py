@@ -0,0 +1,27 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for startup.py."""
+
+import unittest
+
+from plover.startup import StartupTimer
+
+
+class StartupTimerTestCase(unittest.TestCase):
+
+    def test_timer(self):
+        timer = StartupTimer()
+        timer.mark('first')
+        timer.mark('second')
+        self.assertEqual([name for name, duration in timer.phases],
+                         ['first', 'second'])
+        self.assertAlmostEqual(sum(duration for name, duration in timer.phases),
+                               timer.total)
+        report = timer.report()
+        self.assertTrue(report.startswith('startup took '))
+        self.assertIn('first: ', report)
+        self.assertIn('second: ', report)
+        # Marks after the report are ignored.
+        timer.mark('third')
+        self.assertEqual(len(timer.phases), 2)
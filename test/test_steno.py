@@ -5,7 +5,10 @@
 
 import unittest
 
-from plover.steno import normalize_steno, Stroke
+from mock import patch
+
+from plover.steno import normalize_steno, normalize_steno_batch, \
+    stroke_from_keys, stroke_to_keys, Stroke
 
 
 class StenoTestCase(unittest.TestCase):
@@ -52,6 +55,17 @@ class StenoTestCase(unittest.TestCase):
             )
             self.assertEqual(result, expected, msg=msg)
 
+    def test_normalize_steno_batch(self):
+        steno_list = ['S-/-ES', 'TW-EPBL', 'S/ES', '1-9/S-']
+        normalized = list(normalize_steno_batch(steno_list))
+        self.assertEqual(normalized,
+                         [normalize_steno(steno) for steno in steno_list])
+        self.assertEqual(normalized[0], ('S', 'ES'))
+        # The same strokes share the same strings.
+        self.assertIs(normalized[0][0], normalized[2][0])
+        self.assertIs(normalized[0][0], normalized[3][1])
+        self.assertIs(normalized[0][1], normalized[2][1])
+
     def test_steno(self):
         self.assertEqual(Stroke(['S-']).rtfcre, 'S')
         self.assertEqual(Stroke(['S-', 'T-']).rtfcre, 'ST')
@@ -59,3 +73,49 @@ class StenoTestCase(unittest.TestCase):
         self.assertEqual(Stroke(['-P', '-P']).rtfcre, '-P')
         self.assertEqual(Stroke(['-P', 'X-']).rtfcre, 'X-P')
         self.assertEqual(Stroke(['#', 'S-', '-T']).rtfcre, '1-9')
+
+    def test_stroke_from_keys(self):
+        stroke = stroke_from_keys(['T-', 'S-', '-T'])
+        self.assertEqual(stroke, Stroke(['S-', 'T-', '-T']))
+        self.assertEqual(stroke.rtfcre, 'ST-T')
+        # Strokes are shared...
+        self.assertIs(stroke_from_keys(['S-', '-T', 'T-', 'S-']), stroke)
+        self.assertIsNot(stroke_from_keys(['S-', 'T-']), stroke)
+        # ...so cannot be modified.
+        with self.assertRaises(AttributeError):
+            stroke.rtfcre = 'S'
+        with self.assertRaises(AttributeError):
+            stroke.steno_keys.append('-S')
+        self.assertEqual(stroke.steno_keys, ('S-', 'T-', '-T'))
+        self.assertEqual(str(stroke), "Stroke(ST-T : ['S-', 'T-', '-T'])")
+
+    def test_stroke_cache_lru(self):
+        with patch('plover.steno.STROKE_CACHE_SIZE', 2), \
+             patch('plover.steno._system_caches', None):
+            s = stroke_from_keys(['S-', 'K-'])
+            t = stroke_from_keys(['T-', 'K-'])
+            self.assertIs(stroke_from_keys(['S-', 'K-']), s)
+            # The least recently used stroke is evicted.
+            stroke_from_keys(['P-', 'K-'])
+            self.assertIs(stroke_from_keys(['S-', 'K-']), s)
+            self.assertIsNot(stroke_from_keys(['T-', 'K-']), t)
+        self.assertTrue(stroke_from_keys(['*']).is_correction)
+        self.assertEqual(stroke_from_keys(['#', 'S-', '-T']).rtfcre, '1-9')
+
+    def test_stroke_to_keys(self):
+        cases = (
+            ('S', ['S-']),
+            ('-S', ['-S']),
+            ('STKPW-FR', ['S-', 'T-', 'K-', 'P-', 'W-', '-F', '-R']),
+            ('KAT', ['K-', 'A-', '-T']),
+            ('A*EU', ['A-', '*', '-E', '-U']),
+            ('*', ['*']),
+            ('1-9', ['S-', '-T', '#']),
+            ('50', ['A-', 'O-', '#']),
+        )
+        for stroke, keys in cases:
+            self.assertEqual(stroke_to_keys(stroke), keys)
+            self.assertEqual(Stroke(keys).rtfcre, stroke)
+        for stroke in ('X', 'ZS', '-SD-F'):
+            with self.assertRaises(ValueError):
+                stroke_to_keys(stroke)
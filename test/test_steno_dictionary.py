@@ -160,3 +160,44 @@ class StenoDictionaryTestCase(unittest.TestCase):
         assertCountEqual(self,
                          dc.reverse_lookup('beautiful'),
                          [('PWAOUFL',), ('PW-FL',)])
+
+    def test_compact(self):
+        d = StenoDictionary()
+        d[('PWAOUFL',)] = 'beautiful'
+        d[('PW-FL',)] = 'Beautiful'
+        d[('WAOUFL',)] = 'beautiful'
+        d[('SKWR-RBGS',)] = 'crow'
+        usage = d.memory_usage()
+        d.set_storage(int_keys=True, compact=True)
+        self.assertTrue(d.compact)
+        self.assertEqual(len(d), 4)
+        self.assertEqual(d[('PW-FL',)], 'Beautiful')
+        assertCountEqual(self, d.reverse_lookup('beautiful'),
+                         [('PWAOUFL',), ('WAOUFL',)])
+        self.assertEqual(d.reverse_lookup('crow'), [('SKWR-RBGS',)])
+        self.assertEqual(d.casereverse_lookup('beautiful'),
+                         set(['beautiful', 'Beautiful']))
+        self.assertEqual(d.casereverse_lookup('crow'), set(['crow']))
+        self.assertIsNone(d.casereverse_lookup('raven'))
+        # Identical translations are shared.
+        self.assertIs(d[('PWAOUFL',)], d[('WAOUFL',)])
+        self.assertLess(d.memory_usage()['total'], usage['total'])
+        del d[('WAOUFL',)]
+        self.assertEqual(d.reverse_lookup('beautiful'), [('PWAOUFL',)])
+        del d[('PWAOUFL',)]
+        self.assertEqual(d.reverse_lookup('beautiful'), [])
+        d[('KROE',)] = 'crow'
+        assertCountEqual(self, d.reverse_lookup('crow'),
+                         [('SKWR-RBGS',), ('KROE',)])
+        # Back to the default storage.
+        d.set_storage()
+        self.assertEqual(d._dict, {
+            ('PW-FL',): 'Beautiful',
+            ('SKWR-RBGS',): 'crow',
+            ('KROE',): 'crow',
+        })
+        assertCountEqual(self, d.reverse['crow'], [('SKWR-RBGS',), ('KROE',)])
+        self.assertEqual(d.casereverse['beautiful'], set(['Beautiful']))
+        dc = StenoDictionaryCollection(None)
+        dc.set_dicts([d])
+        self.assertEqual(dc.casereverse_lookup('crow'), set(['crow']))
@@ -513,7 +513,7 @@ class TestCase(unittest.TestCase):
             read_data = []
 
             def callback(data):
-                read_data.append(data)
+                read_data.extend(stentura._parse_strokes(data))
 
             port = test[0]
             expected = test[1]
@@ -0,0 +1,95 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for the batch delivery of strokes."""
+
+import unittest
+
+from plover import system
+from plover.headless import create_engine, dictionary_from_entries, \
+    send_keys, send_strokes, steno_to_keys
+from plover.machine.base import StenotypeBase
+
+
+class FakeMachine(StenotypeBase):
+
+    KEYS_LAYOUT = ' '.join(system.KEYS)
+
+
+ENTRIES = (
+    ('KAT', 'cat'),
+    ('KAT/HROG', 'catalog'),
+    ('-S', '{^s}'),
+    ('TKOG', 'dog'),
+    ('PER', '{.}'),
+    ('KA*T', 'Kat'),
+    ('STKPWHR', '{*}'),
+)
+
+
+class StrokeBatchTestCase(unittest.TestCase):
+
+    def test_notify_batch(self):
+        machine = FakeMachine()
+        single = []
+        batches = []
+        other = []
+        machine.add_stroke_callback(single.append)
+        machine.add_stroke_callback(other.append, batches.append)
+        machine._notify_batch([['S-'], ['T-']])
+        self.assertEqual(single, [['S-'], ['T-']])
+        self.assertEqual(batches, [[['S-'], ['T-']]])
+        self.assertEqual(other, [])
+        # A single stroke goes through the normal callback.
+        machine._notify_batch([['K-']])
+        self.assertEqual(batches, [[['S-'], ['T-']]])
+        self.assertEqual(other, [['K-']])
+        machine.remove_stroke_callback(other.append)
+        machine._notify_batch([['P-'], ['W-']])
+        self.assertEqual(batches, [[['S-'], ['T-']]])
+        self.assertEqual(single[-2:], [['P-'], ['W-']])
+
+    def _run(self, batches, space_placement='Before Output'):
+        d = dictionary_from_entries(ENTRIES)
+        engine = create_engine([d], space_placement=space_placement)
+        for steno in batches:
+            strokes = steno_to_keys(steno)
+            if len(strokes) == 1:
+                send_keys(engine, strokes[0])
+            else:
+                send_strokes(engine, strokes)
+        return engine.output
+
+    def test_batch_output(self):
+        for space_placement in ('Before Output', 'After Output'):
+            for strokes in (
+                # Multi-strokes translation.
+                ['KAT', 'HROG', '-S', 'TKOG'],
+                # Corrections, and undo of a previous translation.
+                ['KAT', 'HROG', '*', '*', 'TKOG', 'PER'],
+                ['TKOG', '*', '*', '*', 'KAT'],
+                # Asterisk with nothing left to undo.
+                ['*', 'KAT'],
+                ['KAT', '*', '*', 'TKOG', '-S'],
+                # Asterisk toggle.
+                ['KAT', 'PER', 'KAT', 'STKPWHR', 'TKOG', 'STKPWHR'],
+            ):
+                expected = self._run(strokes, space_placement)
+                # Batch every contiguous run of strokes (including the
+                # whole sequence).
+                for start in range(len(strokes)):
+                    for end in range(start + 2, len(strokes) + 1):
+                        batches = (strokes[:start] +
+                                   ['/'.join(strokes[start:end])] +
+                                   strokes[end:])
+                        output = self._run(batches, space_placement)
+                        self.assertEqual(output.text, expected.text,
+                                         msg=(space_placement, batches))
+
+    def test_batch_single_update(self):
+        output = self._run(['KAT', 'HROG/-S/TKOG/*/*'])
+        # One update for the first stroke, one for the batch.
+        self.assertEqual(output.instructions, [
+            ('s', ' cat'),
+            ('s', 'alog'),
+        ])
@@ -0,0 +1,119 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for the bitmask representation of strokes."""
+
+import unittest
+
+from plover.headless import create_engine, dictionary_from_entries, \
+    send_keys, steno_to_keys
+from plover.steno import Stroke, keys_to_mask, mask_to_keys, \
+    mask_to_rtfcre, rtfcre_to_mask, stroke_to_keys
+from plover.steno_dictionary import StenoDictionary, \
+    StenoDictionaryCollection
+
+
+class StrokeMaskTestCase(unittest.TestCase):
+
+    def test_round_trip(self):
+        for rtfcre in (
+            '', '#', '*', 'A', 'E', '-Z', 'KAT', 'K-T', 'AEU', 'STKPW-FR',
+            'SKWR-RBGS', 'STPH-FPLT', '1-9', '12K', '#-Z',
+        ):
+            mask = rtfcre_to_mask(rtfcre)
+            self.assertIsNotNone(mask, rtfcre)
+            self.assertEqual(mask_to_rtfcre(mask), rtfcre)
+            self.assertEqual(keys_to_mask(stroke_to_keys(rtfcre)), mask)
+            stroke = Stroke(stroke_to_keys(rtfcre))
+            self.assertEqual(stroke.mask, mask)
+            self.assertEqual(stroke.rtfcre, rtfcre)
+
+    def test_keys(self):
+        self.assertEqual(keys_to_mask([]), 0)
+        mask = keys_to_mask(['-T', 'K-', 'A-'])
+        self.assertEqual(mask_to_keys(mask), ['K-', 'A-', '-T'])
+        # Number keys also set the number key.
+        self.assertEqual(keys_to_mask(['1-']), keys_to_mask(['#', 'S-']))
+        self.assertIsNone(keys_to_mask(['K-', 'X']))
+
+    def test_invalid(self):
+        # Invalid, or not normalized strokes.
+        for rtfcre in ('X', 'KAT-', '-E', 'KT', '9-'):
+            self.assertIsNone(rtfcre_to_mask(rtfcre), rtfcre)
+
+    def test_stroke_mask(self):
+        self.assertEqual(Stroke([]).mask, 0)
+        self.assertEqual(Stroke(['-T', 'K-', 'A-']).mask,
+                         rtfcre_to_mask('KAT'))
+
+
+class IntKeysDictionaryTestCase(unittest.TestCase):
+
+    def test_dictionary(self):
+        d = StenoDictionary()
+        d[('KAT',)] = 'cat'
+        d[('KAT', 'HROG')] = 'catalog'
+        d[('-E',)] = 'e'
+        d.set_int_keys(True)
+        self.assertTrue(d.int_keys)
+        self.assertEqual(len(d), 3)
+        self.assertEqual(len(d._str_dict), 1)
+        self.assertEqual(d[('KAT', 'HROG')], 'catalog')
+        self.assertEqual(d[('-E',)], 'e')
+        self.assertEqual(d.get_masks([rtfcre_to_mask('KAT')]), 'cat')
+        self.assertEqual(sorted(d.items()), [
+            (('-E',), 'e'),
+            (('KAT',), 'cat'),
+            (('KAT', 'HROG'), 'catalog'),
+        ])
+        self.assertEqual(d.reverse_lookup('catalog'), [('KAT', 'HROG')])
+        d[('TKOG', 'S', '-Z')] = 'dogs'
+        self.assertEqual(d.longest_key, 3)
+        del d[('TKOG', 'S', '-Z')]
+        self.assertEqual(d.longest_key, 2)
+        del d[('KAT', 'HROG')]
+        self.assertEqual(d.longest_key, 1)
+        with self.assertRaises(KeyError):
+            d[('KAT', 'HROG')]
+        d.set_int_keys(False)
+        self.assertEqual(d._dict, {('KAT',): 'cat', ('-E',): 'e'})
+        self.assertEqual(d._str_dict, {})
+
+    def test_collection(self):
+        d1 = StenoDictionary()
+        d1[('KAT',)] = 'cat'
+        d1[('TKOG',)] = 'dog'
+        d2 = StenoDictionary()
+        d2[('KAT',)] = 'Kat'
+        d2.set_int_keys(True)
+        dc = StenoDictionaryCollection(None)
+        dc.set_dicts([d1, d2])
+        self.assertFalse(dc.int_keys)
+        kat = [rtfcre_to_mask('KAT')]
+        self.assertEqual(dc.lookup_masks(kat), 'Kat')
+        self.assertEqual(dc.lookup_masks([rtfcre_to_mask('TKOG')]), 'dog')
+        self.assertEqual(dc.reverse_lookup('Kat'), [('KAT',)])
+        dc.add_filter(lambda key, value: key == ('KAT',))
+        self.assertIsNone(dc.lookup_masks(kat))
+        d1.set_int_keys(True)
+        dc.set_dicts([d1, d2])
+        self.assertTrue(dc.int_keys)
+
+    def test_translation(self):
+        entries = (
+            ('KAT', 'cat'),
+            ('KAT/HROG', 'catalog'),
+            ('-S', '{^s}'),
+            ('-G', '{^ing}'),
+            ('TKOG', 'dog'),
+            ('RUPB', 'run'),
+        )
+        expected = ' catalogs dogs running cat'
+        for int_keys in (False, True):
+            d = dictionary_from_entries(entries)
+            d.set_int_keys(int_keys)
+            engine = create_engine([d])
+            # Multi-strokes and suffix keys lookups.
+            for keys in steno_to_keys('KAT/HROGS/TKOGS/RUPBG/KAT'):
+                send_keys(engine, keys)
+            self.assertEqual(engine.output.text, expected, int_keys)
@@ -0,0 +1,129 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for stroke_queue.py."""
+
+import threading
+import unittest
+
+from plover.headless import create_engine, dictionary_from_entries, \
+    send_keys, steno_to_keys
+from plover.stroke_queue import OVERFLOW_BLOCK, OVERFLOW_DROP, StrokeQueue
+
+
+class StrokeQueueTestCase(unittest.TestCase):
+
+    def test_queue(self):
+        stroke_queue = StrokeQueue(10)
+        calls = []
+        threads = set()
+        def call(n):
+            threads.add(threading.current_thread().name)
+            calls.append(n)
+        def fail():
+            raise ValueError('failed')
+        # Block the thread, so calls pile up in the queue.
+        blocked = threading.Event()
+        stroke_queue.submit(blocked.wait)
+        for n in range(3):
+            self.assertTrue(stroke_queue.submit(call, n))
+        # Errors do not stop the thread.
+        stroke_queue.submit(fail)
+        stroke_queue.submit(call, 3)
+        self.assertEqual(stroke_queue.depth, 6)
+        self.assertEqual(stroke_queue.max_depth, 6)
+        stroke_queue.start()
+        blocked.set()
+        stroke_queue.stop()
+        self.assertFalse(stroke_queue.is_alive())
+        self.assertEqual(calls, [0, 1, 2, 3])
+        self.assertEqual(threads, set(['StrokeQueue']))
+        stats = stroke_queue.stats()
+        self.assertEqual(stats['depth'], 0)
+        self.assertEqual(stats['max_depth'], 6)
+        self.assertEqual(stats['wait']['count'], 6)
+        self.assertEqual((stats['blocked'], stats['dropped']), (0, 0))
+
+    def test_overflow_drop(self):
+        stroke_queue = StrokeQueue(2, OVERFLOW_DROP)
+        calls = []
+        results = [stroke_queue.submit(calls.append, n) for n in range(4)]
+        self.assertEqual(results, [True, True, False, False])
+        # Other calls are never dropped.
+        stroke_queue.call(calls.append, 'call')
+        stroke_queue.start()
+        stroke_queue.stop()
+        self.assertEqual(calls, [0, 1, 'call'])
+        self.assertEqual(stroke_queue.dropped, 2)
+        self.assertEqual(stroke_queue.blocked, 0)
+
+    def test_overflow_block(self):
+        stroke_queue = StrokeQueue(2, OVERFLOW_BLOCK)
+        calls = []
+        for n in range(2):
+            stroke_queue.submit(calls.append, n)
+        # The queue is full: the next submit waits for the thread.
+        submitted = threading.Event()
+        def submit():
+            stroke_queue.submit(calls.append, 2)
+            submitted.set()
+        thread = threading.Thread(target=submit)
+        thread.start()
+        self.assertFalse(submitted.wait(0.1))
+        stroke_queue.start()
+        self.assertTrue(submitted.wait(5))
+        thread.join()
+        stroke_queue.stop()
+        self.assertEqual(calls, [0, 1, 2])
+        self.assertEqual(stroke_queue.blocked, 1)
+        self.assertEqual(stroke_queue.dropped, 0)
+
+    def test_invalid_overflow(self):
+        with self.assertRaises(ValueError):
+            StrokeQueue(10, 'ignore')
+
+    def test_engine(self):
+        d = dictionary_from_entries((
+            ('KAT', 'cat'),
+            ('KAT/HROG', 'catalog'),
+        ))
+        engine = create_engine([d])
+        threads = set()
+        engine.add_stroke_listener(
+            lambda stroke: threads.add(threading.current_thread().name))
+        engine.set_stroke_queue(10)
+        stroke_queue = engine.get_stroke_queue()
+        for keys in steno_to_keys('KAT/HROG/KAT'):
+            send_keys(engine, keys)
+        # Changing the queue translates the pending strokes first.
+        engine.set_stroke_queue(0)
+        self.assertIsNone(engine.get_stroke_queue())
+        self.assertFalse(stroke_queue.is_alive())
+        self.assertEqual(engine.output.text, ' catalog cat')
+        self.assertEqual(threads, set(['StrokeQueue']))
+
+    def test_engine_lock(self):
+        d = dictionary_from_entries((('KAT', 'cat'),))
+        engine = create_engine([d])
+        translating = threading.Event()
+        resume = threading.Event()
+        def listener(stroke):
+            translating.set()
+            resume.wait(5)
+        engine.add_stroke_listener(listener)
+        engine.set_stroke_queue(10)
+        send_keys(engine, steno_to_keys('KAT')[0])
+        self.assertTrue(translating.wait(5))
+        # Engine changes wait for the stroke to be translated.
+        changed = threading.Event()
+        def change():
+            engine.set_space_placement('After Output')
+            changed.set()
+        thread = threading.Thread(target=change)
+        thread.start()
+        self.assertFalse(changed.wait(0.1))
+        resume.set()
+        self.assertTrue(changed.wait(5))
+        thread.join()
+        engine.set_stroke_queue(0)
+        self.assertEqual(engine.output.text, ' cat')
@@ -0,0 +1,81 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for txbolt.py."""
+
+import threading
+import unittest
+
+from mock import patch
+
+from plover.machine.txbolt import TxBolt
+from plover import system
+
+
+class MockSerial(object):
+
+    def __init__(self, **params):
+        self.timeout = params.get('timeout')
+        self.inputs = []
+        self.condition = threading.Condition()
+        self.cancelled = False
+
+    def isOpen(self):
+        return True
+
+    def inWaiting(self):
+        with self.condition:
+            return len(self.inputs[0]) if self.inputs else 0
+
+    def send(self, data):
+        with self.condition:
+            self.inputs.append(data)
+            self.condition.notify()
+
+    def read(self, size=1):
+        with self.condition:
+            if not self.inputs and not self.cancelled:
+                self.condition.wait(self.timeout)
+            if self.cancelled:
+                self.cancelled = False
+                return b''
+            if not self.inputs:
+                return b''
+            return self.inputs.pop(0)
+
+    def cancel_read(self):
+        with self.condition:
+            self.cancelled = True
+            self.condition.notify()
+
+    def close(self):
+        pass
+
+
+class TestCase(unittest.TestCase):
+
+    def test_txbolt(self):
+        params = {k: v[0] for k, v in TxBolt.get_option_info().items()}
+        strokes = []
+        done = threading.Event()
+        def on_stroke(stroke):
+            strokes.append(stroke)
+            if len(strokes) == 3:
+                done.set()
+        with patch('plover.machine.base.serial.Serial', MockSerial):
+            m = TxBolt(params)
+            m.add_stroke_callback(on_stroke)
+            m.set_mappings(system.KEYMAPS['TX Bolt'])
+            m.start_capture()
+            port = m.serial_port
+            # S- T- (set 0), A- (set 1), -T -Z (set 3):
+            # the last set finishes the stroke.
+            port.send(b'\x03\x42\xc9')
+            # A burst of 2 strokes: -F (set 2), then K- (set 0)
+            # which is only finished by the timeout.
+            port.send(b'\x81\x04')
+            self.assertTrue(done.wait(2))
+            # Stopping must not wait for the port timeout.
+            m.stop_capture()
+        self.assertEqual(strokes, [['S-', 'T-', 'A-', '-T', '-Z'],
+                                   ['-F'], ['K-']])
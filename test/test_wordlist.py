@@ -0,0 +1,72 @@
+# Copyright (c) 2016 Open Steno Project
+# See LICENSE.txt for details.
+
+"""Unit tests for system/wordlist.py."""
+
+from io import open
+import os
+import shutil
+import tempfile
+import unittest
+
+from plover.system.wordlist import WordList
+
+
+WORDS = u'''
+the 1
+The 3
+of 2
+caf\xe9 7
+zebra 12
+'''
+
+
+class WordListTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.source = os.path.join(self.directory, 'words.txt')
+        with open(self.source, 'w', encoding='utf-8') as fp:
+            fp.write(WORDS)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_lookup(self):
+        words = WordList(self.source, cache_dir=self.directory)
+        self.assertEqual(len(words), 4)
+        self.assertEqual(sorted(words), [u'caf\xe9', u'of', u'the', u'zebra'])
+        self.assertEqual(words[u'the'], 1)
+        self.assertEqual(words[u'caf\xe9'], 7)
+        self.assertEqual(words.get(u'zebra'), 12)
+        self.assertIn(u'of', words)
+        self.assertNotIn(u'The', words)
+        self.assertNotIn(u'o', words)
+        self.assertNotIn(u'zebras', words)
+        self.assertIsNone(words.get(u'a'))
+        with self.assertRaises(KeyError):
+            words[u'a']
+
+    def test_cache(self):
+        words = WordList(self.source, cache_dir=self.directory)
+        self.assertFalse(os.path.exists(words.cache_filename))
+        self.assertIn(u'the', words)
+        self.assertTrue(os.path.exists(words.cache_filename))
+        with open(words.cache_filename, 'rb') as fp:
+            contents = fp.read()
+        # Loaded from the cache.
+        words = WordList(self.source, cache_dir=self.directory)
+        self.assertEqual(words[u'the'], 1)
+        # The source changed: the cache is rebuilt.
+        with open(self.source, 'a', encoding='utf-8') as fp:
+            fp.write(u'zoo 13\n')
+        words = WordList(self.source, cache_dir=self.directory)
+        self.assertEqual(words[u'zoo'], 13)
+        with open(words.cache_filename, 'rb') as fp:
+            self.assertNotEqual(fp.read(), contents)
+
+    def test_missing(self):
+        words = WordList(os.path.join(self.directory, 'missing.txt'),
+                         cache_dir=self.directory)
+        self.assertEqual(len(words), 0)
+        self.assertNotIn(u'the', words)